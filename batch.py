@@ -0,0 +1,139 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from shooting_game import Bullet, Enemy, ShootingGame
+
+# 헤드리스 게임 여러 판을 프로세스 풀에서 나눠 돌리는 배치 실행기 (밸런스 조정, 봇 평가용)
+# 게임 하나 = job(dict) 하나: 시드와 조절값을 담고, 끝나면 결과 dict 하나가 됨
+#   for result in run_batch(jobs, workers=8): ...     -> 끝나는 순서대로 결과를 받음
+#   stats = BatchStats(); stats.add(result)             -> 조절값 묶음별 평균/최소/최대
+# 게임끼리 공유하는 상태가 없어 코어 수만큼 처리량이 늘어남
+
+# job 기본값. params로 비교할 조절값을 덮어씀
+DEFAULTS = {
+    "seed": None,
+    "spawn_interval": (2, 5),     # 다음 Enemy까지 기다리는 시간(초) 범위
+    "max_bullet": 3,
+    "bullet_speed": Bullet.speed,
+    "enemy_speed": Enemy.speed,
+    "fire_every": 0.5,            # 기본 봇: 이 간격(초)마다 부채꼴로 돌아가며 발사 (None이면 쏘지 않음)
+    "script": None,               # (시각, 명령) 목록을 주면 기본 봇 대신 사용
+    "max_time": 600,
+    "tick_rate": 10,
+    "broadphase": "brute",
+    "use_array_store": False,
+}
+
+# 결과를 묶어 비교할 조절값 (시드는 묶음 안에서 바뀌는 값)
+PARAMS = ("spawn_interval", "max_bullet", "bullet_speed", "enemy_speed", "fire_every")
+
+def sweep_script(fire_every, max_time):
+    # 기본 봇: -60도 ~ 60도를 15도씩 돌아가며 일정 간격으로 발사
+    if fire_every is None:
+        return []
+    angles = itertools.cycle(range(-60, 61, 15))
+    shots = int(max_time / fire_every)
+    return [(index * fire_every, f"fire {next(angles)}") for index in range(1, shots + 1)]
+
+def run_game(job):
+    # job 하나를 이 프로세스에서 끝까지 돌리고 결과 dict 반환
+    job = {**DEFAULTS, **job}
+    # 속력은 이 게임의 Bullet/Enemy에만 적용 (클래스 속성은 그대로라 같은 프로세스의 다른 게임에 영향 없음)
+    game = ShootingGame(use_array_store=job["use_array_store"], broadphase=job["broadphase"],
+                        tick_rate=job["tick_rate"], seed=job["seed"],
+                        bullet_speed=job["bullet_speed"], enemy_speed=job["enemy_speed"], max_bullet=job["max_bullet"])
+    game.enemy_spawner.spawn_interval = tuple(job["spawn_interval"])
+    script = job["script"]
+    if script is None:
+        script = sweep_script(job["fire_every"], job["max_time"])
+    result = game.run_headless(script, max_time=job["max_time"], record_ticks=False)
+
+    return {
+        "seed": job["seed"],
+        "params": {name: job[name] for name in PARAMS},
+        **result.summary(),
+        "game_over": result.player_status.get_life() <= 0,
+    }
+
+def run_chunk(jobs):
+    # 워커에서 실행: job 여러 개를 한 번에 받아 프로세스 간 주고받는 횟수를 줄임
+    return [run_game(job) for job in jobs]
+
+def chunked(jobs, size):
+    jobs = iter(jobs)
+    while True:
+        chunk = list(itertools.islice(jobs, size))
+        if not chunk:
+            return
+        yield chunk
+
+def run_batch(jobs, workers=None, chunksize=8):
+    # jobs(리스트나 제너레이터)를 workers개 프로세스로 돌리고 끝나는 순서대로 결과를 내어줌
+    # 한 번에 워커 수의 몇 배 chunk만 넘겨 두어, job이 아주 많아도 future가 한꺼번에 쌓이지 않음
+    # workers=0이면 풀 없이 이 프로세스에서 차례로 돌림
+    if workers == 0:
+        for job in jobs:
+            yield run_game(job)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(jobs, chunksize)
+    # fork 대신 spawn: 스레드가 돌던 프로세스(Django 서버 등)를 복제하지 않음
+    with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as executor:
+        running = deque()
+        for chunk in itertools.islice(chunks, workers * 4):
+            running.append(executor.submit(run_chunk, chunk))
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.remove(future)
+                yield from future.result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    running.append(executor.submit(run_chunk, chunk))
+
+def param_key(params):
+    return tuple(tuple(value) if isinstance(value, list) else value for value in params.values())
+
+class BatchStats:
+    # 끝난 결과를 조절값 묶음별로 모으는 객체. 결과를 받는 대로 add하고 언제든 summary를 볼 수 있음
+    def __init__(self):
+        self.groups = {}
+        self.games = 0
+
+    def add(self, result):
+        self.games += 1
+        group = self.groups.get(param_key(result["params"]))
+        if group is None:
+            group = self.groups[param_key(result["params"])] = {
+                "params": result["params"], "games": 0, "score": 0, "ticks": 0, "game_over": 0,
+                "min_score": result["score"], "max_score": result["score"], "wall_time": 0.0,
+            }
+        group["games"] += 1
+        group["score"] += result["score"]
+        group["ticks"] += result["ticks"]
+        group["game_over"] += result["game_over"]
+        group["min_score"] = min(group["min_score"], result["score"])
+        group["max_score"] = max(group["max_score"], result["score"])
+        group["wall_time"] += result["wall_time"]
+
+    def summary(self):
+        # 조절값 묶음별 평균 점수/틱, 게임 오버 비율 (평균 점수 높은 순)
+        rows = []
+        for group in self.groups.values():
+            games = group["games"]
+            rows.append({
+                "params": group["params"],
+                "games": games,
+                "mean_score": group["score"] / games,
+                "min_score": group["min_score"],
+                "max_score": group["max_score"],
+                "mean_ticks": group["ticks"] / games,
+                "game_over_rate": group["game_over"] / games,
+                "cpu_seconds": group["wall_time"],
+            })
+        rows.sort(key=lambda row: -row["mean_score"])
+        return rows
@@ -0,0 +1,99 @@
+from abc import *
+from collections import defaultdict
+
+# 충돌 검사 전에 "가까이 있는" 쌍만 골라내는 broadphase 모음
+# 골라낸 쌍만 is_collide_at / isCollision(narrowphase)으로 넘어감
+
+def get_position(obj):
+    # 기본 영역 함수: shooting_game 객체는 get_position()이 x1, y1, x2, y2를 반환
+    return obj.get_position()
+
+def overlaps(box, other):
+    x1, y1, x2, y2 = box
+    a1, b1, a2, b2 = other
+    return x2 >= a1 and y2 >= b1 and a2 >= x1 and b2 >= y1
+
+class Broadphase(ABC):
+    # 움직이는 객체(moving)와 부딪힐 객체(targets) 사이의 후보 쌍을 만드는 추상 클래스
+    # 후보 쌍은 brute force와 같은 순서(moving 순서 -> targets 순서)로 반환
+    def __init__(self, bounds=get_position):
+        # bounds: 객체를 받아 (x1, y1, x2, y2) 영역을 돌려주는 함수 (Django 모델은 aabb)
+        self.bounds = bounds
+
+    @abstractmethod
+    def pairs(self, moving, targets):
+        pass
+
+class BruteForceBroadphase(Broadphase):
+    # 모든 쌍을 그대로 넘기는 기준 구현-> 다른 broadphase의 정답 비교용
+    def pairs(self, moving, targets):
+        return [(mover, target) for mover in moving for target in targets]
+
+class SpatialHashBroadphase(Broadphase):
+    # 균일 격자(uniform grid) 해시: target을 칸에 넣고, mover가 걸친 칸의 target만 후보로 삼음
+    def __init__(self, cell_size=100, bounds=get_position):
+        super().__init__(bounds)
+        self.cell_size = cell_size
+
+    def cells(self, box):
+        x1, y1, x2, y2 = box
+        size = self.cell_size
+        for cx in range(int(x1 // size), int(x2 // size) + 1):
+            for cy in range(int(y1 // size), int(y2 // size) + 1):
+                yield cx, cy
+
+    def pairs(self, moving, targets):
+        grid = defaultdict(list)
+        for index, target in enumerate(targets):
+            for cell in self.cells(self.bounds(target)):
+                grid[cell].append(index)
+
+        result = []
+        for mover in moving:
+            box = self.bounds(mover)
+            found = set()
+            for cell in self.cells(box):
+                found.update(grid.get(cell, ()))
+            for index in sorted(found):
+                if overlaps(box, self.bounds(targets[index])):
+                    result.append((mover, targets[index]))
+        return result
+
+class SweepAndPruneBroadphase(Broadphase):
+    # x축으로 정렬한 뒤 훑어가며(sort and sweep) x 구간이 겹치는 쌍만 y축까지 비교
+    def pairs(self, moving, targets):
+        edges = []
+        for index, mover in enumerate(moving):
+            box = self.bounds(mover)
+            edges.append((box[0], box[2], 0, index, box))
+        for index, target in enumerate(targets):
+            box = self.bounds(target)
+            edges.append((box[0], box[2], 1, index, box))
+        # 같은 x1이면 target을 먼저 넣어 경계가 맞닿은 쌍도 놓치지 않음
+        edges.sort(key=lambda edge: (edge[0], -edge[2]))
+
+        active = ([], [])
+        found = []
+        for x1, x2, side, index, box in edges:
+            other = active[1 - side]
+            # 이미 끝난 구간(x2 < 현재 x1)은 활성 목록에서 뺌
+            other[:] = [edge for edge in other if edge[1] >= x1]
+            for _, _, other_index, other_box in other:
+                if box[1] <= other_box[3] and other_box[1] <= box[3]:
+                    found.append((index, other_index) if side == 0 else (other_index, index))
+            active[side].append((x1, x2, index, box))
+
+        found.sort()
+        return [(moving[mover], targets[target]) for mover, target in found]
+
+BROADPHASES = {
+    "brute": BruteForceBroadphase,
+    "grid": SpatialHashBroadphase,
+    "sweep": SweepAndPruneBroadphase,
+}
+
+def make_broadphase(name="brute", **kwargs):
+    # 이름으로 broadphase 선택 (arena마다 다르게 설정할 수 있게)
+    if name not in BROADPHASES:
+        raise ValueError(f"알 수 없는 broadphase: {name}")
+    return BROADPHASES[name](**kwargs)
@@ -0,0 +1,250 @@
+import heapq
+import itertools
+import math
+
+from profiling import PROFILER
+
+# 충돌 예측(event-driven) 방식: 틱마다 모든 쌍을 검사하지 않고, 궤적이 바뀔 때만 다음 충돌 틱을 미리 계산해 둠
+# Bullet/Enemy는 반사나 삭제 전까지 틱당 같은 만큼 직선으로 움직이므로 두 객체가 겹치는 시간 구간을 식으로 구할 수 있음
+#   - 새로 생긴 객체, 위치/각도가 예상과 다른 객체(반사, pool 재사용, 복원 등)는 상대 후보 전부와 다시 예측
+#   - 예측한 충돌은 (틱, 쌍) 우선순위 큐에 넣고, 이번 틱이 된 것만 꺼내 is_collide_at(sweep)으로 확인
+#   - 객체의 궤적을 다시 예측하면 버전이 바뀌어, 큐에 남은 예전 예측은 꺼낼 때 버려짐
+# 틱마다 드는 일은 객체당 "예상 위치와 같은가" 비교 한 번 + 이번 틱에 예정된 충돌 수뿐 (드문 arena에서는 쌍 검사가 거의 0)
+#
+# 시간 단위는 틱: 마지막으로 본 틱 at의 위치가 (x, y)이면 틱 k의 이동이 끝난 위치는 (x, y) + v * (k - at)
+# sweep은 틱 k 동안([k-1, k]) 지나온 경로로 확인하므로 겹치는 구간 [enter, leave]와 [k-1, k]가 만나는 첫 틱 k에 충돌이 일어남
+# 궤적은 절대 시각 0이 아니라 마지막으로 본 틱 기준: 틱 수가 커져도 a - v * now 같은 뺄셈으로 자리수를 잃지 않음
+
+# 부동소수점 오차로 경계/모서리에 닿는 충돌을 놓치지 않도록 영역을 이만큼 넓게 보고 (위치 단위)
+# 예측 틱도 조금 일찍 잡음 (틱 단위). 일찍 꺼낸 예측은 sweep이 거르고 다시 예측함
+TOLERANCE = 1e-6
+EPSILON = 1e-6
+
+class Track:
+    # 객체 하나의 현재 직선 궤적: 틱 t의 영역 왼쪽 위 = (x + vx * (t - at), y + vy * (t - at)), 크기 width x height
+    # start 이후에만 유효. (x, y)와 at은 예상대로 움직일 때마다 마지막으로 본 위치와 틱으로 갱신됨
+    __slots__ = ("version", "x", "y", "at", "vx", "vy", "width", "height", "start", "angle", "moving")
+
+    def __init__(self, version, box, velocity, angle, now, start):
+        x1, y1, x2, y2 = box
+        self.version = version
+        self.vx, self.vy = velocity
+        self.x = x1
+        self.y = y1
+        self.at = now
+        self.width = x2 - x1
+        self.height = y2 - y1
+        self.start = start
+        self.angle = angle
+        self.moving = True
+
+def overlap_interval(first, second):
+    # 두 궤적의 영역이 겹치는(경계가 닿는 것 포함, TOLERANCE만큼 넓게) 시간 구간 (enter, leave). 겹치지 않으면 None
+    # first.at 기준 상대 시간으로 계산해 절대 틱으로 돌려줌 (second는 대개 같은 틱에 본 궤적이라 옮길 거리가 0)
+    origin = first.at
+    shift = origin - second.at
+    enter, leave = -math.inf, math.inf
+    for a1, v1, size1, a2, v2, size2 in (
+        (first.x, first.vx, first.width, second.x + second.vx * shift, second.vx, second.width),
+        (first.y, first.vy, first.height, second.y + second.vy * shift, second.vy, second.height),
+    ):
+        # first - second 거리 d(t) = offset + move * t 가 -size1 <= d(t) <= size2 인 구간
+        offset, move = a1 - a2, v1 - v2
+        low, high = -size1 - TOLERANCE, size2 + TOLERANCE
+        if move == 0:
+            if offset < low or offset > high:
+                return None
+            continue
+        start, end = (low - offset) / move, (high - offset) / move
+        if start > end:
+            start, end = end, start
+        enter = max(enter, start)
+        leave = min(leave, end)
+        if enter > leave:
+            return None
+    return origin + enter, origin + leave
+
+def first_tick(first, second, after):
+    # after 틱보다 뒤에서 두 궤적의 충돌을 sweep이 처음 찾는 틱. 없으면 None
+    interval = overlap_interval(first, second)
+    if interval is None:
+        return None
+    enter, leave = interval
+    after = max(after, first.start, second.start)
+    tick = max(after + 1, math.ceil(enter - EPSILON))
+    if tick - 1 - EPSILON > leave:
+        return None
+    return tick
+
+class CollisionEvents:
+    # 채널 목록을 받아 예측한 충돌만 처리하는 객체. 채널은 (움직이는 객체 리스트, 부딪힐 대상) 쌍이고
+    # 대상은 리스트(Enemy 목록) 또는 움직이지 않는 객체 하나(벽, 바닥). 채널 순서와 리스트 순서가 곧 처리 순서
+    def __init__(self):
+        self.tick = 0
+        self.queue = []
+        self.tracks = {}
+        self.versions = itertools.count(1)
+        self.order = itertools.count()
+        # 통계: 다시 예측한 객체 수, 계산한 쌍 수, 꺼내서 확인한 예측 수
+        self.predicted = 0
+        self.pairs = 0
+        self.checked = 0
+
+    def update(self, channels):
+        # 틱 하나: 궤적이 바뀐 객체를 다시 예측하고, 이번 틱이 된 충돌을 처리
+        self.tick += 1
+        now = self.tick
+        channels = [(movers, targets if isinstance(targets, list) else [targets]) for movers, targets in channels]
+        # 채널별 (움직이는 쪽, 대상 쪽) 집합: 객체가 어느 채널에 있는지 리스트를 훑지 않고 찾음
+        self.members = [(set(movers), set(targets)) for movers, targets in channels]
+
+        with PROFILER.phase("prediction"):
+            present = set()
+            changed = []
+            for movers, targets in channels:
+                for obj in itertools.chain(movers, targets):
+                    if obj in present or not getattr(obj, "alive", True):
+                        continue
+                    present.add(obj)
+                    if self.refresh(obj, now):
+                        changed.append(obj)
+            # 목록에서 사라진 객체의 궤적은 버림 (남은 예측은 꺼낼 때 버려짐)
+            if len(self.tracks) > len(present):
+                for obj in [obj for obj in self.tracks if obj not in present]:
+                    del self.tracks[obj]
+
+            done = set()
+            for obj in changed:
+                self.predict_all(obj, channels, now - 1, done)
+                done.add(obj)
+
+        with PROFILER.phase("narrowphase"):
+            due = self.pop_due(now)
+            if due:
+                self.process(channels, due, now)
+        self.compact()
+
+    def refresh(self, obj, now):
+        # 객체의 궤적이 예상대로면 마지막 위치만 갱신하고 False, 새 객체이거나 바뀌었으면 새 궤적을 만들고 True
+        track = self.tracks.get(obj)
+        box = obj.get_position()
+        if track is not None:
+            if not track.moving:
+                return False
+            if track.angle == obj.angle and track.at == now - 1 \
+                    and box[0] == track.x + track.vx and box[1] == track.y + track.vy:
+                track.x, track.y, track.at = box[0], box[1], now
+                return False
+        velocity = obj.velocity() if hasattr(obj, "velocity") else (0, 0)
+        # 이번 틱 이동을 시작한 시각(now - 1)부터 유효한 궤적
+        track = Track(next(self.versions), box, velocity, getattr(obj, "angle", None), now, now - 1)
+        track.moving = hasattr(obj, "velocity")
+        self.tracks[obj] = track
+        return True
+
+    def retrack(self, obj, now):
+        # 이번 틱 처리 중에 궤적이 바뀐 객체(반사 등): 지금 위치에서 시작하는 새 궤적
+        track = Track(next(self.versions), obj.get_position(), obj.velocity(), obj.angle, now, now)
+        self.tracks[obj] = track
+        return track
+
+    def counterparts(self, obj, channels):
+        # obj가 들어 있는 채널마다 (채널 번호, obj가 움직이는 쪽인지, 상대 목록)
+        for index, (movers, targets) in enumerate(channels):
+            mover_set, target_set = self.members[index]
+            if obj in mover_set:
+                yield index, True, targets
+            if obj in target_set:
+                yield index, False, movers
+
+    def predict_all(self, obj, channels, after, done=()):
+        # obj와 상대 후보 전부의 다음 충돌을 큐에 넣음. done에 있는 상대는 이미 obj와의 쌍을 계산했으므로 건너뜀
+        self.predicted += 1
+        for index, is_mover, others in self.counterparts(obj, channels):
+            for other in others:
+                if other in done or other not in self.tracks:
+                    continue
+                if is_mover:
+                    self.predict(index, obj, other, after)
+                else:
+                    self.predict(index, other, obj, after)
+
+    def predict(self, channel, mover, target, after):
+        first, second = self.tracks[mover], self.tracks[target]
+        self.pairs += 1
+        tick = first_tick(first, second, after)
+        if tick is not None:
+            heapq.heappush(self.queue, (tick, next(self.order), channel, mover, target, first.version, second.version))
+
+    def pop_due(self, now):
+        # 이번 틱까지 예정된, 아직 유효한 예측을 꺼냄
+        due = {}
+        while self.queue and self.queue[0][0] <= now:
+            _, _, channel, mover, target, mover_version, target_version = heapq.heappop(self.queue)
+            mover_track, target_track = self.tracks.get(mover), self.tracks.get(target)
+            if mover_track is None or target_track is None:
+                continue
+            if mover_track.version != mover_version or target_track.version != target_version:
+                continue
+            due[channel, mover, target] = True
+        return due
+
+    def process(self, channels, due, now):
+        # 이번 틱 충돌을 채널 순서 -> 리스트 순서(틱마다 모든 쌍을 검사할 때와 같은 순서)로 확인
+        # 처리 중에 궤적이 바뀐 객체는 이후 채널에서는 예측 대신 모든 상대와 직접 확인 (그때의 상태로 검사하는 것과 같게)
+        touched = {}
+        moved_now = []
+        for index, (movers, targets) in enumerate(channels):
+            mover_set, target_set = self.members[index]
+            pairs = [(mover, target) for channel, mover, target in due if channel == index]
+            for obj in moved_now:
+                if obj in mover_set:
+                    pairs.extend((obj, target) for target in targets)
+                if obj in target_set:
+                    pairs.extend((mover, obj) for mover in movers)
+            if not pairs:
+                continue
+            mover_order = {mover: position for position, mover in enumerate(movers)}
+            target_order = {target: position for position, target in enumerate(targets)}
+            pairs = sorted(set(pairs), key=lambda pair: (mover_order.get(pair[0], -1), target_order.get(pair[1], -1)))
+
+            for mover, target in pairs:
+                if not (mover.alive and getattr(target, "alive", True)):
+                    continue
+                for obj in (mover, target):
+                    if obj not in touched and obj in self.tracks:
+                        touched[obj] = (obj.get_position(), getattr(obj, "angle", None))
+                self.checked += 1
+                mover.is_collide_at(target)
+                # 반응으로 궤적이 바뀐 객체
+                for obj in (mover, target):
+                    if obj in touched and obj not in moved_now and self.tracks[obj].moving and obj.alive \
+                            and (obj.get_position(), obj.angle) != touched[obj]:
+                        moved_now.append(obj)
+
+        # 이번 틱에 사라진 객체의 궤적은 바로 버림 (pool에서 재사용되어 돌아오면 새 객체로 봄)
+        for obj in touched:
+            if not getattr(obj, "alive", True):
+                self.tracks.pop(obj, None)
+        # 바뀐 객체는 지금 위치에서 다시 예측, 그대로인 쌍은 다음 틱 이후로 다시 예측
+        moved_now = [obj for obj in moved_now if obj.alive]
+        for obj in moved_now:
+            self.retrack(obj, now)
+        done = set()
+        for obj in moved_now:
+            self.predict_all(obj, channels, now, done)
+            done.add(obj)
+        for channel, mover, target in due:
+            if mover in moved_now or target in moved_now:
+                continue
+            if mover.alive and getattr(target, "alive", True) and mover in self.tracks and target in self.tracks:
+                self.predict(channel, mover, target, now)
+
+    def compact(self):
+        # 버려진 예측이 큐에 너무 많이 쌓이면 유효한 것만 남김
+        if len(self.queue) < 1024 or len(self.queue) < 8 * len(self.tracks):
+            return
+        self.queue = [event for event in self.queue
+                      if event[3] in self.tracks and event[4] in self.tracks
+                      and self.tracks[event[3]].version == event[5] and self.tracks[event[4]].version == event[6]]
+        heapq.heapify(self.queue)
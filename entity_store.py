@@ -0,0 +1,155 @@
+import numpy as np
+
+# Bullet, Enemy 같은 Collidable 객체들의 상태를 NumPy 배열(struct-of-arrays)로 보관하는 저장소
+# 객체는 배열의 한 칸(slot)을 가리키는 얇은 뷰가 되고, 이동은 엔티티 종류 단위로 한 번에 계산됨
+
+class StoredField:
+    # 저장소 배열의 한 칸을 객체 속성처럼 읽고 쓰게 하는 디스크립터
+    def __init__(self, column):
+        self.column = column
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if obj.slot is None:
+            # 저장소에서 해제된 객체는 해제 시점의 값을 그대로 돌려줌
+            return obj.detached[self.column]
+        return getattr(obj.store, self.column)[obj.slot].item()
+
+    def __set__(self, obj, value):
+        if obj.slot is None:
+            obj.detached[self.column] = value
+            return
+        getattr(obj.store, self.column)[obj.slot] = value
+
+class StoredAngle(StoredField):
+    # 각도가 바뀌면(반사 등) 속도 벡터를 다시 계산해 둠-> 틱마다 sin/cos를 계산하지 않음
+    def __set__(self, obj, value):
+        super().__set__(obj, value)
+        if obj.slot is not None:
+            obj.store.refresh_velocity(obj)
+
+class EntityView(list):
+    # 저장소에 살아 있는 객체 목록. PositionUpdater가 store를 보고 한 번에 이동시킴
+    def __init__(self, store, objects):
+        super().__init__(objects)
+        self.store = store
+
+class EntityStore:
+    COLUMNS = ("point_x", "point_y", "angle", "speed", "size")
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.point_x = np.zeros(capacity, dtype=np.float64)
+        self.point_y = np.zeros(capacity, dtype=np.float64)
+        self.angle = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.velocity_x = np.zeros(capacity, dtype=np.float64)
+        self.velocity_y = np.zeros(capacity, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.born = np.zeros(capacity, dtype=np.int64)
+
+        self.objects = [None] * capacity
+        self.free = []
+        self.used = 0       # 한 번이라도 쓰인 slot 개수(배열 앞부분만 계산)
+        self.live = 0
+        self.spawned = 0
+        self.stored_types = {}
+
+    def stored_type(self, cls):
+        # cls의 좌표/각도/속도/크기를 배열에서 읽고 쓰는 하위 클래스를 만들어 캐시
+        stored = self.stored_types.get(cls)
+        if stored is None:
+            stored = type(cls.__name__, (cls,), {
+                "__module__": cls.__module__,
+                "point_x": StoredField("point_x"),
+                "point_y": StoredField("point_y"),
+                "angle": StoredAngle("angle"),
+                "speed": StoredField("speed"),
+                "size": StoredField("size"),
+                "delete": lambda obj: obj.store.release(obj),
+                # 살아 있는지는 slot이 정함. __init__의 alive = True는 무시
+                "alive": property(lambda obj: obj.slot is not None, lambda obj, value: None),
+            })
+            self.stored_types[cls] = stored
+        return stored
+
+    def spawn(self, cls, *args):
+        # cls(*args)와 같은 객체를 만들되 상태는 배열에 둠
+        slot = self.allocate()
+        obj = object.__new__(self.stored_type(cls))
+        obj.store = self
+        obj.slot = slot
+        obj.detached = None
+
+        self.speed[slot] = cls.speed
+        self.size[slot] = cls.size
+        self.alive[slot] = True
+        self.born[slot] = self.spawned
+        self.spawned += 1
+        self.objects[slot] = obj
+        self.live += 1
+
+        obj.__init__(*args)
+        self.refresh_velocity(obj)
+        return obj
+
+    def allocate(self):
+        if self.free:
+            return self.free.pop()
+        if self.used == self.capacity:
+            self.grow()
+        self.used += 1
+        return self.used - 1
+
+    def grow(self):
+        # 배열을 두 배로 늘림
+        for name in self.COLUMNS + ("velocity_x", "velocity_y", "alive", "born"):
+            old = getattr(self, name)
+            new = np.zeros(self.capacity * 2, dtype=old.dtype)
+            new[:self.capacity] = old
+            setattr(self, name, new)
+        self.objects.extend([None] * self.capacity)
+        self.capacity *= 2
+
+    def release(self, obj):
+        # 객체를 저장소에서 떼어냄. 떼어낸 뒤에도 마지막 값은 읽을 수 있음
+        slot = obj.slot
+        if slot is None:
+            return
+        obj.detached = {name: getattr(self, name)[slot].item() for name in self.COLUMNS}
+        obj.slot = None
+
+        self.alive[slot] = False
+        self.velocity_x[slot] = 0
+        self.velocity_y[slot] = 0
+        self.objects[slot] = None
+        self.free.append(slot)
+        self.live -= 1
+
+    def refresh_velocity(self, obj):
+        # 틱당 이동량은 객체 종류가 정함(Bullet은 각도 방향, Enemy는 아래로)
+        self.velocity_x[obj.slot], self.velocity_y[obj.slot] = obj.velocity()
+
+    def step(self):
+        # 살아 있는 모든 객체를 한 번에 이동. 죽은 slot은 속도가 0이라 그대로임
+        used = self.used
+        self.point_x[:used] += self.velocity_x[:used]
+        self.point_y[:used] += self.velocity_y[:used]
+
+    def oldest(self):
+        # 가장 먼저 생성되어 아직 살아 있는 객체
+        if not self.live:
+            return None
+        born = np.where(self.alive[:self.used], self.born[:self.used], np.iinfo(np.int64).max)
+        return self.objects[int(np.argmin(born))]
+
+    def view(self):
+        # 생성 순서대로: 객체 리스트와 같은 순서라 충돌 처리 순서가 slot 재사용 순서에 따라 바뀌지 않음
+        slots = np.flatnonzero(self.alive[:self.used])
+        slots = slots[np.argsort(self.born[slots], kind="stable")]
+        return EntityView(self, [self.objects[slot] for slot in slots])
+
+    def __len__(self):
+        return self.live
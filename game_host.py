@@ -0,0 +1,265 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+from shooting_game import ScriptedInput, ShootingGame
+from timer_wheel import TimerWheel
+
+# 이벤트 루프 하나(스레드 하나)에서 ShootingGame 여러 판을 함께 돌리는 호스트
+# 게임마다 blocking 루프와 스레드를 두지 않고, 틱 시각이 된 게임만 골라 한 틱씩 진행함
+#   host = GameHost()
+#   game_id = host.create(tick_rate=20, seed=1)        -> 게임마다 틱 속도를 따로 가짐
+#   host.send(game_id, "fire 30")                       -> 다음 틱에 처리할 입력
+#   host.pause(game_id) / host.resume(game_id) / host.destroy(game_id)
+#   await host.run()                                    -> stop()할 때까지 (테스트는 run_once(now))
+# Enemy 생성 같은 지연 이벤트는 모든 게임이 같이 쓰는 TimerWheel 하나에 걸림
+#
+# 공정성: 한 번(pass)에 틱 시각이 지난 게임을 모아 늦은 순서로 한 틱씩만 진행함
+#   비싼 게임이나 뒤처진 게임도 한 pass에 한 틱이라, 밀린 틱을 몰아서 돌며 다른 게임을 굶기지 못함
+#   (밀린 게임은 다음 pass에서 다시 차례를 받고, max_catch_up 틱보다 밀리면 그 시간을 버림)
+#   time_slice초마다 이벤트 루프에 양보해 같은 루프의 네트워크 처리도 멈추지 않음
+# 생명주기 메서드는 이벤트 루프 스레드에서 불러야 함 (다른 스레드에서는 loop.call_soon_threadsafe로)
+
+# 게임 상태
+RUNNING = "running"
+PAUSED = "paused"
+OVER = "over"
+
+# 호스트가 넣는 입력: 스크립트(게임 시작 기준 (시각, 명령))와 send로 받은 명령을 틱마다 함께 꺼냄
+class HostInput:
+    def __init__(self, script, clock):
+        self.script = ScriptedInput(script, clock)
+        self.inputs = deque()
+
+    def start(self):
+        pass
+
+    def put(self, user_input):
+        self.inputs.append(user_input)
+
+    def drain(self):
+        drained = self.script.drain()
+        while self.inputs:
+            drained.append(self.inputs.popleft())
+        return drained
+
+# 호스트가 돌리는 게임 하나
+class HostedGame:
+    def __init__(self, game_id, game, started):
+        self.id = game_id
+        self.game = game
+        self.loop = game.game_loop
+        self.state = RUNNING
+        self.started = started
+        # 멈춘 시각과 지금까지 멈춰 있던 시간 합: 게임 시간에서 뺌
+        self.paused_at = None
+        self.paused_for = 0.0
+        self.next_at = started + self.loop.tick_interval
+        # 큐에 들어간 항목 번호: pause/destroy 뒤에 남은 예전 항목은 꺼낼 때 버려짐
+        self.entry = None
+        # 틱 진행에 쓴 시간(초)
+        self.cost = 0.0
+        self.max_cost = 0.0
+
+    def game_time(self, now):
+        # 시작한 뒤 흐른 시간에서 멈춰 있던 시간을 뺀 게임 시간 (멈춘 동안은 멈춘 시각에 머묾)
+        if self.paused_at is not None:
+            now = self.paused_at
+        return now - self.started - self.paused_for
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "score": self.game.player_status.get_score(),
+            "life": self.game.player_status.get_life(),
+            "cost": self.cost,
+            "max_cost": self.max_cost,
+            **self.loop.stats.summary(),
+        }
+
+class GameHost:
+    def __init__(self, clock=time.monotonic, max_catch_up=5, time_slice=0.005, timers=None):
+        self.clock = clock
+        self.max_catch_up = max_catch_up
+        # 이 시간(초)만큼 틱을 돌렸으면 이벤트 루프에 한 번 양보
+        self.time_slice = time_slice
+        self.timers = timers or TimerWheel(clock=clock)
+        self.games = {}
+        self.queue = []         # (다음 틱 시각, 항목 번호, 게임)
+        self.order = itertools.count()
+        self.ids = itertools.count(1)
+        self.running = False
+        self.wakeup = asyncio.Event()
+        # 지표: pass 수, 진행한 틱 수, 틱 진행에 쓴 시간, 버린 틱(너무 밀려서), 최근 틱들이 예정보다 늦게 시작한 시간
+        self.passes = 0
+        self.ticks = 0
+        self.busy = 0.0
+        self.dropped = 0
+        self.lags = deque(maxlen=4096)
+
+    def create(self, game_id=None, script=(), on_game_over=None, **options):
+        # options는 ShootingGame 인자 그대로 (tick_rate, seed, broadphase, spawn_pattern ...)
+        if game_id is None:
+            game_id = next(self.ids)
+        if game_id in self.games:
+            raise ValueError(f"이미 있는 게임: {game_id}")
+        now = self.clock()
+        game = ShootingGame(on_game_over=on_game_over, timers=self.timers, **options)
+        hosted = HostedGame(game_id, game, now)
+        loop = game.game_loop
+        loop.clock = self.clock
+        # 스크립트 시각은 게임 시간 기준: 멈춘 동안 된 입력이 다시 시작할 때 한꺼번에 들어오지 않음
+        loop.input_reader = HostInput(script, lambda: hosted.game_time(self.clock()))
+        game.enemy_spawner.schedule(self.timers, now)
+
+        self.games[game_id] = hosted
+        self.push(hosted)
+        return game_id
+
+    def get(self, game_id):
+        try:
+            return self.games[game_id]
+        except KeyError:
+            raise KeyError(f"없는 게임: {game_id}") from None
+
+    def send(self, game_id, user_input):
+        self.get(game_id).loop.input_reader.put(user_input)
+
+    def pause(self, game_id):
+        # 틱과 Enemy 생성을 멈춤. 멈춘 동안의 시간은 게임 시간에 들어가지 않음
+        hosted = self.get(game_id)
+        if hosted.state != RUNNING:
+            return
+        hosted.state = PAUSED
+        hosted.paused_at = self.clock()
+        hosted.entry = None
+        if hosted.game.enemy_spawner.timer is not None:
+            hosted.game.enemy_spawner.timer.cancel()
+
+    def resume(self, game_id):
+        hosted = self.get(game_id)
+        if hosted.state != PAUSED:
+            return
+        now = self.clock()
+        hosted.state = RUNNING
+        hosted.paused_for += now - hosted.paused_at
+        hosted.paused_at = None
+        hosted.next_at = now + hosted.loop.tick_interval
+        # 틱 간격 통계가 멈춘 시간을 한 틱으로 세지 않도록
+        hosted.loop.stats.last_tick = None
+        hosted.game.enemy_spawner.schedule(self.timers, now)
+        self.push(hosted)
+
+    def destroy(self, game_id):
+        # 게임을 끝내고 호스트에서 뺌 (끝나지 않은 게임이면 on_game_over가 불림). 마지막 요약을 반환
+        hosted = self.get(game_id)
+        del self.games[game_id]
+        hosted.entry = None
+        if hosted.state != OVER:
+            hosted.state = OVER
+            hosted.loop.stop()
+        return hosted.summary()
+
+    def push(self, hosted):
+        hosted.entry = next(self.order)
+        heapq.heappush(self.queue, (hosted.next_at, hosted.entry, hosted))
+        self.wakeup.set()
+
+    def pop_due(self, now):
+        # 틱 시각이 지난 게임을 늦은 순서로 꺼냄
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            _, entry, hosted = heapq.heappop(self.queue)
+            if hosted.entry == entry:
+                hosted.entry = None
+                due.append(hosted)
+        return due
+
+    def tick(self, hosted, now):
+        started = self.clock()
+        self.lags.append(started - hosted.next_at)
+        hosted.loop.tick()
+        cost = self.clock() - started
+        hosted.cost += cost
+        hosted.max_cost = max(hosted.max_cost, cost)
+        self.busy += cost
+        self.ticks += 1
+
+        if not hosted.loop.running:
+            # life가 0이 되었거나 gameover 입력: 큐에서 빼고 destroy될 때까지 결과만 남겨 둠
+            hosted.state = OVER
+            hosted.entry = None
+            return
+        interval = hosted.loop.tick_interval
+        hosted.next_at += interval
+        if now - hosted.next_at > self.max_catch_up * interval:
+            # 너무 밀림: 밀린 틱을 버리고 지금부터 다시 (GameLoopController와 같은 규칙)
+            skipped = int((now - hosted.next_at) / interval)
+            hosted.next_at += skipped * interval
+            hosted.loop.stats.catch_up_drops += 1
+            self.dropped += skipped
+        self.push(hosted)
+
+    def run_due(self, now):
+        # pass 하나: 된 타이머를 한 번에 실행한 뒤, 틱 시각이 지난 게임마다 한 틱씩. 한 틱 끝날 때마다 yield
+        self.passes += 1
+        self.timers.advance(now)
+        for hosted in self.pop_due(now):
+            # pass 도중(양보한 사이)에 멈췄거나, 멈췄다 다시 시작해 이미 큐에 들어간 게임은 건너뜀
+            if hosted.state == RUNNING and hosted.entry is None:
+                self.tick(hosted, now)
+                yield hosted
+
+    def run_once(self, now=None):
+        # 이벤트 루프 없이 pass 하나 (테스트, 동기 코드용). 진행한 틱 수 반환
+        now = self.clock() if now is None else now
+        return sum(1 for _ in self.run_due(now))
+
+    def next_due(self):
+        while self.queue and self.queue[0][2].entry != self.queue[0][1]:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else None
+
+    async def run(self):
+        self.running = True
+        try:
+            while self.running:
+                yielded = self.clock()
+                for _ in self.run_due(self.clock()):
+                    if self.clock() - yielded >= self.time_slice:
+                        await asyncio.sleep(0)
+                        yielded = self.clock()
+
+                # 다음 틱 시각까지 기다림 (그 사이 create/resume/stop이 오면 바로 깸)
+                self.wakeup.clear()
+                due = self.next_due()
+                delay = None if due is None else max(0.0, due - self.clock())
+                if delay == 0.0:
+                    await asyncio.sleep(0)
+                    continue
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.running = False
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def stats(self):
+        return {
+            "games": len(self.games),
+            "running": sum(hosted.state == RUNNING for hosted in self.games.values()),
+            "passes": self.passes,
+            "ticks": self.ticks,
+            "busy": self.busy,
+            "dropped": self.dropped,
+            "lag_p99": sorted(self.lags)[int(len(self.lags) * 0.99)] if self.lags else 0.0,
+            "timers": len(self.timers),
+            "timers_fired": self.timers.fired,
+        }
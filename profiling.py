@@ -0,0 +1,127 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# 틱의 단계(phase)별 소요 시간과 엔티티 수를 히스토그램으로 모으는 프로파일러
+#   with PROFILER.phase("movement"): ...        -> 단계 소요 시간(초)
+#   @PROFILER.timed("serialization")             -> 함수 전체를 한 단계로
+#   PROFILER.observe_count("bullets", n)         -> 틱마다 엔티티 수
+# 단계는 중첩될 수 있고 각 단계 시간은 안쪽 단계를 포함함 (narrowphase 안에 response)
+# Prometheus text 형식으로 내보냄 (Django의 /metrics)
+
+# 단계 시간 구간(초): 10us ~ 1s
+DURATION_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# 엔티티 수 구간
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+class Histogram:
+    # 고정 구간 히스토그램: 값 하나당 이분 탐색 한 번과 덧셈 몇 번
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self):
+        # (le, 그 값 이하 개수) 목록. Prometheus 버킷은 누적값
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        result, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            result.append((bound, running))
+        return result, total, count
+
+class Phase:
+    # with 블록 하나의 시간을 재서 히스토그램에 넣는 컨텍스트 매니저 (사용할 때마다 새로 만듦)
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+class NoPhase:
+    # 프로파일러를 끈 동안 쓰는 아무 일도 하지 않는 컨텍스트 매니저
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NO_PHASE = NoPhase()
+
+class TickProfiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, table, name, buckets):
+        histogram = table.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = table.setdefault(name, Histogram(buckets))
+        return histogram
+
+    def phase(self, name):
+        if not self.enabled:
+            return NO_PHASE
+        return Phase(self.histogram(self.phases, name, DURATION_BUCKETS))
+
+    def timed(self, name):
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe_count(self, name, value):
+        if self.enabled:
+            self.histogram(self.counts, name, COUNT_BUCKETS).observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.phases = {}
+            self.counts = {}
+
+    def render_prometheus(self, prefix="shoot"):
+        lines = []
+        for metric, label, table, help_text in (
+            (f"{prefix}_phase_seconds", "phase", self.phases, "틱 단계별 소요 시간"),
+            (f"{prefix}_entities", "kind", self.counts, "틱마다의 엔티티 수"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, histogram in sorted(table.items()):
+                buckets, total, count = histogram.cumulative()
+                for bound, running in buckets:
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {running}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {total!r}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+# 게임 전체가 함께 쓰는 프로파일러
+PROFILER = TickProfiler()
@@ -0,0 +1,213 @@
+import struct
+
+import shooting_game
+from shooting_game import ShootingGame
+
+# 게임 진행을 그대로 다시 만들 수 있게 남기는 append-only 바이너리 로그
+# 입력과 Enemy 생성 위치를 틱 번호와 함께 남기고, keyframe_interval 틱마다 월드 전체(keyframe)를 남김
+# 재생은 원하는 틱 직전의 keyframe에서 월드를 복원한 뒤 그 뒤의 기록만 적용하며 틱을 빨리 감음
+#
+# header   : magic b'SHRP', version u8, flags u8(bit0=seed 있음, bit1=배열 저장소), seed i64,
+#            width u16, height u16, tick_rate f32, broadphase u8, keyframe_interval u32,
+#            bullet_speed f64, enemy_speed f64, max_bullet u32
+#            (게임 진행에 영향을 주는 설정은 모두 header에 있음: ShootingGame.options 그대로)
+# record   : type u8, tick u32 + 내용 (tick은 그 기록이 적용되는 틱: 그 틱의 update 전에 적용)
+#   input    : 길이 u16, utf-8 문자열
+#   spawn    : x f64, y f64
+#   keyframe : score i32, life i32, bullet 수 u16, enemy 수 u16, bullet(angle, x, y f64) * n, enemy(x, y f64) * m
+#              (keyframe의 tick은 그 틱의 update가 끝난 뒤의 상태)
+# 기록 도중 프로세스가 죽어 마지막 기록이 잘려도 그 앞까지는 읽을 수 있음
+
+MAGIC = b'SHRP'
+VERSION = 2
+
+HAS_SEED = 1
+ARRAY_STORE = 2
+
+INPUT = 0
+SPAWN = 1
+KEYFRAME = 2
+
+BROADPHASE_NAMES = ("brute", "grid", "sweep", "event")
+
+HEADER = struct.Struct('<4sBBqHHfBIddI')
+RECORD = struct.Struct('<BI')
+LENGTH = struct.Struct('<H')
+POINT = struct.Struct('<dd')
+KEYFRAME_HEAD = struct.Struct('<iiHH')
+BULLET = struct.Struct('<ddd')
+
+class ReplayRecorder:
+    # 게임에 붙여 기록하는 객체. stream은 쓰기용 바이너리 파일(처럼 write/flush가 있는 객체)
+    # 기록은 바로 stream에 쓰고 keyframe마다 flush: 긴 게임도 메모리에 쌓이지 않음
+    def __init__(self, stream, keyframe_interval=100):
+        self.stream = stream
+        self.keyframe_interval = keyframe_interval
+        self.tick = 0
+
+    def attach(self, game):
+        # game(ShootingGame)의 입력/생성/틱에 기록기를 걸고, header와 시작 상태 keyframe을 씀
+        # 만든 뒤 설정을 바꿔 options로 다시 만들 수 없는 게임은 ValueError (재생이 조용히 달라지지 않도록)
+        options = game.options
+        changed = [name for name, value in (("bullet_speed", game.gun.bullet_type.speed),
+                                            ("enemy_speed", game.enemy_creator.enemy_type.speed),
+                                            ("max_bullet", game.gun.max_bullet)) if options[name] != value]
+        if changed:
+            raise ValueError(f'options와 다른 설정이 있어 리플레이할 수 없는 게임: {", ".join(changed)}'
+                             ' (ShootingGame 생성 인자로 넘길 것)')
+        seed = options["seed"]
+        if seed is not None and (type(seed) is not int or not -2 ** 63 <= seed < 2 ** 63):
+            raise ValueError(f'리플레이에 남길 수 없는 seed (None 또는 64비트 정수만): {seed!r}')
+        flags = (HAS_SEED if options["seed"] is not None else 0) | (ARRAY_STORE if options["use_array_store"] else 0)
+        self.stream.write(HEADER.pack(
+            MAGIC, VERSION, flags, seed or 0, options["width"], options["height"], options["tick_rate"],
+            BROADPHASE_NAMES.index(options["broadphase"]), self.keyframe_interval,
+            options["bullet_speed"], options["enemy_speed"], options["max_bullet"]))
+        self.write_keyframe(game.game_updater)
+
+        game.input_processor.recorder = self
+        game.enemy_spawner.recorder = self
+        game.game_updater.recorder = self
+        return self
+
+    def record_input(self, user_input):
+        data = user_input.encode('utf-8')[:0xFFFF]
+        self.stream.write(RECORD.pack(INPUT, self.tick + 1) + LENGTH.pack(len(data)) + data)
+
+    def record_spawn(self, enemy):
+        self.stream.write(RECORD.pack(SPAWN, self.tick + 1) + POINT.pack(enemy.point_x, enemy.point_y))
+
+    def record_tick(self, game_updater):
+        self.tick += 1
+        if self.tick % self.keyframe_interval == 0:
+            self.write_keyframe(game_updater)
+
+    def write_keyframe(self, game_updater):
+        bullets = game_updater.gun.get_bullets()
+        enemies = game_updater.enemy_spawner.get_enemies()
+        status = game_updater.player_status
+        self.stream.write(b''.join(
+            [RECORD.pack(KEYFRAME, self.tick),
+             KEYFRAME_HEAD.pack(status.get_score(), status.get_life(), len(bullets), len(enemies))]
+            + [BULLET.pack(bullet.angle, bullet.point_x, bullet.point_y) for bullet in bullets]
+            + [POINT.pack(enemy.point_x, enemy.point_y) for enemy in enemies]
+        ))
+        self.stream.flush()
+
+def read_exact(stream, size):
+    data = stream.read(size)
+    return data if len(data) == size else None
+
+def read_record(stream):
+    # (type, tick, 내용) 하나를 읽음. 끝이거나 잘린 기록이면 None
+    head = read_exact(stream, RECORD.size)
+    if head is None:
+        return None
+    record_type, tick = RECORD.unpack(head)
+    if record_type == INPUT:
+        length = read_exact(stream, LENGTH.size)
+        data = length and read_exact(stream, LENGTH.unpack(length)[0])
+        return None if data is None else (INPUT, tick, data.decode('utf-8'))
+    if record_type == SPAWN:
+        data = read_exact(stream, POINT.size)
+        return None if data is None else (SPAWN, tick, POINT.unpack(data))
+    if record_type == KEYFRAME:
+        data = read_exact(stream, KEYFRAME_HEAD.size)
+        if data is None:
+            return None
+        score, life, bullet_count, enemy_count = KEYFRAME_HEAD.unpack(data)
+        data = read_exact(stream, BULLET.size * bullet_count + POINT.size * enemy_count)
+        if data is None:
+            return None
+        bullets = [BULLET.unpack_from(data, BULLET.size * index) for index in range(bullet_count)]
+        offset = BULLET.size * bullet_count
+        enemies = [POINT.unpack_from(data, offset + POINT.size * index) for index in range(enemy_count)]
+        return KEYFRAME, tick, (score, life, bullets, enemies)
+    raise ValueError(f'알 수 없는 기록 유형: {record_type}')
+
+class Replay:
+    # 기록된 로그를 읽어 원하는 틱의 게임 상태를 만드는 객체. stream은 읽기용 바이너리 파일(seek 가능)
+    # 처음 열 때 한 번 훑어 keyframe 위치(틱 -> 파일 위치)만 기억함
+    def __init__(self, stream):
+        self.stream = stream
+        header = read_exact(stream, HEADER.size)
+        if header is None:
+            raise ValueError('리플레이 header가 없음')
+        (magic, version, flags, seed, width, height, tick_rate, broadphase, keyframe_interval,
+         bullet_speed, enemy_speed, max_bullet) = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('알 수 없는 리플레이 형식')
+        self.options = {
+            "use_array_store": bool(flags & ARRAY_STORE),
+            "broadphase": BROADPHASE_NAMES[broadphase],
+            "width": width,
+            "height": height,
+            "tick_rate": tick_rate,
+            "seed": seed if flags & HAS_SEED else None,
+            "bullet_speed": bullet_speed,
+            "enemy_speed": enemy_speed,
+            "max_bullet": max_bullet,
+        }
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = []
+        self.last_tick = 0
+        self.index()
+
+    def index(self):
+        while True:
+            offset = self.stream.tell()
+            record = read_record(self.stream)
+            if record is None:
+                return
+            record_type, tick, _ = record
+            if record_type == KEYFRAME:
+                self.keyframes.append((tick, offset))
+            self.last_tick = max(self.last_tick, tick)
+
+    def game_at(self, tick):
+        # tick번째 update가 끝난 뒤의 게임(ShootingGame)을 만듦
+        tick = max(0, min(tick, self.last_tick))
+        keyframes = [keyframe for keyframe in self.keyframes if keyframe[0] <= tick]
+        if not keyframes:
+            # 첫 keyframe(시작 상태)이 쓰이기 전에 잘린 로그: 복원할 상태가 없음
+            raise ValueError('keyframe이 없는 리플레이 로그 (첫 keyframe 전에 잘림)')
+        keyframe_tick, offset = max(keyframes)
+        self.stream.seek(offset)
+        _, _, keyframe = read_record(self.stream)
+
+        game = ShootingGame(**self.options)
+        restore(game, keyframe)
+        current = keyframe_tick
+        with shooting_game.quiet():
+            while True:
+                record = read_record(self.stream)
+                if record is None or record[1] > tick:
+                    break
+                record_type, record_tick, data = record
+                if record_type == KEYFRAME:
+                    continue
+                # 기록이 붙은 틱 직전까지 빨리 감은 뒤 적용
+                while current < record_tick - 1:
+                    game.game_updater.update()
+                    current += 1
+                apply(game, record_type, data)
+            while current < tick:
+                game.game_updater.update()
+                current += 1
+        return game
+
+def restore(game, keyframe):
+    # 새로 만든 게임에 keyframe의 점수/생명/Bullet/Enemy를 채움
+    score, life, bullets, enemies = keyframe
+    game.player_status.score = score
+    game.player_status.life = life
+    for angle, point_x, point_y in bullets:
+        game.gun.add_bullet(angle, point_x, point_y)
+    for point_x, point_y in enemies:
+        game.enemy_spawner.enemies.append(game.enemy_creator.create_at(point_x, point_y))
+
+def apply(game, record_type, data):
+    if record_type == INPUT:
+        game.input_processor.process_input(data, game.game_loop)
+    elif record_type == SPAWN:
+        game.enemy_spawner.enemies.append(game.enemy_creator.create_at(*data))
@@ -2,6 +2,10 @@
 ASGI config for shoot project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; websocket connections are routed to the game socket
+(``/ws/game/``), which pushes world state instead of 100 ms HTTP polling.
+The server tick scheduler runs on this event loop and advances active worlds
+at ``SHOOT_TICK_RATE``; clients only read frames.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +17,37 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "shoot.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Django 설정이 끝난 뒤에 import (모델/월드가 설정을 읽음)
+from shootgame.consumers import websocket_routes  # noqa: E402
+from shootgame.scheduler import scheduler  # noqa: E402
+
+
+async def lifespan(receive, send):
+    # 서버 시작/종료에 맞춰 서버 틱 스케줄러를 띄우고 멈춤
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            scheduler.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await scheduler.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    # lifespan을 보내지 않는 서버에서는 첫 요청에서 띄움
+    scheduler.start()
+    if scope["type"] == "websocket":
+        socket = websocket_routes.get(scope["path"])
+        if socket is None:
+            await send({"type": "websocket.close", "code": 4404})
+            return
+        await socket(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
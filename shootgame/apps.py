@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ShootgameConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shootgame'
+
+    def ready(self):
+        # SHOOT_PROFILING = False면 틱 단계 측정을 끔 (측정 코드는 아무 일도 하지 않는 컨텍스트만 받음)
+        from django.conf import settings
+        from profiling import PROFILER
+        PROFILER.enabled = getattr(settings, 'SHOOT_PROFILING', True)
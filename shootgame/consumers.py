@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+
+from . import sessions
+from .scheduler import scheduler
+from .wire import encode_frame
+
+# /ws/game/ 웹소켓: HTTP 폴링 대신 한 연결로 월드 상태를 밀어주고 fire/spawn 명령도 같은 소켓으로 받음
+# ASGI 서버(uvicorn 등)로 띄울 때만 동작하고, runserver에서는 프론트가 HTTP 폴링으로 돌아감
+# 게임 세션은 HTTP 뷰와 같은 쿠키(없으면 ?session=)로 정하고, 월드 연산은 그 세션을 맡은 워커로 보냄
+
+logger = logging.getLogger(__name__)
+
+class GameSocket:
+    # 순수 ASGI 앱 (shoot/asgi.py에서 경로로 연결)
+    interval = 0.1
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        await send({'type': 'websocket.accept'})
+
+        session_id = sessions.session_from_scope(scope)
+        call = sync_to_async(sessions.call)
+        # 연결마다 클라이언트가 확인한 마지막 sequence와 프레임 형식(?format=binary)을 따로 가짐
+        query = parse_qs(scope.get('query_string', b'').decode())
+        connection = {'ack': None, 'binary': query.get('format') == ['binary']}
+        pusher = asyncio.ensure_future(self.push_frames(call, session_id, connection, send))
+        pusher.add_done_callback(self.pusher_done)
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] == 'websocket.receive' and message.get('text'):
+                    await self.handle_command(call, session_id, connection, message['text'], send)
+        finally:
+            pusher.cancel()
+
+    def pusher_done(self, task):
+        # 프레임을 보내다 실패한 task의 예외를 꺼내 기록 (꺼내지 않으면 연결이 끝난 뒤 경고만 남음)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("프레임 전송 실패", exc_info=task.exception())
+
+    async def push_frames(self, call, session_id, connection, send):
+        # interval마다 프레임(ack 이후의 delta)을 보냄
+        # 서버 틱 스케줄러가 돌면 마지막 프레임을 읽기만 하고, 꺼져 있으면 폴링 클라이언트처럼 한 틱 진행
+        while True:
+            if scheduler.running:
+                scheduler.touch(session_id)
+                frame = await call(session_id, 'frame', connection['ack'])
+            else:
+                frame = await call(session_id, 'tick', connection['ack'])
+            if connection['binary']:
+                await send({'type': 'websocket.send', 'bytes': encode_frame(frame)})
+            else:
+                await send({'type': 'websocket.send', 'text': json.dumps(frame)})
+            await asyncio.sleep(self.interval)
+
+    async def handle_command(self, call, session_id, connection, text, send):
+        # JSON 객체만 명령 ('[1,2]'나 '"hi"' 같은 값은 거절)
+        try:
+            command = json.loads(text)
+        except ValueError:
+            command = None
+        if not isinstance(command, dict):
+            await self.send_json(send, {'success': False, 'error': '잘못된 명령'})
+            return
+
+        if command.get('type') == 'ack':
+            sequence = command.get('sequence')
+            connection['ack'] = sequence if type(sequence) is int else None
+        elif command.get('type') == 'fire':
+            # HTTP 명령 묶음(parse_commands)과 같은 검사: 숫자가 아닌 각도가 월드에 들어가면 이후 틱이 모두 실패함
+            try:
+                angle = sessions.command_angle(command)
+            except ValueError as error:
+                await self.send_json(send, {'success': False, 'error': str(error)})
+                return
+            await call(session_id, 'fire', angle)
+        elif command.get('type') == 'spawn':
+            await call(session_id, 'spawn_enemy')
+        elif command.get('type') == 'commands':
+            # HTTP /api/commands/와 같은 명령 묶음. 처리 결과(ack)를 JSON으로 돌려줌
+            try:
+                client, commands = sessions.parse_commands(command)
+            except ValueError as error:
+                await self.send_json(send, {'success': False, 'error': str(error)})
+                return
+            await self.send_json(send, await call(session_id, 'commands', client, commands))
+        else:
+            await self.send_json(send, {'success': False, 'error': '잘못된 명령 유형'})
+
+    async def send_json(self, send, data):
+        await send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+websocket_routes = {
+    '/ws/game/': GameSocket(),
+}
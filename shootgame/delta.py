@@ -0,0 +1,62 @@
+from collections import deque
+
+# 틱 응답을 전체 목록(keyframe) 대신 변경분(delta)으로 보내기 위한 변경 기록
+# 클라이언트가 받은 마지막 sequence(ack)를 알려주면 그 이후의 생성/이동/삭제/상태 변경만 모아서 보냄
+
+class DeltaTracker:
+    def __init__(self, history=64, keyframe_interval=100):
+        # history: 몇 틱 전 ack까지 delta로 답할지, 더 오래된 ack는 keyframe으로 다시 맞춤
+        # keyframe_interval: ack와 상관없이 주기적으로 전체 상태를 보내 클라이언트가 다시 맞출 수 있게 함
+        self.history = deque(maxlen=history)
+        self.keyframe_interval = keyframe_interval
+        self.positions = {}     # 마지막 틱의 id -> (종류, 좌표)
+        self.status = None
+
+    def record(self, sequence, positions, status):
+        # 이번 틱의 id -> (종류, 좌표)와 상태를 받아 직전 틱과의 차이를 남김
+        previous = self.positions
+        spawned = positions.keys() - previous.keys()
+        removed = previous.keys() - positions.keys()
+        moved = {unit_id for unit_id in positions.keys() & previous.keys()
+                 if positions[unit_id][1] != previous[unit_id][1]}
+        self.history.append((sequence, spawned, moved, removed, status != self.status))
+        self.positions = positions
+        self.status = status
+
+    def needs_keyframe(self, sequence, ack):
+        if ack is None or ack > sequence or sequence % self.keyframe_interval == 0:
+            return True
+        if ack == sequence:
+            return False
+        # ack 바로 다음 틱부터 기록이 남아 있어야 delta를 만들 수 있음
+        return not self.history or self.history[0][0] > ack + 1
+
+    def delta(self, sequence, ack):
+        # ack 이후의 변경을 합침. 결과는 "ack 시점과 지금 사이의 어느 상태"에 적용해도 지금 상태가 되도록 함
+        # (ack 이후에 생겼다 사라진 엔티티도 removed에 남김: 클라이언트가 중간 프레임에서 봤을 수 있음)
+        spawned, moved, removed = set(), set(), set()
+        status_changed = False
+        for entry_sequence, entry_spawned, entry_moved, entry_removed, entry_status in self.history:
+            if entry_sequence <= ack:
+                continue
+            spawned -= entry_removed
+            moved -= entry_removed
+            removed |= entry_removed
+            spawned |= entry_spawned
+            moved |= entry_moved
+            status_changed = status_changed or entry_status
+
+        moved -= spawned
+        positions = self.positions
+        delta = {
+            'type': 'delta',
+            'base': ack,
+            'sequence': sequence,
+            'spawned': [{'id': unit_id, 'kind': positions[unit_id][0], 'position': positions[unit_id][1]}
+                        for unit_id in sorted(spawned)],
+            'moved': [{'id': unit_id, 'position': positions[unit_id][1]} for unit_id in sorted(moved)],
+            'removed': sorted(removed),
+        }
+        if status_changed:
+            delta['status'] = self.status
+        return delta
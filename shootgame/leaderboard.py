@@ -0,0 +1,129 @@
+import logging
+
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F, Max, Sum
+
+from .models import GameResult, LeaderboardEntry, ScoreBucket
+
+# 끝난 게임 기록과 순위표
+# 순위는 "나보다 점수가 높은 게임 수 + 1" (같은 점수는 같은 순위)
+#   ScoreBucket      : 점수별 게임 수 -> 높은 게임 수를 전체 행이 아니라 점수 종류 수만큼만 더해서 구함
+#   LeaderboardEntry : 상위 TOP_SIZE개 -> 첫 페이지는 이 작은 테이블만 읽음
+# 둘 다 게임이 끝날 때마다 한 판씩 갱신 (전체를 다시 세지 않음)
+
+logger = logging.getLogger(__name__)
+
+TOP_SIZE = 100
+PAGE_SIZE = 50
+
+# 상위 목록의 맨 아래부터 (같은 점수면 늦게 끝난 기록이 아래)
+BOTTOM_FIRST = ('score', '-result_id')
+
+def record_result(player, score, ticks=0):
+    with transaction.atomic():
+        result = GameResult.objects.create(player=player, score=score, ticks=ticks)
+        bucket, created = ScoreBucket.objects.get_or_create(score=score, defaults={'count': 1})
+        if not created:
+            ScoreBucket.objects.filter(score=score).update(count=F('count') + 1)
+        update_top(result)
+    return result
+
+def record_game(player, player_status, ticks=0):
+    # GameLoopController/GameWorld의 on_game_over용. 기록에 실패해도 게임 쪽으로 예외를 올리지 않음
+    try:
+        return record_result(player, player_status.get_score(), ticks)
+    except DatabaseError:
+        logger.exception("게임 결과 기록 실패")
+        return None
+
+def update_top(result):
+    # 상위 목록이 덜 찼거나 맨 아래 기록보다 높으면 넣고, TOP_SIZE를 넘는 만큼 맨 아래를 뺌
+    if LeaderboardEntry.objects.count() >= TOP_SIZE:
+        lowest = LeaderboardEntry.objects.order_by(*BOTTOM_FIRST).first()
+        if result.score <= lowest.score:
+            return
+    LeaderboardEntry.objects.create(result=result, player=result.player, score=result.score,
+                                    finished_at=result.finished_at)
+    overflow = LeaderboardEntry.objects.count() - TOP_SIZE
+    if overflow > 0:
+        dropped = list(LeaderboardEntry.objects.order_by(*BOTTOM_FIRST).values_list('pk', flat=True)[:overflow])
+        LeaderboardEntry.objects.filter(pk__in=dropped).delete()
+
+def rebuild():
+    # 점수별 게임 수와 상위 목록을 GameResult 전체에서 다시 만듦 (대량 적재 뒤, 또는 어긋났을 때)
+    with transaction.atomic():
+        ScoreBucket.objects.all().delete()
+        ScoreBucket.objects.bulk_create(
+            ScoreBucket(score=row['score'], count=row['count'])
+            for row in GameResult.objects.values('score').annotate(count=Count('id')).order_by()
+        )
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(result_id=result_id, player=player, score=score, finished_at=finished_at)
+            for result_id, player, score, finished_at in GameResult.objects.order_by('-score', 'id').values_list(
+                'id', 'player', 'score', 'finished_at')[:TOP_SIZE]
+        )
+
+def total_games():
+    return ScoreBucket.objects.aggregate(total=Sum('count'))['total'] or 0
+
+def higher_count(score):
+    return ScoreBucket.objects.filter(score__gt=score).aggregate(total=Sum('count'))['total'] or 0
+
+def rank_of(player):
+    # 플레이어의 최고 기록과 그 순위 (기록이 없으면 None)
+    best = GameResult.objects.filter(player=player).aggregate(best=Max('score'))['best']
+    if best is None:
+        return None
+    return {'player': player, 'score': best, 'rank': higher_count(best) + 1, 'total': total_games()}
+
+def page(after=None, size=PAGE_SIZE):
+    # 순위 순서의 한 페이지. after는 앞 페이지 마지막 기록의 (score, id)
+    # OFFSET 대신 keyset: 몇 번째 페이지든 인덱스에서 바로 이어 읽음
+    rows = []
+    if after is None:
+        rows = list(LeaderboardEntry.objects.order_by('-score', 'result_id').values_list(
+            'result_id', 'player', 'score', 'finished_at')[:size])
+    if len(rows) < size:
+        # 상위 목록보다 큰 페이지(또는 상위 목록이 아직 덜 찬 경우)는 GameResult에서
+        results = GameResult.objects.order_by('-score', 'id')
+        fields = ('id', 'player', 'score', 'finished_at')
+        if after is None:
+            rows = list(results.values_list(*fields)[:size])
+        else:
+            # (score, id) 다음부터: 같은 점수의 뒷부분 -> 더 낮은 점수 순으로 두 번의 인덱스 범위 읽기
+            score, result_id = after
+            rows = list(results.filter(score=score, id__gt=result_id).values_list(*fields)[:size])
+            if len(rows) < size:
+                rows += list(results.filter(score__lt=score).values_list(*fields)[:size - len(rows)])
+
+    entries = ranked(rows)
+    cursor = None
+    if len(rows) == size:
+        cursor = f"{rows[-1][2]}:{rows[-1][0]}"
+    return {'results': entries, 'next': cursor}
+
+def ranked(rows):
+    # 페이지 첫 점수의 순위만 집계로 구하고, 나머지는 페이지 범위의 점수별 게임 수로 이어서 계산
+    if not rows:
+        return []
+    high, low = rows[0][2], rows[-1][2]
+    counts = dict(ScoreBucket.objects.filter(score__gte=low, score__lte=high).values_list('score', 'count'))
+    higher = higher_count(high)
+    current = high
+    entries = []
+    for result_id, player, score, finished_at in rows:
+        if score != current:
+            higher += sum(count for bucket, count in counts.items() if score < bucket <= current)
+            current = score
+        entries.append({'rank': higher + 1, 'id': result_id, 'player': player, 'score': score,
+                        'finished_at': finished_at})
+    return entries
+
+def parse_cursor(cursor):
+    # "score:id" -> (score, id), 형식이 틀리면 None(첫 페이지)
+    try:
+        score, result_id = cursor.split(':')
+        return int(score), int(result_id)
+    except (AttributeError, ValueError):
+        return None
@@ -0,0 +1,78 @@
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+import shooting_game
+from shooting_game import Bullet, BulletCollisionHandler, Enemy, EntityPool, Gun
+
+# Bullet/Enemy 한 개가 차지하는 메모리와, 계속 쏠 때 pool이 할당/GC를 얼마나 줄이는지 측정
+#   python manage.py bench_alloc --count 100000 --shots 200000
+
+class DictBullet:
+    # __slots__ 이전의 Bullet과 같은 모양(__dict__에 속성 6개)의 비교용 객체
+    def __init__(self, angle, point_x, point_y, coll_handler):
+        self.angle = angle
+        self.point_x = point_x
+        self.point_y = point_y
+        self.coll_handler = coll_handler
+        self.alive = True
+        self.id = None
+
+def bytes_per_object(factory, count):
+    # count개를 살려 둔 채로 늘어난 메모리 / count (리스트 자체와 좌표 값 객체의 크기는 빼려고 좌표는 상수로 줌)
+    gc.collect()
+    tracemalloc.start()
+    holder = [None] * count
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(count):
+        holder[index] = factory(index)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size / count
+
+def sustained_fire(pool, shots):
+    # shots번 쏘는 동안의 시간과 GC 실행 횟수 (capacity=0인 pool은 재사용 없이 매번 새로 만듦)
+    gun = Gun(250, 700, pool=pool)
+    gc.collect()
+    collections = sum(stat['collections'] for stat in gc.get_stats())
+    start = time.perf_counter()
+    for shot in range(shots):
+        bullet = gun.fire(shot % 90 - 45)
+        if shot % 2:
+            # 절반은 적에 맞아 사라진 것처럼
+            bullet.delete()
+    elapsed = time.perf_counter() - start
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections
+    return elapsed, collections
+
+class Command(BaseCommand):
+    help = "Bullet/Enemy 객체 크기와 pool 재사용 효과 측정"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000)
+        parser.add_argument('--shots', type=int, default=200000)
+
+    def handle(self, *args, **options):
+        shooting_game.VERBOSE = False
+        handler = BulletCollisionHandler()
+        count = options['count']
+
+        self.stdout.write(f"{'entity':<22}{'bytes/live':>12}")
+        rows = (
+            ('dict Bullet (before)', lambda index: DictBullet(0, 250.0, 700.0, handler)),
+            ('slots Bullet', lambda index: Bullet(0, 250.0, 700.0, handler)),
+            ('slots Enemy', lambda index: Enemy(0, 250.0, 700.0, handler)),
+            # 예전 Gun.fire는 Bullet마다 충돌 관리자와 PlayerStatus를 새로 만들었음
+            ('dict Bullet + handler', lambda index: DictBullet(0, 250.0, 700.0, BulletCollisionHandler())),
+        )
+        for name, factory in rows:
+            self.stdout.write(f"{name:<22}{bytes_per_object(factory, count):>12.1f}")
+
+        shots = options['shots']
+        self.stdout.write('')
+        self.stdout.write(f"{'fire':<22}{'created':>10}{'reused':>10}{'gc runs':>10}{'ms':>10}")
+        for name, pool in (('no pool', EntityPool(Bullet, capacity=0)), ('pool', EntityPool(Bullet))):
+            elapsed, collections = sustained_fire(pool, shots)
+            self.stdout.write(f"{name:<22}{pool.created:>10}{pool.reused:>10}{collections:>10}{elapsed * 1e3:>10.1f}")
@@ -0,0 +1,52 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+import shooting_game
+from shooting_game import ShootingGame
+
+# 넓은 arena에 Bullet/Enemy를 흩어 놓고 틱당 충돌 확인 시간을 broadphase/충돌 예측 방식별로 비교
+#   python manage.py bench_collision --bullets 50 200 800 --ticks 50
+# 첫 틱(충돌 예측 방식은 모든 쌍을 한 번 계산)은 따로 보여주고, 평균은 그 뒤 틱들로 냄
+
+class Command(BaseCommand):
+    help = "틱당 충돌 확인 시간 측정 (brute/grid/sweep/event)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bullets', type=int, nargs='+', default=[50, 200, 800])
+        parser.add_argument('--ticks', type=int, default=50)
+        parser.add_argument('--width', type=int, default=4000)
+        parser.add_argument('--height', type=int, default=3000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        shooting_game.VERBOSE = False
+        width, height, ticks = options['width'], options['height'], options['ticks']
+
+        self.stdout.write(f"{'bullets':>8}{'enemies':>8}{'mode':>8}{'first ms':>10}{'ms/tick':>10}")
+        for count in options['bullets']:
+            for mode in ("brute", "grid", "sweep", "event"):
+                game = ShootingGame(broadphase=mode, width=width, height=height, seed=options['seed'],
+                                    max_bullet=count)
+                rng = random.Random(options['seed'])
+                for _ in range(count):
+                    game.gun.add_bullet(rng.uniform(-60, 60), rng.uniform(0, width), rng.uniform(height / 3, height))
+                for _ in range(count // 4):
+                    game.enemy_spawner.enemies.append(
+                        game.enemy_creator.create_at(rng.uniform(0, width - 100), rng.uniform(0, height / 10)))
+
+                updater = game.game_updater
+                bullets, enemies = game.gun.get_bullets(), game.enemy_spawner.get_enemies()
+                channels = ((bullets, enemies), (bullets, updater.left_wall), (bullets, updater.right_wall),
+                            (enemies, updater.bottom))
+                times = []
+                for _ in range(ticks):
+                    game.position_updater.update_object_position(bullets)
+                    game.position_updater.update_object_position(enemies)
+                    start = time.perf_counter()
+                    game.position_updater.update_collisions(channels)
+                    times.append(time.perf_counter() - start)
+                rest = times[1:] or times
+                self.stdout.write(f"{count:>8}{count // 4:>8}{mode:>8}{times[0] * 1e3:>10.3f}"
+                                  f"{sum(rest) / len(rest) * 1e3:>10.3f}")
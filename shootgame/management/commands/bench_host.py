@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+import shooting_game
+from batch import sweep_script
+from game_host import GameHost
+
+# 이벤트 루프 하나(코어 하나)에서 목표 틱 속도를 지키며 동시에 돌릴 수 있는 게임 수를 측정
+#   python manage.py bench_host --tick-rate 10 --seconds 3
+#   python manage.py bench_host --games 500 1000 2000      -> 정한 수만 측정
+# --games가 없으면 --start부터 두 배씩 늘려 목표 속도의 --threshold 아래로 떨어질 때까지
+# 게임마다 기본 봇(부채꼴 발사)이 입력을 넣음. 처음 --warmup초는 측정하지 않음
+# 게임마다 틱 속도는 측정 구간 안의 첫 틱과 마지막 틱 사이 시간으로 잼 (구간 경계에 걸친 조각 틱으로 흔들리지 않음)
+# 버틴 최대 게임 수는 그보다 적은 게임 수도 모두 버틴 경우만 셈 (10은 미달인데 20을 버텼다고 하지 않음)
+
+class Command(BaseCommand):
+    help = "게임 호스트 하나가 목표 틱 속도로 버티는 동시 게임 수 측정"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, nargs='+', default=None)
+        parser.add_argument('--start', type=int, default=100)
+        parser.add_argument('--limit', type=int, default=20000)
+        parser.add_argument('--tick-rate', type=float, default=10)
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--warmup', type=float, default=1)
+        parser.add_argument('--threshold', type=float, default=0.95, help="버텼다고 볼 (실제 틱 속도 / 목표) 비율")
+        parser.add_argument('--broadphase', default="brute")
+        parser.add_argument('--fire-every', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        shooting_game.VERBOSE = False
+        self.stdout.write(f"{'games':>7}{'ticks/s':>10}{'rate':>8}{'min rate':>10}{'lag p99 ms':>12}"
+                          f"{'busy':>7}{'dropped':>9}")
+        results = {}
+        counts = options['games']
+        count = options['start']
+        while True:
+            if counts is not None:
+                if not counts:
+                    break
+                count = counts.pop(0)
+            elif count > options['limit']:
+                break
+            row = asyncio.run(self.measure(count, options))
+            ok = row['rate'] >= options['threshold'] * options['tick_rate']
+            results[count] = ok
+            self.stdout.write(f"{count:>7}{row['ticks_per_second']:>10.0f}{row['rate']:>8.2f}{row['min_rate']:>10.2f}"
+                              f"{row['lag_p99'] * 1e3:>12.2f}{row['busy']:>7.0%}{row['dropped']:>9}"
+                              f"{'' if ok else '  (목표 미달)'}")
+            if counts is None:
+                if not ok:
+                    break
+                count *= 2
+        sustained = 0
+        for count in sorted(results):
+            if not results[count]:
+                break
+            sustained = count
+        self.stdout.write(f"목표 {options['tick_rate']:g} 틱/초를 버틴 최대 게임 수: {sustained}")
+
+    async def measure(self, count, options):
+        host = GameHost()
+        script = sweep_script(options['fire_every'], options['warmup'] + options['seconds'] + 60)
+        for index in range(count):
+            host.create(seed=index, tick_rate=options['tick_rate'], broadphase=options['broadphase'],
+                        script=script)
+        task = asyncio.create_task(host.run())
+        try:
+            await asyncio.sleep(options['warmup'])
+            ticks = {game_id: (hosted.loop.stats.ticks, hosted.loop.stats.last_tick)
+                     for game_id, hosted in host.games.items()}
+            busy, dropped = host.busy, host.dropped
+            host.lags.clear()
+            started = time.monotonic()
+            await asyncio.sleep(options['seconds'])
+            elapsed = time.monotonic() - started
+            rates = [self.rate(hosted.loop.stats, *ticks[game_id]) for game_id, hosted in host.games.items()]
+            stats = host.stats()
+        finally:
+            host.stop()
+            await task
+        return {
+            "ticks_per_second": sum(rates),
+            "rate": sum(rates) / len(rates),
+            "min_rate": min(rates),
+            "lag_p99": stats['lag_p99'],
+            "busy": (stats['busy'] - busy) / elapsed,
+            "dropped": stats['dropped'] - dropped,
+        }
+
+    def rate(self, stats, ticks, last_tick):
+        # 측정 구간 안의 틱 수 / 그 틱들이 걸친 시간 (구간 시작 직전 틱부터 마지막 틱까지)
+        if last_tick is None or stats.last_tick is None or stats.last_tick <= last_tick:
+            return 0.0
+        return (stats.ticks - ticks) / (stats.last_tick - last_tick)
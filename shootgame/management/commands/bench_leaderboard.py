@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from shootgame import leaderboard
+from shootgame.models import GameResult
+
+# 게임 결과 rows개를 넣고 순위표 조회 시간을 OFFSET/COUNT로 직접 구하는 방식과 비교
+#   python manage.py bench_leaderboard --rows 1000000
+# 기본으로 끝나면 넣은 행을 모두 롤백함 (--keep이면 남김)
+
+def best_of(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+class Command(BaseCommand):
+    help = "게임 결과 순위표 조회/기록 시간 측정"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--players', type=int, default=50000)
+        parser.add_argument('--batch', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        rows, players, repeat = options['rows'], options['players'], options['repeat']
+
+        start = time.perf_counter()
+        for offset in range(0, rows, options['batch']):
+            # 점수는 낮은 쪽이 많은 분포
+            GameResult.objects.bulk_create(
+                GameResult(player=f'player{rng.randrange(players)}', score=int(rng.expovariate(1 / 20)),
+                           ticks=rng.randrange(100, 5000))
+                for _ in range(min(options['batch'], rows - offset))
+            )
+        self.stdout.write(f"insert {rows} rows: {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        leaderboard.rebuild()
+        self.stdout.write(f"rebuild buckets/top: {time.perf_counter() - start:.2f}s")
+
+        middle = GameResult.objects.order_by('-score', 'id').values_list('score', 'id')[rows // 2]
+        player = f'player{rng.randrange(players)}'
+        best = GameResult.objects.filter(player=player).aggregate(best=Max('score'))['best'] or 0
+        size = leaderboard.PAGE_SIZE
+
+        def offset_page():
+            page = list(GameResult.objects.order_by('-score', 'id').values_list('id', 'score')[rows // 2:rows // 2 + size])
+            # OFFSET 방식은 행마다 COUNT로 순위를 구함
+            GameResult.objects.filter(score__gt=page[0][1]).count()
+
+        cases = (
+            ('top page (materialized)', lambda: leaderboard.page(None, size)),
+            ('middle page (keyset)', lambda: leaderboard.page(middle, size)),
+            ('middle page (OFFSET)', offset_page),
+            ('rank of player (buckets)', lambda: leaderboard.rank_of(player)),
+            ('rank of player (COUNT)', lambda: GameResult.objects.filter(score__gt=best).count()),
+            ('record result', lambda: leaderboard.record_result(player, rng.randrange(200))),
+        )
+        self.stdout.write(f"{'query':<28}{'ms':>10}")
+        for name, function in cases:
+            self.stdout.write(f"{name:<28}{best_of(function, repeat) * 1e3:>10.2f}")
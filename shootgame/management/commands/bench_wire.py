@@ -0,0 +1,70 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from shootgame.wire import decode_frame, encode_frame
+
+# JSON 응답과 바이너리 프레임의 인코딩 시간/크기 비교
+#   python manage.py bench_wire --sizes 10 100 1000 10000
+
+def make_keyframe(count):
+    rng = random.Random(count)
+    units = [{'id': i, 'position': (rng.randint(0, 600), rng.randint(-200, 800))} for i in range(1, count + 1)]
+    return {
+        'success': True,
+        'type': 'keyframe',
+        'sequence': 12345,
+        'bullets': units[:count // 2],
+        'enemies': units[count // 2:],
+        'gun': {'position': (250, 700)},
+        'collisions': [],
+        'score': 10,
+        'life': 3,
+        'game_over': False,
+    }
+
+def make_delta(count):
+    keyframe = make_keyframe(count)
+    units = keyframe['bullets'] + keyframe['enemies']
+    return {
+        'success': True,
+        'type': 'delta',
+        'base': 12340,
+        'sequence': 12345,
+        'spawned': [{'id': u['id'], 'kind': 'enemy', 'position': u['position']} for u in units[:count // 10]],
+        'moved': units[count // 10:],
+        'removed': list(range(count + 1, count + 1 + count // 10)),
+        'collisions': [],
+    }
+
+def best_of(function, repeat):
+    # 여러 번 돌려 가장 빠른 한 번의 시간(초)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+class Command(BaseCommand):
+    help = "JSON과 바이너리 프레임의 인코딩 시간과 크기를 비교"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'frame':<9}{'entities':>9}{'json us':>11}{'binary us':>11}{'json B':>10}{'binary B':>10}{'ratio':>8}")
+        for count in options['sizes']:
+            for name, frame in (('keyframe', make_keyframe(count)), ('delta', make_delta(count))):
+                # JsonResponse와 같은 방식(DjangoJSONEncoder)으로 인코딩
+                json_time, json_body = best_of(lambda: json.dumps(frame, cls=DjangoJSONEncoder).encode(), options['repeat'])
+                binary_time, binary_body = best_of(lambda: encode_frame(frame), options['repeat'])
+                assert decode_frame(binary_body)['sequence'] == frame['sequence']
+                self.stdout.write(
+                    f"{name:<9}{count:>9}{json_time * 1e6:>11.1f}{binary_time * 1e6:>11.1f}"
+                    f"{len(json_body):>10}{len(binary_body):>10}{len(json_body) / len(binary_body):>8.2f}"
+                )
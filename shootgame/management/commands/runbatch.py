@@ -0,0 +1,73 @@
+import itertools
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from batch import BatchStats, run_batch
+
+# 조절값 조합마다 시드 --games개씩 헤드리스 게임을 돌려 묶음별 결과를 비교
+#   python manage.py runbatch --games 1000 --workers 8 --spawn-interval 1:3 2:5 --max-bullet 3 5
+# --jsonl 이면 게임 하나가 끝날 때마다 결과를 한 줄씩 출력
+
+def interval(value):
+    low, _, high = value.partition(':')
+    return float(low), float(high or low)
+
+class Command(BaseCommand):
+    help = "헤드리스 게임 여러 판을 프로세스 풀에서 돌려 조절값별 결과 집계"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100, help="조절값 조합마다 돌릴 게임(시드) 수")
+        parser.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본 CPU 수, 0이면 이 프로세스)")
+        parser.add_argument('--chunksize', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=0, help="첫 시드")
+        parser.add_argument('--spawn-interval', type=interval, nargs='+', default=[(2.0, 5.0)])
+        parser.add_argument('--max-bullet', type=int, nargs='+', default=[3])
+        parser.add_argument('--bullet-speed', type=float, nargs='+', default=[50])
+        parser.add_argument('--enemy-speed', type=float, nargs='+', default=[20])
+        parser.add_argument('--fire-every', type=float, nargs='+', default=[0.5])
+        parser.add_argument('--max-time', type=float, default=600)
+        parser.add_argument('--broadphase', default='brute')
+        parser.add_argument('--array-store', action='store_true')
+        parser.add_argument('--progress', type=int, default=1000, help="이 판 수마다 진행 상황 출력")
+        parser.add_argument('--jsonl', action='store_true')
+
+    def handle(self, *args, **options):
+        combinations = list(itertools.product(options['spawn_interval'], options['max_bullet'],
+                                              options['bullet_speed'], options['enemy_speed'], options['fire_every']))
+        total = len(combinations) * options['games']
+
+        def jobs():
+            for seed in range(options['seed'], options['seed'] + options['games']):
+                for spawn_interval, max_bullet, bullet_speed, enemy_speed, fire_every in combinations:
+                    yield {
+                        "seed": seed, "spawn_interval": spawn_interval, "max_bullet": max_bullet,
+                        "bullet_speed": bullet_speed, "enemy_speed": enemy_speed, "fire_every": fire_every,
+                        "max_time": options['max_time'], "broadphase": options['broadphase'],
+                        "use_array_store": options['array_store'],
+                    }
+
+        stats = BatchStats()
+        start = time.perf_counter()
+        for result in run_batch(jobs(), workers=options['workers'], chunksize=options['chunksize']):
+            stats.add(result)
+            if options['jsonl']:
+                self.stdout.write(json.dumps(result))
+            elif stats.games % options['progress'] == 0:
+                elapsed = time.perf_counter() - start
+                self.stderr.write(f"{stats.games}/{total} games, {stats.games / elapsed:.1f} games/s")
+
+        elapsed = time.perf_counter() - start
+        self.stderr.write(f"{stats.games} games in {elapsed:.1f}s ({stats.games / elapsed:.1f} games/s)")
+        if options['jsonl']:
+            return
+        self.stdout.write(f"{'spawn':>10}{'max':>5}{'bullet':>8}{'enemy':>7}{'fire':>6}"
+                          f"{'games':>8}{'score':>9}{'min':>6}{'max':>6}{'ticks':>9}{'over':>7}")
+        for row in stats.summary():
+            params = row['params']
+            spawn = '{:g}:{:g}'.format(*params['spawn_interval'])
+            self.stdout.write(f"{spawn:>10}{params['max_bullet']:>5}{params['bullet_speed']:>8g}"
+                              f"{params['enemy_speed']:>7g}{params['fire_every']:>6g}{row['games']:>8}"
+                              f"{row['mean_score']:>9.2f}{row['min_score']:>6}{row['max_score']:>6}"
+                              f"{row['mean_ticks']:>9.1f}{row['game_over_rate']:>7.2f}")
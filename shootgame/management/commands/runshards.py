@@ -0,0 +1,33 @@
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+
+from shootgame.sessions import parse_address, shard_authkey
+from shootgame.shard_boot import run_shard
+
+# 게임 세션 워커(shard)를 따로 띄움. 웹 프로세스 여러 개가 같은 워커들을 나눠 쓸 때 사용
+#   python manage.py runshards 127.0.0.1:7001 127.0.0.1:7002
+#   settings.py: SHOOT_SHARD_ADDRESSES = ['127.0.0.1:7001', '127.0.0.1:7002'] (순서도 같아야 같은 세션이 같은 워커로 감)
+
+class Command(BaseCommand):
+    help = '게임 세션 워커 프로세스 실행'
+
+    def add_arguments(self, parser):
+        parser.add_argument('addresses', nargs='+', help='host:port 또는 unix socket 경로')
+
+    def handle(self, *args, **options):
+        context = get_context('spawn')
+        authkey = shard_authkey()
+        workers = []
+        for address in options['addresses']:
+            worker = context.Process(target=run_shard, args=(parse_address(address), authkey))
+            worker.start()
+            workers.append(worker)
+            self.stdout.write(f'shard {len(workers) - 1}: {address} (pid {worker.pid})')
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shootgame", "0003_alter_gamearea_point_x_alter_gamearea_point_y"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GameResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("player", models.CharField(max_length=64)),
+                ("score", models.IntegerField()),
+                ("ticks", models.IntegerField(default=0)),
+                ("finished_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ScoreBucket",
+            fields=[
+                ("score", models.IntegerField(primary_key=True, serialize=False)),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "result",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="shootgame.gameresult",
+                    ),
+                ),
+                ("player", models.CharField(max_length=64)),
+                ("score", models.IntegerField()),
+                ("finished_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="gameresult",
+            index=models.Index(fields=["-score", "id"], name="gameresult_rank_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="gameresult",
+            index=models.Index(
+                fields=["player", "-score"], name="gameresult_player_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="leaderboardentry",
+            index=models.Index(
+                fields=["-score", "result"], name="leaderboard_rank_idx"
+            ),
+        ),
+    ]
@@ -165,6 +165,12 @@ class GameArea(Visible):
         self.point_x, self.point_y = 0, self.height
         self.save()
 
+def invalidate_persisted_status():
+    # Score/Life 행은 기본 세션의 상태라, 값이 바뀌면 그 세션의 캐시된 상태를 버림
+    from .status_cache import invalidate_status
+    from .world import DEFAULT_SESSION
+    invalidate_status(DEFAULT_SESSION)
+
 class Score(Effect):
     current_status = models.IntegerField(default=0)
 
@@ -174,7 +180,10 @@ class Score(Effect):
     
     @overrides
     def activate(self):
-        self.status += 1
+        # status는 읽기 전용 property라 저장된 값을 직접 바꿈
+        self.current_status += 1
+        self.save(update_fields=['current_status'])
+        invalidate_persisted_status()
 
 class Life(Effect):
     current_status = models.IntegerField(default=0)
@@ -185,4 +194,38 @@ class Life(Effect):
 
     @overrides
     def activate(self):
-        self.status -= 1
\ No newline at end of file
+        self.current_status -= 1
+        self.save(update_fields=['current_status'])
+        invalidate_persisted_status()
+
+class GameResult(models.Model):
+    # 끝난 게임 한 판의 기록 (PlayerStatus의 마지막 상태)
+    player = models.CharField(max_length=64)
+    score = models.IntegerField()
+    ticks = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # 순위 순서(점수 내림차순, 같은 점수는 먼저 끝난 순)로 keyset 페이지를 읽음
+            models.Index(fields=['-score', 'id'], name='gameresult_rank_idx'),
+            # 플레이어의 최고 점수
+            models.Index(fields=['player', '-score'], name='gameresult_player_idx'),
+        ]
+
+class ScoreBucket(models.Model):
+    # 점수별 게임 수 (materialized): "X점보다 높은 게임 수"를 점수 종류 수만큼의 합으로 구함
+    score = models.IntegerField(primary_key=True)
+    count = models.IntegerField(default=0)
+
+class LeaderboardEntry(models.Model):
+    # 상위 K개 기록 (materialized): 첫 페이지는 이 작은 테이블만 읽음
+    result = models.OneToOneField(GameResult, on_delete=models.CASCADE, primary_key=True)
+    player = models.CharField(max_length=64)
+    score = models.IntegerField()
+    finished_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', 'result'], name='leaderboard_rank_idx'),
+        ]
@@ -0,0 +1,127 @@
+import logging
+import time
+
+from django.db import DatabaseError, transaction
+
+import shooting_game
+from .models import Bullet, Enemy, Gun, Life, Score
+
+# write-behind 저장: 틱마다 DB에 쓰지 않고 바뀐 엔티티/삭제를 모아 두었다가 interval마다 한 번에 기록
+# interval이 durability/latency 조절값
+#   0     -> 틱마다 기록 (잃는 상태 없음, 틱마다 트랜잭션 한 번)
+#   N초   -> 최대 N초 동안의 변경을 잃을 수 있음, 그 대신 틱은 DB를 거의 건드리지 않음
+
+logger = logging.getLogger(__name__)
+
+BULLET_FIELDS = ['point_x', 'point_y', 'angle']
+ENEMY_FIELDS = ['point_x', 'point_y']
+
+def model_for(unit):
+    return Bullet if isinstance(unit, shooting_game.Bullet) else Enemy
+
+def bullet_row(bullet, gun_id):
+    return Bullet(id=bullet.id, point_x=round(bullet.point_x), point_y=round(bullet.point_y),
+                  size=bullet.size, speed=bullet.speed, angle=round(bullet.angle), gun_id=gun_id)
+
+def enemy_row(enemy):
+    return Enemy(id=enemy.id, point_x=round(enemy.point_x), point_y=round(enemy.point_y),
+                 size=enemy.size, speed=enemy.speed, spawn_pos=str(round(enemy.point_x)))
+
+class WriteBehindBuffer:
+    def __init__(self, interval=1.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.last_flush = clock()
+
+        self.live = {}          # 마지막으로 본 살아 있는 엔티티 id -> 객체
+        self.dirty = {}         # 다음 flush에 기록할 엔티티 id -> 객체 (여러 틱의 변경이 하나로 합쳐짐)
+        self.removed = {}       # 다음 flush에 지울 id -> 모델
+        self.persisted = set()  # DB에 행이 있는 id
+        self.status = None
+        self.persisted_status = None
+        self.gun_id = None
+        self.flushes = 0
+
+    def record(self, units, status):
+        # 현재 살아 있는 엔티티와 플레이어 상태를 받아 새로 생긴 것/바뀐 것/사라진 것을 모음
+        current = {unit.id: unit for unit in units}
+        for unit_id in self.live.keys() - current.keys():
+            self.dirty.pop(unit_id, None)
+            # DB에 한 번도 쓰지 않은 엔티티는 지울 것도 없음
+            if unit_id in self.persisted:
+                self.removed[unit_id] = model_for(self.live[unit_id])
+        self.live = current
+        self.dirty.update(current)
+        self.status = status
+
+    def pending(self):
+        return bool(self.dirty or self.removed or self.status != self.persisted_status)
+
+    def maybe_flush(self):
+        if self.interval is None:
+            return False
+        if self.clock() - self.last_flush < self.interval:
+            return False
+        try:
+            self.flush()
+        except DatabaseError:
+            # 기록 실패로 틱을 멈추지 않음. 모인 변경은 그대로 두고 다음 interval에 다시 시도
+            logger.exception("write-behind flush 실패")
+            return False
+        return True
+
+    def flush(self):
+        # 모인 변경을 한 트랜잭션으로 기록. 실패하면 DB와 버퍼 모두 이전 상태로 남아 다음 flush에서 다시 시도
+        self.last_flush = self.clock()
+        if not self.pending():
+            return
+
+        created = {Bullet: [], Enemy: []}
+        updated = {Bullet: [], Enemy: []}
+        with transaction.atomic():
+            gun_id = self.gun_id or self.ensure_gun()
+            for unit_id, unit in self.dirty.items():
+                model = model_for(unit)
+                row = bullet_row(unit, gun_id) if model is Bullet else enemy_row(unit)
+                (updated if unit_id in self.persisted else created)[model].append(row)
+
+            for model, fields in ((Bullet, BULLET_FIELDS), (Enemy, ENEMY_FIELDS)):
+                if created[model]:
+                    model.objects.bulk_create(created[model])
+                if updated[model]:
+                    model.objects.bulk_update(updated[model], fields)
+                removed = [unit_id for unit_id, removed_model in self.removed.items() if removed_model is model]
+                if removed:
+                    model.objects.filter(id__in=removed).delete()
+
+            if self.status != self.persisted_status:
+                score, life = self.status
+                Score.objects.update_or_create(pk=1, defaults={'current_status': score})
+                Life.objects.update_or_create(pk=1, defaults={'current_status': life})
+
+        # 커밋이 끝난 뒤에만 장부를 갱신
+        self.gun_id = gun_id
+        self.persisted.update(self.dirty)
+        self.persisted -= self.removed.keys()
+        self.persisted_status = self.status
+        self.dirty = {}
+        self.removed = {}
+        self.flushes += 1
+
+    def ensure_gun(self):
+        gun, created = Gun.objects.get_or_create(pk=1, defaults={
+            'point_x': 0, 'point_y': 0, 'size': shooting_game.Gun.size, 'max_bullet': shooting_game.Gun.max_bullet
+        })
+        return gun.pk
+
+    def load(self):
+        # 마지막으로 커밋된 상태를 읽어옴 (프로세스가 죽은 뒤 월드 복구용)
+        bullets = list(Bullet.objects.all())
+        enemies = list(Enemy.objects.all())
+        score = Score.objects.filter(pk=1).values_list('current_status', flat=True).first()
+        life = Life.objects.filter(pk=1).values_list('current_status', flat=True).first()
+
+        self.persisted = {row.id for row in bullets} | {row.id for row in enemies}
+        if score is not None and life is not None:
+            self.persisted_status = (score, life)
+        return bullets, enemies, self.persisted_status
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import sessions
+
+# 서버 틱 스케줄러: ASGI 이벤트 루프에서 활성 월드를 SHOOT_TICK_RATE(초당 틱)로 진행시킴
+# 스케줄러가 돌면 /api/update/와 웹소켓은 틱을 진행하지 않고 마지막 프레임만 읽음
+# -> 탭이 여러 개여도 게임 속도와 DB 기록은 그대로이고, 틱 비용은 (월드 수)에만 비례
+# 최근 SHOOT_TICK_IDLE초 동안 프레임을 읽은 클라이언트가 없는 월드는 진행하지 않음 (보는 사람이 없으면 멈춤)
+# WSGI(runserver 등)처럼 이벤트 루프가 없으면 돌지 않고, 뷰는 예전처럼 요청마다 한 틱 진행함
+
+logger = logging.getLogger(__name__)
+
+class TickScheduler:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.active = {}        # 세션 id -> 마지막으로 프레임을 읽은 시각
+        self.task = None
+        self.running = False
+        self.ticks = 0
+
+    def touch(self, session_id):
+        # 클라이언트가 이 세션의 프레임을 읽음 (요청 스레드에서도 부름)
+        self.active[session_id] = self.clock()
+
+    def start(self):
+        # 지금 돌고 있는 이벤트 루프에 스케줄러 task를 띄움 (이미 돌고 있으면 아무것도 안 함)
+        if self.running or not getattr(settings, 'SHOOT_SERVER_TICK', True):
+            return
+        self.running = True
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        interval = 1.0 / getattr(settings, 'SHOOT_TICK_RATE', 10)
+        idle = getattr(settings, 'SHOOT_TICK_IDLE', 10)
+        # 월드 연산은 blocking(lock, 워커와의 IPC)이라 스레드에서. 월드끼리는 동시에 진행
+        advance = sync_to_async(sessions.call, thread_sensitive=False)
+        next_at = self.clock()
+        try:
+            while True:
+                now = self.clock()
+                for session_id, last_read in list(self.active.items()):
+                    if now - last_read > idle:
+                        self.active.pop(session_id, None)
+                if self.active:
+                    results = await asyncio.gather(
+                        *(advance(session_id, 'advance') for session_id in list(self.active)),
+                        return_exceptions=True)
+                    for result in results:
+                        if isinstance(result, Exception):
+                            logger.error("월드 진행 실패", exc_info=result)
+                self.ticks += 1
+
+                # 고정 간격. 한 바퀴가 간격보다 오래 걸렸으면 쉬지 않고 다음 바퀴 (밀린 틱은 월드가 advance에서 따라잡음)
+                next_at += interval
+                delay = next_at - self.clock()
+                if delay < 0:
+                    next_at = self.clock()
+                    delay = 0
+                await asyncio.sleep(delay)
+        finally:
+            self.running = False
+
+# ASGI 프로세스 하나에 하나
+scheduler = TickScheduler()
@@ -0,0 +1,245 @@
+import hashlib
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from urllib.parse import parse_qs
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+
+from django.conf import settings
+
+from .shard_boot import run_shard
+from .world import DEFAULT_SESSION, drop_world, get_world, point
+
+# 게임 세션: 클라이언트마다 자기 월드를 갖고, 세션 id를 해시해 정해진 워커 프로세스(shard)가 그 월드를 맡음
+#   SHOOT_WORKERS = N             -> 이 웹 프로세스가 워커 N개를 띄워 씀 (0이면 웹 프로세스 안에서 처리)
+#   SHOOT_SHARD_ADDRESSES = [...] -> `manage.py runshards`로 따로 띄운 워커들에 연결 (웹 프로세스 여러 개가 공유)
+
+SESSION_COOKIE = 'shoot_session'
+SESSION_ID = re.compile(r'[0-9a-f]{32}')
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+def valid_session_id(session_id):
+    return bool(session_id) and (session_id == DEFAULT_SESSION or SESSION_ID.fullmatch(session_id) is not None)
+
+# 월드에 대한 연산: 프로세스 경계를 넘으므로 결과는 모두 dict/숫자 같은 단순한 값
+def fire(world, angle):
+    bullet = world.fire(angle)
+    return {'id': bullet.id, 'position': point(bullet)}
+
+def spawn_enemy(world):
+    enemy = world.spawn_enemy()
+    return {'id': enemy.id, 'position': point(enemy)}
+
+def parse_angle(value):
+    # 요청의 발사 각도를 유한한 float로 (숫자 문자열 "45"도 받음). 아니면 ValueError
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError('angle은 숫자')
+    try:
+        angle = float(value)
+    except ValueError:
+        raise ValueError('angle은 숫자') from None
+    if not math.isfinite(angle):
+        raise ValueError('angle은 유한한 숫자')
+    return angle
+
+def command_angle(command):
+    # 명령(JSON 객체)의 발사 각도: 유한한 int/float만. json.loads는 Infinity/NaN도 float로 읽으므로 유한한지도 확인
+    angle = command.get('angle', 90)
+    if type(angle) not in (int, float) or not math.isfinite(angle):
+        raise ValueError('angle은 유한한 숫자')
+    return angle
+
+MAX_COMMANDS = 64
+CLIENT_ID = re.compile(r'[0-9A-Za-z_-]{1,64}')
+
+def parse_commands(data):
+    # 명령 묶음 요청 {"client": id, "commands": [{"seq": n, "type": "fire"|"spawn", "angle": a, "tick": t}, ...]}
+    # 를 검사해 (client, commands)로 돌려줌. 하나라도 틀리면 ValueError: 묶음은 통째로 적용하거나 거절
+    if not isinstance(data, dict):
+        raise ValueError('잘못된 명령 묶음')
+    client = data.get('client', '')
+    if not isinstance(client, str) or (client and CLIENT_ID.fullmatch(client) is None):
+        raise ValueError('잘못된 client')
+    commands = data.get('commands')
+    if not isinstance(commands, list) or len(commands) > MAX_COMMANDS:
+        raise ValueError(f'commands는 {MAX_COMMANDS}개 이하의 목록')
+
+    parsed = []
+    for command in commands:
+        if not isinstance(command, dict):
+            raise ValueError('잘못된 명령')
+        seq, tick = command.get('seq'), command.get('tick')
+        if type(seq) is not int or seq <= 0 or not (tick is None or type(tick) is int):
+            raise ValueError('seq는 양의 정수, tick은 정수')
+        if command.get('type') == 'fire':
+            parsed.append({'seq': seq, 'tick': tick, 'type': 'fire', 'angle': command_angle(command)})
+        elif command.get('type') == 'spawn':
+            parsed.append({'seq': seq, 'tick': tick, 'type': 'spawn'})
+        else:
+            raise ValueError('잘못된 명령 유형')
+    return client, parsed
+
+def frame_info(world):
+    return {'width': world.width, 'height': world.height, 'gun': point(world.gun), **world.status()}
+
+OPERATIONS = {
+    'tick': lambda world, ack=None: world.tick(ack),
+    'advance': lambda world: world.advance(),
+    'frame': lambda world, ack=None: world.read_frame(ack),
+    'status': lambda world: world.status(),
+    'fire': fire,
+    'spawn_enemy': spawn_enemy,
+    'commands': lambda world, client, commands: world.apply_commands(client, commands),
+    'frame_info': frame_info,
+}
+
+def run_operation(session_id, name, args):
+    if name == 'drop':
+        return drop_world(session_id)
+    return OPERATIONS[name](get_world(session_id), *args)
+
+class LocalRouter:
+    # 워커 없이 이 프로세스 안의 월드에서 바로 처리
+    def call(self, session_id, name, *args):
+        return run_operation(session_id, name, args)
+
+class ShardRouter:
+    # 세션 id를 해시해 owner 워커를 고르고, 그 워커와의 연결로 연산을 보냄
+    def __init__(self, addresses, authkey, connect_timeout=10):
+        self.addresses = list(addresses)
+        self.authkey = authkey
+        self.connect_timeout = connect_timeout
+        self.connections = [None] * len(self.addresses)
+        # 연결 하나는 한 번에 한 요청만 주고받을 수 있음
+        self.locks = [threading.Lock() for _ in self.addresses]
+
+    def shard_for(self, session_id):
+        # 프로세스가 달라도 같은 값이 나오도록 crc32 사용 (hash()는 프로세스마다 다름)
+        return zlib.crc32(session_id.encode()) % len(self.addresses)
+
+    def connect(self, shard):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.addresses[shard], authkey=self.authkey)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 막 띄운 워커가 아직 listen하기 전일 수 있음
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def call(self, session_id, name, *args):
+        shard = self.shard_for(session_id)
+        with self.locks[shard]:
+            if self.connections[shard] is None:
+                self.connections[shard] = self.connect(shard)
+            connection = self.connections[shard]
+            try:
+                connection.send((session_id, name, args))
+                ok, result = connection.recv()
+            except (EOFError, OSError):
+                # 워커가 죽었으면 다음 호출 때 다시 연결
+                self.connections[shard] = None
+                raise
+        if not ok:
+            raise RuntimeError(f"shard {shard} 연산 실패: {result}")
+        return result
+
+def serve_connection(connection):
+    # 웹 프로세스 하나와의 연결에서 요청을 차례로 처리
+    while True:
+        try:
+            session_id, name, args = connection.recv()
+        except EOFError:
+            connection.close()
+            return
+        try:
+            connection.send((True, run_operation(session_id, name, args)))
+        except Exception as error:
+            connection.send((False, repr(error)))
+
+def serve_shard(address, authkey):
+    # 워커 프로세스 본체: address에서 연결을 받아 연결마다 스레드 하나로 처리
+    # (새 프로세스에서는 shard_boot.run_shard로 django.setup() 뒤에 불림)
+    listener = Listener(address, authkey=authkey)
+    while True:
+        connection = listener.accept()
+        threading.Thread(target=serve_connection, args=(connection,), daemon=True).start()
+
+def shard_authkey():
+    return hashlib.sha256(f"shoot-shard:{settings.SECRET_KEY}".encode()).digest()
+
+def parse_address(address):
+    # "host:port"는 TCP, 나머지는 unix socket 경로
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+def spawn_shards(workers, authkey):
+    # 워커 프로세스를 workers개 띄우고 주소 목록 반환
+    # fork 대신 spawn: 스레드가 도는 웹 서버 프로세스를 복제하지 않음
+    context = get_context('spawn')
+    directory = tempfile.mkdtemp(prefix='shoot-shards-')
+    addresses = [os.path.join(directory, f'shard-{index}.sock') for index in range(workers)]
+    for address in addresses:
+        context.Process(target=run_shard, args=(address, authkey), daemon=True).start()
+    return addresses
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                addresses = getattr(settings, 'SHOOT_SHARD_ADDRESSES', None)
+                workers = getattr(settings, 'SHOOT_WORKERS', 0)
+                if addresses:
+                    _router = ShardRouter([parse_address(address) for address in addresses], shard_authkey())
+                elif workers:
+                    _router = ShardRouter(spawn_shards(workers, shard_authkey()), shard_authkey())
+                else:
+                    _router = LocalRouter()
+    return _router
+
+def call(session_id, name, *args):
+    return get_router().call(session_id, name, *args)
+
+def session_from_request(request):
+    # 쿠키의 세션 id (없거나 형식이 틀리면 새로 발급). 두 번째 값은 새로 만들었는지 여부
+    session_id = request.COOKIES.get(SESSION_COOKIE)
+    if valid_session_id(session_id):
+        return session_id, False
+    return new_session_id(), True
+
+def session_from_scope(scope):
+    # 웹소켓 연결의 세션 id: 쿠키 헤더 -> ?session= 순서로 찾고 없으면 새로 발급
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            for cookie in value.decode('latin-1').split(';'):
+                key, _, session_id = cookie.strip().partition('=')
+                if key == SESSION_COOKIE and valid_session_id(session_id):
+                    return session_id
+    session_id = parse_qs(scope.get('query_string', b'').decode()).get('session', [None])[0]
+    if valid_session_id(session_id):
+        return session_id
+    return new_session_id()
+
+class GameSessionMixin:
+    # 요청마다 request.game_session을 정하고, 처음 온 클라이언트에게 세션 쿠키를 줌
+    def dispatch(self, request, *args, **kwargs):
+        request.game_session, created = session_from_request(request)
+        response = super().dispatch(request, *args, **kwargs)
+        if created:
+            response.set_cookie(SESSION_COOKIE, request.game_session, samesite='Lax', httponly=True)
+        return response
@@ -0,0 +1,10 @@
+import django
+
+# 게임 세션 워커(shard) 프로세스의 시작점. spawn으로 띄운 프로세스는 이 모듈을 import해 대상을 찾음
+# sessions는 .world -> .models를 import하므로 django.setup() 전에 불러오면 AppRegistryNotReady로 죽음
+# 그래서 이 모듈은 models를 import하지 않고, setup을 먼저 한 뒤에 sessions를 불러옴
+
+def run_shard(address, authkey):
+    django.setup()
+    from .sessions import serve_shard
+    serve_shard(address, authkey)
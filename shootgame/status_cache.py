@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import caches
+
+# 세션별 플레이어 상태(score, life, game_over) 캐시 (Django 캐시, 설정이 없으면 locmem)
+# 월드가 상태가 실제로 바뀔 때만 새 값을 넣고, 상태 폴링은 캐시만 읽음 -> DB도 워커 호출도 없음
+# SHOOT_WORKERS/SHOOT_SHARD_ADDRESSES로 워커 프로세스를 쓸 때는 CACHES를 프로세스끼리 공유되는 백엔드(memcached, redis 등)로 설정해야 함
+
+def status_cache():
+    return caches[getattr(settings, 'SHOOT_STATUS_CACHE', 'default')]
+
+def status_key(session_id):
+    return f'shoot:status:{session_id}'
+
+def publish_status(session_id, status):
+    # 세션이 버려지는 시간(SHOOT_SESSION_IDLE)만큼만 남김
+    status_cache().set(status_key(session_id), status, getattr(settings, 'SHOOT_SESSION_IDLE', 600))
+
+def invalidate_status(session_id):
+    status_cache().delete(status_key(session_id))
+
+def cached_status(session_id, load):
+    # 캐시에 없으면 load()로 월드에서 읽어 채움
+    # set 대신 add: 그 사이 월드가 넣은 더 새로운 값을 덮어쓰지 않음
+    status = status_cache().get(status_key(session_id))
+    if status is None:
+        status = load()
+        status_cache().add(status_key(session_id), status, getattr(settings, 'SHOOT_SESSION_IDLE', 600))
+    return status
+
+def status_etag(status):
+    # 같은 상태면 같은 ETag -> 바뀌지 않은 폴링은 304
+    return f'"{status["score"]}-{status["life"]}-{int(status["game_over"])}"'
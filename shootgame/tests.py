@@ -1,3 +1,1061 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from django.db import DatabaseError
+from multipledispatch import Dispatcher
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from batch import BatchStats, run_batch
+from game_host import OVER, PAUSED, GameHost
+from entity_store import EntityStore
+from broadphase import BruteForceBroadphase, make_broadphase, overlaps
+from profiling import PROFILER, TickProfiler
+from replay import HEADER, RECORD, Replay, ReplayRecorder
+import shooting_game
+from shooting_game import (
+    Bullet, BulletCollisionHandler, EnemyObjectCreater, EnemySpawner, FixedInterval, Gun, LeftWalls, PlayerStatus,
+    RightWalls, Waves,
+)
+from timer_wheel import TimerWheel
+from . import leaderboard
+from .consumers import GameSocket
+from .delta import DeltaTracker
+from .models import Enemy, GameResult, LeaderboardEntry
+from .persistence import WriteBehindBuffer
+from .scheduler import TickScheduler, scheduler
+from .sessions import SESSION_COOKIE, ShardRouter, spawn_shards
+from .wire import decode_frame, encode_frame
+from .world import DEFAULT_SESSION, GameWorld, drop_world, evict_idle_worlds, get_world
+
+
+class Box:
+    # broadphase 테스트용 영역 객체
+    def __init__(self, x, y, size):
+        self.x, self.y, self.size = x, y, size
+
+    def get_position(self):
+        return self.x, self.y, self.x + self.size, self.y + self.size
+
+
+class BroadphaseTest(SimpleTestCase):
+    # grid / sweep 결과가 brute force로 찾은 겹치는 쌍과 같아야 함
+    def brute_force_hits(self, moving, targets):
+        pairs = BruteForceBroadphase().pairs(moving, targets)
+        return [(m, t) for m, t in pairs if overlaps(m.get_position(), t.get_position())]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            bullets = [Box(rng.uniform(-50, 850), rng.uniform(-50, 650), 20) for _ in range(rng.randint(0, 60))]
+            enemies = [Box(rng.choice([50, 150, 250, 350, 450]), rng.uniform(0, 600), 100) for _ in range(rng.randint(0, 40))]
+            expected = self.brute_force_hits(bullets, enemies)
+            for name in ("grid", "sweep"):
+                with self.subTest(broadphase=name):
+                    self.assertEqual(make_broadphase(name).pairs(bullets, enemies), expected)
+
+    def test_touching_edges_are_candidates(self):
+        bullet, enemy = Box(80, 0, 20), Box(100, 20, 100)
+        for name in ("grid", "sweep"):
+            self.assertEqual(make_broadphase(name).pairs([bullet], [enemy]), [(bullet, enemy)])
+
+    def test_unknown_broadphase(self):
+        with self.assertRaises(ValueError):
+            make_broadphase("octree")
+
+
+class WriteBehindRecoveryTest(TestCase):
+    # flush된 상태는 프로세스가 죽어도 새 월드에서 그대로 복구되어야 함
+    def make_world(self):
+        return GameWorld(persistence=WriteBehindBuffer(interval=None))
+
+    def positions(self, world):
+        frame = world.frame()
+        return frame['bullets'], frame['enemies'], frame['score'], frame['life']
+
+    def test_restores_last_flush(self):
+        world = self.make_world()
+        world.spawn_enemy()
+        world.fire(30)
+        world.fire(-30)
+        for _ in range(3):
+            world.tick()
+        world.persistence.flush()
+        flushed = self.positions(world)
+
+        # flush 이후의 변경은 아직 DB에 없음-> 죽으면 사라짐
+        world.fire(0)
+        world.tick()
+
+        restored = self.make_world()
+        restored.restore()
+        self.assertEqual(self.positions(restored), flushed)
+        self.assertGreater(restored.next_id, max(b['id'] for b in flushed[0]))
+
+    def test_flush_is_batched(self):
+        world = self.make_world()
+        for _ in range(20):
+            world.spawn_enemy()
+        world.persistence.flush()
+        for _ in range(5):
+            world.tick()
+        # 엔티티 수와 관계없이 한 번의 bulk_update (TestCase 안이라 트랜잭션은 savepoint/release로 보임)
+        # 점수/생명은 바뀌지 않았으므로 기록하지 않음
+        with self.assertNumQueries(3):
+            world.persistence.flush()
+
+    def test_failed_flush_leaves_previous_state(self):
+        world = self.make_world()
+        world.spawn_enemy()
+        world.persistence.flush()
+        world.tick()
+        world.spawn_enemy()
+
+        with mock.patch.object(Enemy.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                world.persistence.flush()
+        self.assertEqual(Enemy.objects.count(), 1)
+        self.assertEqual(Enemy.objects.get().point_y, 0)
+
+        # 실패한 변경은 버퍼에 남아 다음 flush에 기록됨
+        world.persistence.flush()
+        self.assertEqual(Enemy.objects.count(), 2)
+
+
+class DeltaTrackerTest(SimpleTestCase):
+    def test_delta_merges_changes_since_ack(self):
+        tracker = DeltaTracker()
+        tracker.record(1, {1: ('enemy', [0, 0])}, {'score': 0})
+        # 2: Bullet 2 생성, 3: Bullet 2 이동 + Bullet 3 생성, 4: Bullet 3 삭제 + Enemy 1 이동 + 점수
+        tracker.record(2, {1: ('enemy', [0, 0]), 2: ('bullet', [5, 5])}, {'score': 0})
+        tracker.record(3, {1: ('enemy', [0, 0]), 2: ('bullet', [6, 4]), 3: ('bullet', [9, 9])}, {'score': 0})
+        tracker.record(4, {1: ('enemy', [0, 20]), 2: ('bullet', [7, 3])}, {'score': 1})
+
+        delta = tracker.delta(4, 1)
+        # 창 안에서 생겼다 사라진 3은 spawned에 없고 removed에만, 생긴 뒤 움직인 2는 spawned에 마지막 위치로만
+        self.assertEqual(delta['spawned'], [{'id': 2, 'kind': 'bullet', 'position': [7, 3]}])
+        self.assertEqual(delta['moved'], [{'id': 1, 'position': [0, 20]}])
+        self.assertEqual(delta['removed'], [3])
+        self.assertEqual((delta['base'], delta['sequence'], delta['status']), (1, 4, {'score': 1}))
+
+        self.assertEqual((tracker.delta(4, 4)['spawned'], tracker.delta(4, 4)['removed']), ([], []))
+
+        # 상태가 안 바뀐 창에는 status가 없음
+        tracker.record(5, {1: ('enemy', [0, 40]), 2: ('bullet', [7, 3])}, {'score': 1})
+        self.assertNotIn('status', tracker.delta(5, 4))
+
+    def test_keyframe_when_ack_is_stale_or_on_interval(self):
+        tracker = DeltaTracker(history=4, keyframe_interval=5)
+        for sequence in range(1, 10):
+            tracker.record(sequence, {}, None)
+        # 기록은 6~9만 남음: ack 5부터는 delta, 그보다 오래된 ack는 keyframe
+        self.assertFalse(tracker.needs_keyframe(9, 5))
+        self.assertTrue(tracker.needs_keyframe(9, 4))
+        self.assertFalse(tracker.needs_keyframe(9, 9))
+        self.assertTrue(tracker.needs_keyframe(9, None))
+        self.assertTrue(tracker.needs_keyframe(9, 10))
+        # keyframe_interval의 배수인 틱은 ack와 상관없이 keyframe
+        tracker.record(10, {}, None)
+        self.assertTrue(tracker.needs_keyframe(10, 9))
+        self.assertTrue(tracker.needs_keyframe(10, 10))
+
+class WireFormatTest(SimpleTestCase):
+    # 바이너리 프레임은 JSON 프레임과 같은 내용으로 되돌아와야 함
+    def test_keyframe_round_trip(self):
+        frame = {
+            'type': 'keyframe', 'sequence': 7, 'score': 2, 'life': 1, 'game_over': False,
+            'bullets': [{'id': 3, 'position': (10, -40)}],
+            'enemies': [{'id': 4, 'position': (150, 60)}, {'id': 5, 'position': (250, 0)}],
+            'gun': {'position': (250, 700)}, 'collisions': [],
+        }
+        decoded = decode_frame(encode_frame(frame))
+        self.assertEqual(decoded['bullets'], frame['bullets'])
+        self.assertEqual(decoded['enemies'], frame['enemies'])
+        self.assertEqual((decoded['score'], decoded['life'], decoded['game_over']), (2, 1, False))
+
+    def test_delta_round_trip(self):
+        frame = {
+            'type': 'delta', 'base': 5, 'sequence': 7,
+            'spawned': [{'id': 9, 'kind': 'enemy', 'position': (50, 0)}],
+            'moved': [{'id': 3, 'position': (20, -90)}],
+            'removed': [4],
+            'status': {'score': 3, 'life': 0, 'game_over': True},
+        }
+        decoded = decode_frame(encode_frame(frame))
+        self.assertEqual({key: decoded[key] for key in frame}, frame)
+
+class GameSessionTest(SimpleTestCase):
+    def test_sessions_have_separate_worlds(self):
+        first = self.client.get('/api/player/status/')
+        session = first.cookies[SESSION_COOKIE].value
+
+        self.client.post('/api/fire/', '{"angle": 90}', content_type='application/json')
+        frame = self.client.get('/api/update/').json()
+        self.assertEqual(len(frame['bullets']), 1)
+
+        # 쿠키가 없는 다른 클라이언트는 새 세션, 빈 월드
+        other = self.client_class()
+        frame = other.get('/api/update/').json()
+        self.assertEqual(frame['bullets'], [])
+        self.assertNotEqual(other.cookies[SESSION_COOKIE].value, session)
+
+    def test_fire_angle_is_validated(self):
+        fire = lambda body: self.client.post('/api/fire/', body, content_type='application/json')
+        # 숫자 문자열은 숫자로 바꿔 받고, 숫자가 아니거나 유한하지 않으면 400 (월드는 그대로)
+        self.assertEqual(fire('{"angle": "45"}').status_code, 200)
+        for body in ('{"angle": "x"}', '{"angle": Infinity}', '{"angle": NaN}', '{"angle": true}',
+                     '{"angle": [1]}', '[1, 2]', 'not json'):
+            self.assertEqual(fire(body).status_code, 400, body)
+        frame = self.client.get('/api/update/')
+        self.assertEqual(frame.status_code, 200)
+        self.assertEqual(len(frame.json()['bullets']), 1)
+
+        world = get_world(self.client.cookies[SESSION_COOKIE].value)
+        self.assertEqual(world.gun.get_bullets()[0].angle, 45)
+        for angle in ('45', float('nan'), None):
+            with self.assertRaises(ValueError):
+                world.fire(angle)
+        self.assertEqual(len(world.gun.get_bullets()), 1)
+
+    def test_shard_for_is_stable(self):
+        router = ShardRouter(['a', 'b', 'c'], b'key')
+        sessions = ['%032x' % i for i in range(300)]
+        shards = [router.shard_for(session) for session in sessions]
+        self.assertEqual(shards, [router.shard_for(session) for session in sessions])
+        self.assertEqual(set(shards), {0, 1, 2})
+
+    def test_spawned_shard_serves_calls(self):
+        # 진짜 워커 프로세스(spawn)를 띄워 왕복: 워커가 django.setup() 전에 models를 불러오면 여기서 실패
+        before = set(multiprocessing.active_children())
+        router = ShardRouter(spawn_shards(1, b'key'), b'key', connect_timeout=30)
+        for child in set(multiprocessing.active_children()) - before:
+            self.addCleanup(child.join)
+            self.addCleanup(child.terminate)
+        session = 'd' * 32
+        self.assertEqual(router.call(session, 'fire', 90)['position'], (250, 700))
+        self.assertEqual(router.call(session, 'status')['life'], 3)
+        with self.assertRaisesMessage(RuntimeError, 'shard 0 연산 실패'):
+            router.call(session, 'fire', 'x')
+        self.assertTrue(router.call(session, 'drop'))
+
+class EntityPoolTest(SimpleTestCase):
+    def test_fire_recycles_dead_bullets(self):
+        gun = Gun(250, 700)
+        first = gun.fire(30)
+        first.delete()
+        second = gun.fire(-30)
+
+        # 사라진 Bullet 객체를 새 상태로 다시 씀
+        self.assertIs(second, first)
+        self.assertTrue(second.alive)
+        self.assertEqual(second.angle, -30)
+        self.assertEqual(gun.get_bullets(), [second])
+
+    def test_max_bullet_reuses_oldest(self):
+        gun = Gun(250, 700)
+        bullets = [gun.fire(0) for _ in range(Gun.max_bullet)]
+        newest = gun.fire(45)
+
+        self.assertIs(newest, bullets[0])
+        self.assertEqual(gun.get_bullets(), bullets[1:] + [newest])
+        self.assertEqual(gun.pool.created, Gun.max_bullet)
+
+class EntityStoreTest(SimpleTestCase):
+    def test_spawn_and_release(self):
+        store = EntityStore(capacity=2)
+        bullet = store.spawn(Bullet, 30, 10, 20, None)
+        self.assertIsInstance(bullet, Bullet)
+        self.assertEqual((bullet.point_x, bullet.point_y, bullet.angle, bullet.speed), (10, 20, 30, Bullet.speed))
+        self.assertEqual((store.point_x[bullet.slot], store.angle[bullet.slot]), (10, 30))
+        self.assertEqual((store.velocity_x[bullet.slot], store.velocity_y[bullet.slot]), bullet.velocity())
+        # 각도가 바뀌면 속도 벡터도 바뀜
+        bullet.angle = -45
+        self.assertEqual((store.velocity_x[bullet.slot], store.velocity_y[bullet.slot]), bullet.velocity())
+
+        # 떼어낸 뒤에도 마지막 값은 읽을 수 있고, slot은 다시 쓰임
+        slot = bullet.slot
+        bullet.delete()
+        self.assertFalse(bullet.alive)
+        self.assertEqual((bullet.point_x, bullet.angle, len(store)), (10, -45, 0))
+        enemy = store.spawn(shooting_game.Enemy, 0, 5, 6, None)
+        self.assertEqual((enemy.slot, bullet.point_x), (slot, 10))
+
+        # capacity를 넘으면 배열이 늘어나고 값은 그대로
+        more = [store.spawn(shooting_game.Enemy, 0, index, index, None) for index in range(3)]
+        self.assertEqual(store.capacity, 4)
+        self.assertEqual([(obj.point_x, obj.point_y) for obj in [enemy] + more], [(5, 6), (0, 0), (1, 1), (2, 2)])
+
+    def test_oldest_and_view_follow_spawn_order(self):
+        store = EntityStore(capacity=4)
+        first, second, third = [store.spawn(shooting_game.Enemy, 0, index, 0, None) for index in range(3)]
+        self.assertIs(store.oldest(), first)
+        first.delete()
+        # 새 객체가 앞쪽 slot을 다시 써도 생성 순서대로
+        fourth = store.spawn(shooting_game.Enemy, 0, 3, 0, None)
+        self.assertEqual(fourth.slot, 0)
+        self.assertEqual(store.view(), [second, third, fourth])
+        self.assertIs(store.view().store, store)
+        self.assertIs(store.oldest(), second)
+        for obj in (second, third, fourth):
+            obj.delete()
+        self.assertIsNone(store.oldest())
+        self.assertEqual(store.view(), [])
+
+    def test_step_matches_per_object_update(self):
+        updater = shooting_game.PositionUpdater()
+        store = EntityStore(capacity=2)
+        rng = random.Random(0)
+        specs = [(Bullet, rng.uniform(-80, 80), rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(20)]
+        specs += [(shooting_game.Enemy, 0, rng.uniform(0, 800), rng.uniform(0, 100)) for _ in range(5)]
+        plain = [cls(angle, x, y, None) for cls, angle, x, y in specs]
+        stored = [store.spawn(cls, angle, x, y, None) for cls, angle, x, y in specs]
+        # 중간에 각도가 바뀌거나(반사) 사라진 객체가 있어도 같은 위치
+        for tick in range(30):
+            if tick == 10:
+                for objects in (plain, stored):
+                    objects[0].angle = -objects[0].angle
+                    objects[1].delete()
+            updater.update_object_position([obj for obj in plain if obj.alive])
+            updater.update_object_position(store.view())
+            self.assertEqual([(obj.point_x, obj.point_y) for obj in plain if obj.alive],
+                             [(obj.point_x, obj.point_y) for obj in stored if obj.alive])
+
+class FastBullet(Bullet):
+    __slots__ = ()
+    speed = 400
+
+class CollisionResponsesTest(SimpleTestCase):
+    def test_lookup_matches_multipledispatch(self):
+        # 예전 multipledispatch 오버로드와 같은 시그니처로 만든 Dispatcher와 모든 타입 쌍에서 같은 반응을 골라야 함
+        dispatcher = Dispatcher('collide_occur')
+        dispatcher.add((Bullet, shooting_game.Enemy), shooting_game.bullet_hits_enemy)
+        dispatcher.add((Bullet, shooting_game.GameFrame), shooting_game.bullet_hits_wall)
+        dispatcher.add((shooting_game.Enemy, shooting_game.Bottom), shooting_game.enemy_hits_bottom)
+
+        store = EntityStore()
+        types = [Bullet, FastBullet, store.stored_type(Bullet), shooting_game.Enemy,
+                 store.stored_type(shooting_game.Enemy), LeftWalls, RightWalls, shooting_game.Bottom, type(None)]
+        for first in types:
+            for second in types:
+                self.assertIs(shooting_game.COLLISION_RESPONSES.lookup(first, second),
+                              dispatcher.dispatch(first, second), (first, second))
+        self.assertIs(shooting_game.COLLISION_RESPONSES.lookup(store.stored_type(Bullet), RightWalls),
+                      shooting_game.bullet_hits_wall)
+
+    def test_unregistered_pair_is_ignored(self):
+        status = PlayerStatus()
+        handler = BulletCollisionHandler(status)
+        enemy = EnemyObjectCreater().create_at(0, 0)
+        bullet = Bullet(0, 0, 0, handler)
+        for unit1, unit2 in ((enemy, bullet), (enemy, LeftWalls(100, 100)), (bullet, bullet), (bullet, None)):
+            handler.collide_occur(unit1, unit2)
+        self.assertTrue(enemy.alive and bullet.alive)
+        self.assertEqual((status.get_score(), status.get_life()), (0, 3))
+
+class SweptCollisionTest(SimpleTestCase):
+    def setUp(self):
+        self.status = PlayerStatus()
+        self.handler = BulletCollisionHandler(self.status)
+
+    def test_bullet_reflects_at_wall_it_passed(self):
+        # 틱 끝 영역(-40~-20)은 x=0 선과 겹치지 않지만 지나온 경로는 벽을 넘음
+        bullet = Bullet(-90, 10, 300, self.handler)
+        bullet.update_position()
+        bullet.is_collide_at(LeftWalls(600, 800))
+        self.assertEqual(bullet.angle, 90)
+        self.assertAlmostEqual(bullet.point_x, 40)
+
+        bullet = Bullet(90, 570, 300, self.handler)
+        bullet.update_position()
+        bullet.is_collide_at(RightWalls(600, 800))
+        self.assertEqual(bullet.angle, -90)
+        self.assertAlmostEqual(bullet.point_x, 540)
+
+    def test_fast_bullet_hits_enemy_it_passed(self):
+        enemy = shooting_game.Enemy(0, 100, 100, self.handler)
+        bullet = FastBullet(0, 120, 400, self.handler)
+        bullet.update_position()
+        enemy.update_position()
+        bullet.is_collide_at(enemy)
+        self.assertFalse(enemy.alive)
+        self.assertEqual(self.status.get_score(), 1)
+
+class SpawnQueueTest(SimpleTestCase):
+    def test_full_queue_pushes_back_and_tick_drains_batch(self):
+        spawner = EnemySpawner(EnemyObjectCreater(), queue_capacity=2)
+        self.assertTrue(spawner.pending.put(timeout=0))
+        self.assertTrue(spawner.pending.put(timeout=0))
+        self.assertFalse(spawner.pending.put(timeout=0))
+        self.assertEqual(spawner.enemies, [])
+
+        spawner.spawn_pending()
+        metrics = spawner.pending.metrics()
+        self.assertEqual(len(spawner.enemies), 2)
+        self.assertEqual((metrics['depth'], metrics['max_depth'], metrics['full_waits'], metrics['last_batch']), (0, 2, 1, 2))
+
+class GameLoopControllerTest(SimpleTestCase):
+    def test_fixed_step_catch_up_and_drop(self):
+        # 틱 간격 0.125초(2진수로 정확)인 가짜 시계: 3번째 sleep 뒤 0.375초, 6번째 뒤 2초 멈춤
+        now = [0.0]
+        ticked_at = []
+        stalls = {3: 0.375, 6: 2.0}
+        sleeps = []
+
+        updater = mock.Mock(check_game_over=lambda: False)
+        updater.update.side_effect = lambda: ticked_at.append(now[0])
+        reader = mock.Mock(drain=lambda: [])
+        controller = shooting_game.GameLoopController(
+            mock.Mock(), updater, mock.Mock(), tick_rate=8, input_reader=reader, clock=lambda: now[0],
+            sleep=lambda seconds: sleep(seconds))
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds + stalls.get(len(sleeps), 0)
+            if len(sleeps) == 12:
+                controller.running = False
+        controller.start()
+
+        # 0.375초 밀리면 한 번에 4틱(밀린 3틱 + 이번 틱), 2초 밀리면 max_catch_up(5)틱만 돌고 나머지는 버림
+        runs = [ticked_at.count(time) for time in sorted(set(ticked_at))]
+        self.assertEqual(runs, [1, 1, 4, 1, 1, 5, 1, 1, 1, 1, 1])
+        self.assertEqual(ticked_at[-1], 3.75)
+        stats = controller.stats.summary()
+        self.assertEqual((stats['ticks'], stats['catch_up_drops'], stats['max_interval']), (18, 1, 2.125))
+        # 틱 간격 17개: 합 3.625초, 목표 간격과의 차이 합 3.25초
+        self.assertAlmostEqual(stats['achieved_rate'], 17 / 3.625)
+        self.assertAlmostEqual(stats['jitter'], 3.25 / 17)
+        self.assertEqual(stats['target_rate'], 8)
+        # 따라잡은 뒤에는 남은 시간만큼만 잠
+        self.assertEqual(sleeps[:4], [0.125, 0.125, 0.125, 0.125])
+
+class TimerWheelTest(SimpleTestCase):
+    def test_fires_in_time_order_across_levels(self):
+        now = [0.0]
+        wheel = TimerWheel(resolution=0.01, clock=lambda: now[0])
+        rng = random.Random(0)
+        fired = []
+        # 0단계 한 바퀴(0.64초)부터 가장 높은 단계를 넘는 먼 타이머까지
+        # (같은 칸의 타이머는 등록 순서로 실행되므로 시각은 resolution 단위로)
+        whens = [round(rng.uniform(0, 2e5) if index % 10 == 0 else rng.uniform(0, 3), 2) for index in range(300)]
+        timers = [wheel.schedule_at(when, fired.append, when) for when in whens]
+        for timer in timers[::7]:
+            timer.cancel()
+        expected = sorted(when for index, when in enumerate(whens) if index % 7)
+
+        batches = 0
+        while now[0] < 2e5:
+            now[0] += rng.uniform(0, 0.2) if now[0] < 3 else 1000
+            batches += wheel.advance() > 0
+            # 지금까지 실행된 것은 모두 now 이전, 남은 것은 모두 now 이후
+            self.assertTrue(all(when <= now[0] + 1e-9 for when in fired))
+            self.assertEqual(fired, expected[:len(fired)])
+            self.assertTrue(all(when > now[0] - 0.01 for when in expected[len(fired):]))
+        wheel.advance(now[0] + 1)
+        self.assertEqual(fired, expected)
+        self.assertEqual(len(wheel), 0)
+        self.assertLess(batches, len(expected))
+
+    def test_waves_spawn_in_batches_from_shared_wheel(self):
+        now = [0.0]
+        wheel = TimerWheel(clock=lambda: now[0])
+        pattern = Waves(size=3, spacing=0.5, pause=FixedInterval(10), growth=1)
+        spawners = [EnemySpawner(EnemyObjectCreater(), pattern=pattern) for _ in range(2)]
+        for spawner in spawners:
+            spawner.schedule(wheel, now[0])
+
+        # 10초 쉬고 3마리(0.5초 간격), 다시 10초 쉬고 4마리
+        now[0] = 11.0
+        self.assertEqual(wheel.advance(), 2)
+        self.assertEqual([spawner.pending.metrics()['depth'] for spawner in spawners], [3, 3])
+        now[0] = 22.0
+        wheel.advance()
+        self.assertEqual([spawner.pending.metrics()['depth'] for spawner in spawners], [6, 6])
+        now[0] = 22.5
+        wheel.advance()
+        self.assertEqual([spawner.pending.metrics()['depth'] for spawner in spawners], [7, 7])
+
+        # 멈춘 스포너의 타이머는 취소됨. 다음 웨이브는 5마리
+        spawners[0].stop()
+        now[0] = 40.0
+        wheel.advance()
+        self.assertEqual([spawner.pending.metrics()['depth'] for spawner in spawners], [7, 12])
+        self.assertEqual(len(wheel), 1)
+
+class GameHostTest(SimpleTestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.host = GameHost(clock=lambda: self.now[0])
+
+    def advance(self, seconds, step=0.01):
+        for _ in range(round(seconds / step)):
+            self.now[0] += step
+            self.host.run_once()
+
+    def test_games_tick_at_their_own_rate(self):
+        slow = self.host.create(tick_rate=10, seed=1)
+        fast = self.host.create(tick_rate=25, seed=2)
+        self.advance(2)
+        self.assertEqual(self.host.get(slow).loop.stats.ticks, 20)
+        self.assertEqual(self.host.get(fast).loop.stats.ticks, 50)
+
+    def test_expensive_game_does_not_starve_others(self):
+        games = [self.host.create(seed=index) for index in range(4)]
+        expensive = self.host.get(games[0]).loop
+        tick = expensive.tick
+
+        def slow_tick():
+            tick()
+            self.now[0] += 0.35
+        expensive.tick = slow_tick
+
+        self.now[0] = 0.1
+        for _ in range(10):
+            self.host.run_once()
+        # 늦어진 게임도 pass마다 한 틱씩만: 모든 게임이 같은 수의 틱을 받음
+        self.assertEqual([self.host.get(game_id).loop.stats.ticks for game_id in games], [10] * 4)
+        self.assertGreater(self.host.dropped, 0)
+
+    def test_pause_resume_destroy(self):
+        results = []
+        game_id = self.host.create(seed=3, on_game_over=lambda status, ticks: results.append(ticks))
+        other = self.host.create(seed=4)
+        hosted = self.host.get(game_id)
+        self.host.send(game_id, "fire 0")
+        self.advance(1)
+        self.assertEqual(len(hosted.game.gun.get_bullets()), 1)
+        self.assertEqual(len(self.host.timers), 2)
+
+        self.host.pause(game_id)
+        self.assertEqual(hosted.state, PAUSED)
+        self.advance(5)
+        self.assertEqual(hosted.loop.stats.ticks, 10)
+        self.assertEqual(hosted.game.enemy_spawner.pending.metrics()['enqueued'], 0)
+
+        self.host.resume(game_id)
+        self.advance(1.01)
+        self.assertEqual(hosted.loop.stats.ticks, 20)
+
+        summary = self.host.destroy(game_id)
+        self.assertEqual((summary['state'], summary['ticks'], results), (OVER, 20, [20]))
+        self.assertNotIn(game_id, self.host.games)
+        with self.assertRaisesMessage(KeyError, f'없는 게임: {game_id}'):
+            self.host.destroy(game_id)
+        self.assertTrue(hosted.game.enemy_spawner.timer.cancelled)
+        self.advance(1)
+        self.assertEqual(self.host.get(other).loop.stats.ticks, 80)
+
+    def test_script_clock_stops_while_paused(self):
+        game_id = self.host.create(seed=5, script=[(1.5, "fire 10"), (2.0, "fire 20"), (3.0, "fire 30")])
+        hosted = self.host.get(game_id)
+        processed = []
+        process_input = hosted.game.input_processor.process_input
+        def recording(user_input, controller):
+            processed.append((user_input, round(self.now[0], 1)))
+            process_input(user_input, controller)
+        hosted.game.input_processor.process_input = recording
+
+        self.advance(1)
+        self.host.pause(game_id)
+        self.advance(10)
+        self.assertEqual(processed, [])
+        # 멈춘 10초는 게임 시간이 아님: 다시 시작한 뒤에도 입력은 게임 시간 1.5초, 2초, 3초에 하나씩
+        self.host.resume(game_id)
+        self.advance(0.6)
+        self.assertEqual(processed, [("fire 10", 11.5)])
+        self.advance(1.5)
+        self.assertEqual(processed, [("fire 10", 11.5), ("fire 20", 12.0), ("fire 30", 13.0)])
+        self.assertAlmostEqual(hosted.game_time(self.now[0]), 3.1)
+
+    def test_run_on_event_loop(self):
+        host = GameHost()
+        games = [host.create(seed=index, tick_rate=50) for index in range(5)]
+
+        async def run():
+            task = asyncio.create_task(host.run())
+            await asyncio.sleep(0.3)
+            host.stop()
+            await task
+        asyncio.run(run())
+        self.assertTrue(all(host.get(game_id).loop.stats.ticks >= 5 for game_id in games))
+
+class PlayerStatusCacheTest(TestCase):
+    def test_unchanged_status_is_not_modified(self):
+        first = self.client.get('/api/player/status/')
+        etag = first['ETag']
+
+        with self.assertNumQueries(0):
+            unchanged = self.client.get('/api/player/status/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(unchanged.status_code, 304)
+
+        # 틱에서 점수가 바뀌면 캐시가 갱신되어 새 ETag로 응답
+        get_world(self.client.cookies[SESSION_COOKIE].value).player_status.update_score()
+        self.client.get('/api/update/')
+        changed = self.client.get('/api/player/status/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['score'], 1)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_evicted_world_status_is_invalidated(self):
+        session = self.client.get('/api/player/status/').cookies[SESSION_COOKIE].value
+        world = get_world(session)
+        world.player_status.life = 0
+        world.publish_status()
+        self.assertTrue(self.client.get('/api/player/status/').json()['game_over'])
+
+        # 오래 쓰이지 않아 버려진 세션: 다시 만든 월드의 새 상태를 읽음
+        evict_idle_worlds(time.monotonic() + 601)
+        status = self.client.get('/api/player/status/').json()
+        self.assertEqual((status['life'], status['game_over']), (3, False))
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        self.scores = [5, 9, 1, 9, 0, 5, 7, 5, 3]
+        with mock.patch.object(leaderboard, 'TOP_SIZE', 4):
+            for index, score in enumerate(self.scores):
+                leaderboard.record_result(f'p{index}', score)
+
+    def expected(self):
+        rows = GameResult.objects.order_by('-score', 'id')
+        return [(1 + sum(other > row.score for other in self.scores), row.id) for row in rows]
+
+    def test_incremental_top_matches_full_order(self):
+        top = list(LeaderboardEntry.objects.order_by('-score', 'result_id').values_list('result_id', flat=True))
+        self.assertEqual(top, [result_id for _, result_id in self.expected()[:4]])
+
+    def test_keyset_pages_rank_every_result(self):
+        seen, after = [], None
+        while True:
+            page = leaderboard.page(after, size=2)
+            seen += [(entry['rank'], entry['id']) for entry in page['results']]
+            if page['next'] is None:
+                break
+            after = leaderboard.parse_cursor(page['next'])
+        self.assertEqual(seen, self.expected())
+
+    def test_rank_of_player_uses_best_score(self):
+        leaderboard.record_result('p4', 8)
+        self.assertEqual(leaderboard.rank_of('p4'), {'player': 'p4', 'score': 8, 'rank': 3, 'total': 10})
+        self.assertIsNone(leaderboard.rank_of('nobody'))
+
+class ReplayTest(SimpleTestCase):
+    def state(self, game):
+        return (game.player_status.get_score(), game.player_status.get_life(),
+                [(b.angle, b.point_x, b.point_y) for b in game.gun.get_bullets()],
+                [(e.point_x, e.point_y) for e in game.enemy_spawner.get_enemies()])
+
+    def record(self, game):
+        # game을 기록하며 돌리고 (리플레이, 틱마다 상태)
+        log = io.BytesIO()
+        recorder = ReplayRecorder(log, keyframe_interval=40).attach(game)
+        script = [(index * 0.45, f"fire {(index * 37) % 121 - 60}") for index in range(200)]
+
+        states = {}
+        update = game.game_updater.update
+        def recording_update():
+            update()
+            states[recorder.tick] = self.state(game)
+        game.game_updater.update = recording_update
+        game.run_headless(script, max_time=60)
+        log.seek(0)
+        return Replay(log), states
+
+    def test_seek_matches_recorded_game(self):
+        replay, states = self.record(shooting_game.ShootingGame(seed=3))
+        for tick in (1, 39, 40, 41, 277, replay.last_tick):
+            self.assertEqual(self.state(replay.game_at(tick)), states[tick])
+
+    def test_replays_game_settings(self):
+        # 기본값이 아닌 속력/Bullet 수도 header에 남아 같은 게임으로 재생됨
+        for use_array_store in (False, True):
+            game = shooting_game.ShootingGame(seed=3, bullet_speed=80, enemy_speed=35, max_bullet=5,
+                                              use_array_store=use_array_store)
+            replay, states = self.record(game)
+            self.assertGreater(max(len(state[2]) for state in states.values()), 3)
+            for tick in (1, 40, 97, replay.last_tick):
+                self.assertEqual(self.state(replay.game_at(tick)), states[tick])
+            self.assertEqual([replay.options[name] for name in ("bullet_speed", "enemy_speed", "max_bullet")],
+                             [80, 35, 5])
+
+    def test_settings_changed_after_construction_are_refused(self):
+        game = shooting_game.ShootingGame(seed=3)
+        game.gun.max_bullet = 5
+        log = io.BytesIO()
+        with self.assertRaisesMessage(ValueError, '리플레이할 수 없는 게임: max_bullet'):
+            ReplayRecorder(log).attach(game)
+        self.assertEqual(log.getvalue(), b'')
+
+    def test_log_cut_before_first_keyframe(self):
+        log = io.BytesIO()
+        ReplayRecorder(log).attach(shooting_game.ShootingGame(seed=3))
+        for size in (HEADER.size, HEADER.size + RECORD.size + 3):
+            replay = Replay(io.BytesIO(log.getvalue()[:size]))
+            with self.assertRaisesMessage(ValueError, 'keyframe이 없는 리플레이 로그'):
+                replay.game_at(0)
+
+    def test_seed_must_fit_header(self):
+        for seed in ("abc", 1.5, True, 2 ** 63, -2 ** 63 - 1):
+            log = io.BytesIO()
+            with self.assertRaisesMessage(ValueError, '리플레이에 남길 수 없는 seed'):
+                ReplayRecorder(log).attach(shooting_game.ShootingGame(seed=seed))
+            self.assertEqual(log.getvalue(), b'')
+        for seed in (None, 0, -2 ** 63, 2 ** 63 - 1):
+            log = io.BytesIO()
+            ReplayRecorder(log).attach(shooting_game.ShootingGame(seed=seed))
+            log.seek(0)
+            self.assertEqual(Replay(log).options["seed"], seed)
+
+
+class MetricsTest(TestCase):
+    def test_tick_phases_exported(self):
+        PROFILER.reset()
+        self.client.post('/api/fire/', {'angle': 10}, content_type='application/json')
+        self.client.get('/api/update/')
+
+        response = self.client.get('/metrics/')
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        for phase in ('update', 'spawn', 'movement', 'broadphase', 'persistence', 'delta', 'serialization'):
+            self.assertIn(f'shoot_phase_seconds_count{{phase="{phase}"}} 1', body)
+        # 충돌 검사는 틱마다 4번 (Enemy, 양쪽 벽, 바닥)
+        self.assertIn('shoot_phase_seconds_count{phase="narrowphase"} 4', body)
+        self.assertIn('shoot_entities_bucket{kind="bullets",le="+Inf"} 1', body)
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = TickProfiler(enabled=False)
+        with profiler.phase("movement"):
+            pass
+        profiler.observe_count("bullets", 3)
+        self.assertEqual(profiler.phases, {})
+        self.assertEqual(profiler.counts, {})
+
+
+@override_settings(SHOOT_PERSIST_INTERVAL=0, SHOOT_BROADPHASE='grid')
+class ApiQueryBudgetTest(TestCase):
+    # 엔티티 N개가 있는 월드에서 API 요청 하나가 내는 쿼리 수는 N과 무관한 상한 안이어야 함 (엔티티마다 save/delete 하면 실패)
+    # 틱마다 DB에 기록하는(interval 0) 기본 세션으로 재고, 지연 시간은 N별로 로그에 남김
+    SIZES = (1, 20, 200)
+    # 요청별 쿼리 상한: 트랜잭션/savepoint + 모델별 bulk 연산 + 점수/생명
+    BUDGETS = {'update': 8, 'fire': 8, 'spawn': 8, 'status': 0}
+    LATENCY_BUDGET = 0.5
+
+    requests = {
+        'update': lambda client: client.get('/api/update/'),
+        'fire': lambda client: client.post('/api/fire/', {'angle': 10}, content_type='application/json'),
+        'spawn': lambda client: client.post('/api/spawn/', {'type': 'enemy'}, content_type='application/json'),
+        'status': lambda client: client.get('/api/player/status/'),
+    }
+
+    def setUp(self):
+        self.verbose, shooting_game.VERBOSE = shooting_game.VERBOSE, False
+        drop_world(DEFAULT_SESSION)
+        self.addCleanup(drop_world, DEFAULT_SESSION)
+
+    def tearDown(self):
+        shooting_game.VERBOSE = self.verbose
+
+    def measure(self, size):
+        # Bullet/Enemy를 size개씩 채운 새 월드에서 요청마다 (쿼리 수, 지연 시간)
+        drop_world(DEFAULT_SESSION)
+        random.seed(size)
+        world = get_world(DEFAULT_SESSION)
+        world.gun.max_bullet = size + 1
+        # 채우는 동안은 기록을 미루고 한 번에 flush
+        world.persistence.interval = None
+        for index in range(size):
+            world.fire(index % 90 - 45)
+            world.spawn_enemy()
+        world.persistence.interval = 0
+        world.persistence.flush()
+        self.client.cookies[SESSION_COOKIE] = DEFAULT_SESSION
+        # 상태 캐시를 채워 둠 (304가 아닌 200 응답의 쿼리 수를 잼)
+        self.client.get('/api/player/status/')
+
+        results = {}
+        for name, request in self.requests.items():
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = request(self.client)
+                elapsed = time.perf_counter() - start
+            self.assertEqual(response.status_code, 200, name)
+            results[name] = (len(queries), elapsed)
+        return results
+
+    def test_query_count_does_not_grow_with_entities(self):
+        logger = logging.getLogger(__name__)
+        measured = {size: self.measure(size) for size in self.SIZES}
+        for name, budget in self.BUDGETS.items():
+            counts = [measured[size][name][0] for size in self.SIZES]
+            logger.info("%s: queries %s, ms %s", name, counts,
+                        [round(measured[size][name][1] * 1e3, 2) for size in self.SIZES])
+            self.assertLessEqual(max(counts), budget, f'{name} 쿼리 수가 상한을 넘음: {counts}')
+            self.assertLess(measured[self.SIZES[-1]][name][1], self.LATENCY_BUDGET, name)
+
+
+class BatchRunnerTest(SimpleTestCase):
+    def test_pool_matches_in_process(self):
+        jobs = [{"seed": seed, "max_bullet": max_bullet, "bullet_speed": 40, "max_time": 30}
+                for seed in range(3) for max_bullet in (1, 4)]
+        key = lambda result: (result["seed"], result["params"]["max_bullet"])
+        local = sorted(run_batch(jobs, workers=0), key=key)
+        pooled = sorted(run_batch(jobs, workers=2, chunksize=2), key=key)
+        self.assertEqual([{**r, "wall_time": 0} for r in local], [{**r, "wall_time": 0} for r in pooled])
+        # 속력은 게임마다 따로: 클래스 속성은 그대로
+        self.assertEqual(shooting_game.Bullet.speed, 50)
+
+        stats = BatchStats()
+        for result in local:
+            stats.add(result)
+        self.assertEqual([row["games"] for row in stats.summary()], [3, 3])
+
+    def test_speeds_apply_to_one_game_only(self):
+        shooting_game.VERBOSE = False
+        self.addCleanup(setattr, shooting_game, 'VERBOSE', True)
+        for use_array_store in (False, True):
+            fast = shooting_game.ShootingGame(use_array_store=use_array_store, bullet_speed=80, enemy_speed=5)
+            plain = shooting_game.ShootingGame(use_array_store=use_array_store)
+            moved = []
+            for game in (fast, plain):
+                bullet = game.gun.fire(0)
+                enemy = game.enemy_creator.create_at(50, 0)
+                game.position_updater.update_object_position(game.gun.get_bullets())
+                game.position_updater.update_object_position([enemy] if not use_array_store
+                                                             else game.enemy_creator.store.view())
+                moved.append((game.gun.point_y - bullet.point_y, enemy.point_y))
+            self.assertEqual(moved, [(80, 5), (50, 20)])
+        self.assertEqual((shooting_game.Bullet.speed, shooting_game.Enemy.speed), (50, 20))
+        self.assertIs(shooting_game.entity_type(Bullet, 80), fast.gun.bullet_type)
+        self.assertIs(shooting_game.entity_type(Bullet, 50), Bullet)
+        # 설정은 options에도 남아, options로 다시 만든 게임이 같은 설정을 가짐
+        game = shooting_game.ShootingGame(seed=3, bullet_speed=80, enemy_speed=35, max_bullet=5)
+        self.assertEqual([game.options[name] for name in ("bullet_speed", "enemy_speed", "max_bullet")], [80, 35, 5])
+        copy = shooting_game.ShootingGame(**game.options)
+        self.assertEqual((copy.gun.bullet_type.speed, copy.enemy_creator.enemy_type.speed, copy.gun.max_bullet),
+                         (80, 35, 5))
+        self.assertEqual(shooting_game.ShootingGame().options["max_bullet"], Gun.max_bullet)
+
+    def test_headless_run_is_quiet_only_for_itself(self):
+        # 헤드리스 실행 도중 다른 스레드의 로그는 그대로 찍히고, 전역 VERBOSE는 건드리지 않음
+        game = shooting_game.ShootingGame(seed=1)
+        update = game.game_updater.update
+        outside = []
+        def update_with_other_thread():
+            update()
+            if not outside:
+                thread = threading.Thread(target=lambda: outside.append(shooting_game.log("다른 게임")))
+                thread.start()
+                thread.join()
+                self.assertTrue(shooting_game.VERBOSE)
+        game.game_updater.update = update_with_other_thread
+        with mock.patch('builtins.print') as printed:
+            game.run_headless([(index * 0.5, "fire 0") for index in range(20)], max_time=10)
+        self.assertEqual(outside, [None])
+        printed.assert_called_once_with("다른 게임")
+        self.assertTrue(shooting_game.VERBOSE)
+
+
+class TickSchedulerTest(SimpleTestCase):
+    def test_advance_keeps_fixed_rate(self):
+        world = GameWorld(tick_rate=10)
+        self.assertEqual(world.advance(0), 1)
+        self.assertEqual(world.advance(0.05), 0)
+        self.assertEqual(world.advance(0.35), 3)
+        # 오래 멈춰 있다 다시 진행하면 밀린 틱을 몰아서 돌리지 않음
+        self.assertEqual(world.advance(100), 1)
+        self.assertEqual(world.sequence, 5)
+
+    @override_settings(SHOOT_TICK_RATE=100)
+    def test_scheduler_advances_active_worlds_only(self):
+        drop_world('a' * 32)
+        drop_world('b' * 32)
+        self.addCleanup(drop_world, 'a' * 32)
+        self.addCleanup(drop_world, 'b' * 32)
+        ticker = TickScheduler()
+
+        async def run():
+            ticker.start()
+            ticker.touch('a' * 32)
+            await asyncio.sleep(0.2)
+            await ticker.stop()
+        asyncio.run(run())
+
+        self.assertGreater(get_world('a' * 32).sequence, 5)
+        self.assertEqual(get_world('b' * 32).sequence, 0)
+
+    def test_update_view_reads_when_scheduler_runs(self):
+        with mock.patch.object(scheduler, 'running', True):
+            first = self.client.get('/api/update/').json()
+            second = self.client.get('/api/update/').json()
+        self.assertEqual(first['sequence'], 0)
+        self.assertEqual(second['sequence'], 0)
+        self.assertIn(self.client.cookies[SESSION_COOKIE].value, scheduler.active)
+
+class GameSocketTest(SimpleTestCase):
+    session = 'c' * 32
+
+    def setUp(self):
+        drop_world(self.session)
+        self.addCleanup(drop_world, self.session)
+
+    async def receive(self, communicator, kind):
+        # 프레임 사이에 섞여 오는 응답 중 kind('frame' 또는 'reply')인 다음 메시지
+        while True:
+            message = json.loads((await communicator.receive_output(2))['text'])
+            if ('type' in message) == (kind == 'frame'):
+                return message
+
+    def test_connect_push_ack_and_bad_input(self):
+        async def run():
+            socket = GameSocket()
+            socket.interval = 0.01
+            communicator = ApplicationCommunicator(socket, {
+                'type': 'websocket', 'path': '/ws/game/', 'headers': [],
+                'query_string': f'session={self.session}'.encode()})
+            await communicator.send_input({'type': 'websocket.connect'})
+            self.assertEqual((await communicator.receive_output(2))['type'], 'websocket.accept')
+            frame = await self.receive(communicator, 'frame')
+            self.assertEqual(frame['type'], 'keyframe')
+
+            # 잘못된 입력은 오류로 답하고 연결과 월드는 그대로
+            for text in ('[1, 2]', '"hi"', 'not json', '{"type": "fire", "angle": "x"}',
+                         '{"type": "fire", "angle": Infinity}', '{"type": "jump"}'):
+                await communicator.send_input({'type': 'websocket.receive', 'text': text})
+                self.assertFalse((await self.receive(communicator, 'reply'))['success'], text)
+
+            await communicator.send_input({'type': 'websocket.receive', 'text': '{"type": "fire", "angle": 30}'})
+            await communicator.send_input({'type': 'websocket.receive',
+                                           'text': json.dumps({'type': 'ack', 'sequence': frame['sequence']})})
+            # ack 이후로는 delta, 발사한 Bullet이 spawned로 옴
+            spawned = []
+            while not spawned:
+                frame = await self.receive(communicator, 'frame')
+                if frame['type'] == 'delta':
+                    spawned = [unit['kind'] for unit in frame['spawned']]
+            self.assertEqual(spawned, ['bullet'])
+
+            await communicator.send_input({'type': 'websocket.disconnect'})
+            await communicator.wait(2)
+        asyncio.run(run())
+        self.assertEqual(len(get_world(self.session).gun.get_bullets()), 1)
+
+class CommandBatchTest(TestCase):
+    def post(self, data):
+        return self.client.post('/api/commands/', data, content_type='application/json')
+
+    def test_batch_applied_once_in_order(self):
+        commands = [{'seq': 2, 'type': 'spawn'}, {'seq': 1, 'type': 'fire', 'angle': 30},
+                    {'seq': 3, 'type': 'fire', 'angle': -30}]
+        data = self.post({'client': 'tab1', 'commands': commands}).json()
+        self.assertEqual(data['ack'], 3)
+        self.assertEqual([result['seq'] for result in data['results']], [1, 2, 3])
+
+        # 응답을 못 받은 클라이언트가 다시 보내도 한 번만 적용
+        again = self.post({'client': 'tab1', 'commands': commands + [{'seq': 4, 'type': 'spawn'}]}).json()
+        self.assertEqual(again['ack'], 4)
+        self.assertEqual([result['seq'] for result in again['results']], [4])
+        world = get_world(self.client.cookies[SESSION_COOKIE].value)
+        self.assertEqual(len(world.gun.get_bullets()), 2)
+        self.assertEqual(len(world.enemy_spawner.get_enemies()), 2)
+
+        # 다른 탭의 seq는 따로 셈
+        other = self.post({'client': 'tab2', 'commands': [{'seq': 1, 'type': 'spawn'}]}).json()
+        self.assertEqual(len(other['results']), 1)
+
+    def test_invalid_batch_is_rejected_whole(self):
+        response = self.post({'commands': [{'seq': 1, 'type': 'fire', 'angle': 10}, {'seq': 2, 'type': 'jump'}]})
+        self.assertEqual(response.status_code, 400)
+        world = get_world(self.client.cookies[SESSION_COOKIE].value)
+        self.assertEqual(world.gun.get_bullets(), [])
+
+    def test_non_finite_angle_is_rejected(self):
+        for angle in ('Infinity', '-Infinity', 'NaN', '"45"'):
+            body = '{"commands": [{"seq": 1, "type": "spawn"}, {"seq": 2, "type": "fire", "angle": %s}]}' % angle
+            self.assertEqual(self.post(body).status_code, 400, angle)
+        self.assertEqual(self.client.get('/api/update/').status_code, 200)
+        world = get_world(self.client.cookies[SESSION_COOKIE].value)
+        self.assertEqual((world.gun.get_bullets(), world.enemy_spawner.get_enemies()), ([], []))
+
+    def test_stale_command_is_acknowledged_but_dropped(self):
+        self.client.get('/api/update/')
+        world = get_world(self.client.cookies[SESSION_COOKIE].value)
+        world.sequence = 100
+        data = self.post({'commands': [{'seq': 1, 'type': 'fire', 'angle': 0, 'tick': 10}]}).json()
+        self.assertEqual(data['ack'], 1)
+        self.assertEqual(data['results'], [{'seq': 1, 'dropped': True}])
+
+
+class CollisionEventsTest(SimpleTestCase):
+    def play(self, broadphase, seed, script=None, max_time=60, max_bullet=8, spawn_interval=(0.3, 1.0), **options):
+        game = shooting_game.ShootingGame(seed=seed, broadphase=broadphase, max_bullet=max_bullet, **options)
+        game.enemy_spawner.spawn_interval = spawn_interval
+        states = []
+        update = game.game_updater.update
+        def recording_update():
+            update()
+            states.append((game.player_status.get_score(), game.player_status.get_life(),
+                           [(b.point_x, b.point_y, b.angle) for b in game.gun.get_bullets()],
+                           [(e.point_x, e.point_y) for e in game.enemy_spawner.get_enemies()]))
+        game.game_updater.update = recording_update
+        if script is None:
+            script = [(index * 0.15, f"fire {(index * 37) % 121 - 60}") for index in range(1, 400)]
+        game.run_headless(script, max_time=max_time)
+        return states
+
+    def test_matches_polling_every_tick(self):
+        # 반사/삭제/pool 재사용이 섞인 게임에서 틱마다 모든 쌍을 확인한 결과와 같아야 함
+        for seed in range(3):
+            self.assertEqual(self.play("event", seed), self.play("brute", seed))
+
+    def test_matches_polling_over_random_seeds(self):
+        # 발사 직후 Enemy 모서리에 닿는 것처럼 경계에서 겨우 닿는 충돌도 놓치지 않아야 함 (배열 저장소 포함)
+        for seed in range(8):
+            for every in (0.2, 0.6):
+                rng = random.Random(seed * 7 + 1)
+                angles = [rng.choice([rng.randint(-80, 80), rng.choice([-45, 45, 0, -30, 30, 60, -60])])
+                          for _ in range(1, int(30 / every))]
+                script = [(index * every, f"fire {angle}") for index, angle in enumerate(angles, 1)]
+                options = {"script": script, "max_time": 30, "max_bullet": 50, "spawn_interval": (0.1, 0.5),
+                           "tick_rate": 5, "use_array_store": seed % 2 == 1}
+                self.assertEqual(self.play("event", seed, **options), self.play("brute", seed, **options), (seed, every))
+
+    def test_corner_touch_after_many_ticks(self):
+        # 몇 번째 틱이든 (350, 500)에서 45도로 발사한 Bullet이 (250, 400)의 Enemy 모서리에 닿는 것을 찾아야 함
+        shooting_game.VERBOSE = False
+        self.addCleanup(setattr, shooting_game, 'VERBOSE', True)
+        for ticks in [*range(200), 10 ** 6, 10 ** 9]:
+            updater = shooting_game.make_position_updater("event")
+            updater.events.tick = ticks
+            status = PlayerStatus()
+            bullet = Bullet(45, 350, 500, BulletCollisionHandler(status))
+            enemy = EnemyObjectCreater().create_at(250, 400)
+            updater.update_object_position([bullet])
+            updater.update_object_position([enemy])
+            updater.update_collisions((([bullet], [enemy]),))
+            self.assertEqual(status.get_score(), 1, ticks)
+
+    def test_reflex_invalidates_predictions(self):
+        # 반사된 뒤에는 반대쪽 벽과의 새 충돌을 예측해 다시 튕겨야 함
+        shooting_game.VERBOSE = False
+        self.addCleanup(setattr, shooting_game, 'VERBOSE', True)
+        updater = shooting_game.make_position_updater("event")
+        handler = BulletCollisionHandler()
+        bullet = Bullet(80, 100, 300, handler)
+        left, right = LeftWalls(400, 600), RightWalls(400, 600)
+        angles = []
+        for _ in range(30):
+            updater.update_object_position([bullet])
+            updater.update_collisions((([bullet], left), ([bullet], right)))
+            angles.append(bullet.angle)
+        # 오른쪽 벽에서 -80도로, 다시 왼쪽 벽에서 80도로
+        self.assertIn(80, angles[angles.index(-80):])
+        self.assertTrue(0 <= bullet.point_x <= 400)
+        # 매 틱 모든 쌍이 아니라 예정된 충돌만 확인
+        self.assertLess(updater.events.checked, 10)
@@ -1,13 +1,16 @@
 from django.urls import path
 from .views import *
-from django.views.generic import TemplateView
 
 urlpatterns = [
     path('home/', OutFrameView.as_view(), name="out_frame"), 
-    path('frame/', TemplateView.as_view(template_name="frame.html"), name = "frame"), 
+    path('frame/', GameFrameView.as_view(), name = "frame"), 
     path('api/frame/', FrameView.as_view(), name='frame'),
     path('api/spawn/', SpawnView.as_view(), name='spawn'),
     path('api/fire/', FireView.as_view(), name='fire'),
+    path('api/commands/', CommandsView.as_view(), name='commands'),
     path('api/update/', GameUpdateView.as_view(), name='update'),
     path('api/player/status/', PlayerStatusView.as_view(), name='player_status'),
+    path('api/leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('api/leaderboard/rank/', LeaderboardRankView.as_view(), name='leaderboard_rank'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -4,177 +4,149 @@ from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 import json
-import random
-import math
 
-from .models import (
-    Gun, Bullet, Enemy, GameArea, Score, Life
-)
-class OutFrameView(TemplateView):
+from profiling import PROFILER
+
+from . import leaderboard, sessions
+from .scheduler import scheduler
+from .sessions import GameSessionMixin
+from .status_cache import cached_status, status_etag
+from .wire import CONTENT_TYPE, accepts_binary, encode_frame
+
+# 모든 뷰는 요청의 게임 세션(쿠키)으로 월드를 고르고, 월드 연산은 sessions.call로 그 세션을 맡은 워커에 보냄
+
+class OutFrameView(GameSessionMixin, TemplateView):
     template_name = "out_frame.html"
 
-class FrameView(TemplateView):  
+class GameFrameView(GameSessionMixin, TemplateView):
+    template_name = "frame.html"
+
+class FrameView(GameSessionMixin, TemplateView):
     template_name = "frame.html"
 
     def get_context_data(self, **kwargs):
-        game_area, created = GameArea.objects.get_or_create(id=1)
-        height, width = game_area.frame_size
-        score_obj = Score.objects.first() or Score.objects.create()
-        life_obj = Life.objects.first() or Life.objects.create()
-        
+        info = sessions.call(self.request.game_session, 'frame_info')
+
         return {
-            'height': height,
-            'width': width,
-            'score': score_obj.status,
-            'life': life_obj.status
+            'height': info['height'],
+            'width': info['width'],
+            'score': info['score'],
+            'life': info['life']
         }
 
 @method_decorator(csrf_exempt, name='dispatch')
-class SpawnView(View):
+class SpawnView(GameSessionMixin, View):
     def post(self, request):
-        data = json.loads(request.body)
-        spawn_type = data.get('type')
-        
+        data = json.loads(request.body or '{}')
+        spawn_type = data.get('type', 'enemy')
+
         if spawn_type == 'enemy':
-            angle = random.randint(0, 360)
-            enemy = Enemy.create_enemy(angle)
-            
+            enemy = sessions.call(request.game_session, 'spawn_enemy')
+
             return JsonResponse({
                 'success': True,
-                'enemy_id': enemy.id,
-                'position': enemy.point()
+                'enemy_id': enemy['id'],
+                'position': enemy['position']
             })
-            
+
         elif spawn_type == 'gun':
-            gun, created = Gun.objects.get_or_create(
-                pk=1,
-                defaults={'name': 'player_gun', 'max_bullet': 3}
-            )
-            gun.update()
-            
+            # 총은 월드가 만들 때 바닥 가운데에 놓아 둠
+            info = sessions.call(request.game_session, 'frame_info')
             return JsonResponse({
                 'success': True,
-                'gun_id': gun.id,
-                'position': gun.point()
+                'gun_id': 1,
+                'position': info['gun']
             })
-        
+
         return JsonResponse({'success': False, 'error': '잘못된 객체 유형'})
 
 @method_decorator(csrf_exempt, name='dispatch')
-class FireView(View):
+class FireView(GameSessionMixin, View):
     def post(self, request):
-        data = json.loads(request.body)
-        angle = data.get('angle', 90)
-        
-        gun = Gun.objects.first()
-        if not gun:
-            return JsonResponse({'success': False, 'error': '총 객체가 없습니다'})
-        
-        gun.fire(angle)
-        
+        try:
+            data = json.loads(request.body or '{}')
+            if not isinstance(data, dict):
+                raise ValueError('잘못된 요청')
+            angle = sessions.parse_angle(data.get('angle', 90))
+        except ValueError as error:
+            return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+        sessions.call(request.game_session, 'fire', angle)
+
         return JsonResponse({
             'success': True,
-            'message': f'{angle}도 각도로 발사 완료'
+            'message': f'{angle:g}도 각도로 발사 완료'
         })
 
 @method_decorator(csrf_exempt, name='dispatch')
-class GameUpdateView(View):
+class CommandsView(GameSessionMixin, View):
+    def post(self, request):
+        # 한 프레임 동안 모인 fire/spawn 명령을 한 요청으로 (클릭마다 요청하지 않음)
+        # 응답의 ack까지는 처리됐으니 클라이언트는 그보다 큰 seq만 다시 보내면 됨
+        try:
+            client, commands = sessions.parse_commands(json.loads(request.body or '{}'))
+        except ValueError as error:
+            return JsonResponse({'success': False, 'error': str(error)}, status=400)
+        return JsonResponse(sessions.call(request.game_session, 'commands', client, commands))
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GameUpdateView(GameSessionMixin, View):
     def get(self, request):
-        left_wall = GameArea.objects.create()
-        right_wall = GameArea.objects.create()
-        bottom = GameArea.objects.create()
-    
-        score = Score.objects.first() or Score.objects.create()
-        life = Life.objects.first() or Life.objects.create()
-        
-        gun = Gun.objects.first()
-        gun.update()
-        
-        left_wall.update()
-        right_wall.update()
-        bottom.update()
-        
-        collisions = []
-        bullets_to_delete = set()
-        enemies_to_delete = set()
-        
-        bullets = Bullet.objects.all()
-        enemies = Enemy.objects.all()
-        
-        for bullet in bullets:
-            bullet.update()
-            
-            for enemy in enemies:
-                if bullet.isCollision(enemy) and enemy.id not in enemies_to_delete and bullet.id not in bullets_to_delete:
-                    score.activate()
-                    
-                    collisions.append({
-                        'type': 'bullet_enemy',
-                        'bullet_id': bullet.id,
-                        'enemy_id': enemy.id
-                    })
-                    
-                    bullets_to_delete.add(bullet.id)
-                    enemies_to_delete.add(enemy.id)
-                    break
-            
-            if left_wall and bullet.isCollision(left_wall):
-                bullet.reflex()
-                
-                collisions.append({
-                    'type': 'bullet_wall',
-                    'bullet_id': bullet.id,
-                    'wall': 'left'
-                })
-            
-            if right_wall and bullet.isCollision(right_wall):
-                bullet.reflex()
-                
-                collisions.append({
-                    'type': 'bullet_wall',
-                    'bullet_id': bullet.id,
-                    'wall': 'right'
-                })
-
-        for enemy in enemies:
-            if enemy.id in enemies_to_delete:
-                continue
-
-            enemy.update()
-
-            if bottom and enemy.isCollision(bottom):
-                life.activate()
-                
-                collisions.append({
-                    'type': 'enemy_bottom',
-                    'enemy_id': enemy.id
-                })
-                
-                enemies_to_delete.add(enemy.id)
-        
-        for bullet_id in bullets_to_delete:
-            Bullet.objects.filter(id=bullet_id).delete()
-            
-        for enemy_id in enemies_to_delete:
-            Enemy.objects.filter(id=enemy_id).delete()
-        
-        return JsonResponse({
-            'success': True,
-            'bullets': [{'id': b.id, 'position': b.point()} for b in Bullet.objects.all() if b.id not in bullets_to_delete],
-            'enemies': [{'id': e.id, 'position': e.point()} for e in Enemy.objects.all() if e.id not in enemies_to_delete],
-            'gun': {'position': gun.point() if gun else None},
-            'collisions': collisions,
-            'score': score.status,
-            'life': life.status
-        })
-        
-class PlayerStatusView(View):
+        # 서버 틱 스케줄러(ASGI)가 돌면 마지막으로 계산된 프레임을 읽기만 하고, 아니면 월드를 한 틱 진행
+        # ?ack=<sequence>를 주면 그 이후의 변경만 delta로, 없거나 너무 오래됐으면 keyframe으로
+        ack = request.GET.get('ack')
+        ack = int(ack) if ack and ack.isdigit() else None
+        if scheduler.running:
+            scheduler.touch(request.game_session)
+            frame = sessions.call(request.game_session, 'frame', ack)
+        else:
+            frame = sessions.call(request.game_session, 'tick', ack)
+
+        # Accept: application/x-shoot-frame 이면 JSON 대신 바이너리 프레임
+        with PROFILER.phase("serialization"):
+            if accepts_binary(request):
+                response = HttpResponse(encode_frame(frame), content_type=CONTENT_TYPE)
+            else:
+                response = JsonResponse(frame)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    def post(self, request):
+        return self.get(request)
+
+class PlayerStatusView(GameSessionMixin, View):
     def get(self, request):
-        score_obj = Score.objects.first() or Score.objects.create()
-        life_obj = Life.objects.first() or Life.objects.create()
+        # 상태는 캐시에서 읽고, If-None-Match가 지금 ETag와 같으면 304
+        session_id = request.game_session
+        status = cached_status(session_id, lambda: sessions.call(session_id, 'status'))
+        etag = status_etag(status)
 
-        return JsonResponse({
-            'score': score_obj.status,
-            'life': life_obj.status
-        })
+        response = JsonResponse(status)
+        response['ETag'] = etag
+        # 브라우저가 매번 If-None-Match로 다시 확인하게 함
+        patch_cache_control(response, no_cache=True, private=True)
+        return get_conditional_response(request, etag=etag, response=response)
+
+class LeaderboardView(View):
+    def get(self, request):
+        # ?after=<score>:<id> 로 다음 페이지, ?size= 로 페이지 크기(최대 100)
+        size = request.GET.get('size', '')
+        size = min(int(size), 100) if size.isdigit() and int(size) > 0 else leaderboard.PAGE_SIZE
+        return JsonResponse(leaderboard.page(leaderboard.parse_cursor(request.GET.get('after')), size))
+
+class LeaderboardRankView(GameSessionMixin, View):
+    def get(self, request):
+        # ?player= 가 없으면 이 세션의 기록
+        player = request.GET.get('player') or request.game_session
+        rank = leaderboard.rank_of(player)
+        if rank is None:
+            return JsonResponse({'success': False, 'error': '기록 없음'}, status=404)
+        return JsonResponse(rank)
+
+class MetricsView(View):
+    # 틱 단계별 소요 시간/엔티티 수 히스토그램 (Prometheus text 형식)
+    # SHOOT_SHARD_ADDRESSES로 워커를 나눠 돌리면 틱 단계는 각 워커 프로세스에서 재므로 여기엔 직렬화만 남음
+    def get(self, request):
+        return HttpResponse(PROFILER.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,116 @@
+import struct
+
+# JSON 대신 쓸 수 있는 틱 프레임의 바이너리 형식 (모두 little-endian, 고정 길이 레코드)
+#
+# header   : magic b'SHTF', version u8, type u8(0=keyframe, 1=delta), flags u8, sequence u32, score i32, life i32
+#            flags: bit0=game_over, bit1=status 포함(keyframe은 항상 포함)
+# keyframe : gun_x f32, gun_y f32, bullet 수 u32, enemy 수 u32, 이어서 bullet/enemy 레코드(id u32, x f32, y f32)
+# delta    : base u32, spawned 수 u32, moved 수 u32, removed 수 u32
+#            spawned(id u32, kind u8(0=bullet, 1=enemy), x f32, y f32), moved(id u32, x f32, y f32), removed(id u32)
+# collisions는 JSON 응답에만 실음
+
+CONTENT_TYPE = 'application/x-shoot-frame'
+MAGIC = b'SHTF'
+VERSION = 1
+
+KEYFRAME = 0
+DELTA = 1
+
+GAME_OVER = 1
+HAS_STATUS = 2
+
+KINDS = ('bullet', 'enemy')
+
+HEADER = struct.Struct('<4sBBBIii')
+KEYFRAME_HEAD = struct.Struct('<ffII')
+DELTA_HEAD = struct.Struct('<IIII')
+UNIT = struct.Struct('<Iff')
+SPAWNED = struct.Struct('<IBff')
+REMOVED = struct.Struct('<I')
+
+def pack_records(record, rows):
+    # 같은 형식의 레코드 여러 개를 struct 한 번으로 묶어서 pack
+    if not rows:
+        return b''
+    fmt = '<' + record.format.lstrip('<') * len(rows)
+    return struct.pack(fmt, *[value for row in rows for value in row])
+
+def unpack_records(record, data, offset, count):
+    fmt = '<' + record.format.lstrip('<') * count
+    values = struct.unpack_from(fmt, data, offset)
+    width = len(record.format.lstrip('<'))
+    return [values[i:i + width] for i in range(0, len(values), width)], offset + record.size * count
+
+def encode_frame(frame):
+    # world.frame()이 만든 dict(keyframe 또는 delta)를 바이트로
+    if frame['type'] == 'keyframe':
+        status = frame
+        frame_type = KEYFRAME
+        gun_x, gun_y = frame['gun']['position']
+        body = [
+            KEYFRAME_HEAD.pack(gun_x, gun_y, len(frame['bullets']), len(frame['enemies'])),
+            pack_records(UNIT, [(b['id'], *b['position']) for b in frame['bullets']]),
+            pack_records(UNIT, [(e['id'], *e['position']) for e in frame['enemies']]),
+        ]
+    else:
+        status = frame.get('status')
+        frame_type = DELTA
+        body = [
+            DELTA_HEAD.pack(frame['base'], len(frame['spawned']), len(frame['moved']), len(frame['removed'])),
+            pack_records(SPAWNED, [(s['id'], KINDS.index(s['kind']), *s['position']) for s in frame['spawned']]),
+            pack_records(UNIT, [(m['id'], *m['position']) for m in frame['moved']]),
+            pack_records(REMOVED, [(unit_id,) for unit_id in frame['removed']]),
+        ]
+
+    flags = 0
+    score = life = 0
+    if status is not None:
+        flags |= HAS_STATUS
+        score, life = status['score'], status['life']
+        if status['game_over']:
+            flags |= GAME_OVER
+    header = HEADER.pack(MAGIC, VERSION, frame_type, flags, frame['sequence'], score, life)
+    return b''.join([header] + body)
+
+def decode_frame(data):
+    # encode_frame의 역변환 (좌표는 float로 돌아옴). 테스트와 파이썬 클라이언트용
+    magic, version, frame_type, flags, sequence, score, life = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('알 수 없는 프레임 형식')
+    offset = HEADER.size
+    status = {'score': score, 'life': life, 'game_over': bool(flags & GAME_OVER)}
+
+    if frame_type == KEYFRAME:
+        gun_x, gun_y, bullet_count, enemy_count = KEYFRAME_HEAD.unpack_from(data, offset)
+        offset += KEYFRAME_HEAD.size
+        bullets, offset = unpack_records(UNIT, data, offset, bullet_count)
+        enemies, offset = unpack_records(UNIT, data, offset, enemy_count)
+        return {
+            'type': 'keyframe',
+            'sequence': sequence,
+            'bullets': [{'id': i, 'position': (x, y)} for i, x, y in bullets],
+            'enemies': [{'id': i, 'position': (x, y)} for i, x, y in enemies],
+            'gun': {'position': (gun_x, gun_y)},
+            **status
+        }
+
+    base, spawned_count, moved_count, removed_count = DELTA_HEAD.unpack_from(data, offset)
+    offset += DELTA_HEAD.size
+    spawned, offset = unpack_records(SPAWNED, data, offset, spawned_count)
+    moved, offset = unpack_records(UNIT, data, offset, moved_count)
+    removed, offset = unpack_records(REMOVED, data, offset, removed_count)
+    frame = {
+        'type': 'delta',
+        'base': base,
+        'sequence': sequence,
+        'spawned': [{'id': i, 'kind': KINDS[kind], 'position': (x, y)} for i, kind, x, y in spawned],
+        'moved': [{'id': i, 'position': (x, y)} for i, x, y in moved],
+        'removed': [unit_id for unit_id, in removed],
+    }
+    if flags & HAS_STATUS:
+        frame['status'] = status
+    return frame
+
+def accepts_binary(request):
+    # 클라이언트가 Accept 헤더에 바이너리 형식을 명시했을 때만 (*/*는 JSON 그대로)
+    return CONTENT_TYPE in request.headers.get('Accept', '')
@@ -0,0 +1,314 @@
+import math
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+
+from profiling import PROFILER
+from .delta import DeltaTracker
+from .leaderboard import record_game
+from .persistence import WriteBehindBuffer
+from .status_cache import invalidate_status, publish_status
+from shooting_game import (
+    Bottom, Bullet, BulletCollisionHandler, Enemy, EnemyCollisionHandler,
+    EnemyObjectCreater, EnemySpawner, GameUpdater, GunObjectCreater, LeftWalls, PlayerStatus,
+    RightWalls, make_position_updater,
+)
+
+# Django 앱이 프로세스 안에 들고 있는 게임 월드
+# 뷰는 ORM 대신 이 객체를 읽고 바꾸고, DB에는 오래 남겨야 하는 상태만 씀
+
+FRAME_WIDTH = 600
+FRAME_HEIGHT = 800
+TICK_RATE = 10
+# advance 한 번에 몰아서 돌리는 밀린 틱 수 상한
+MAX_CATCH_UP = 5
+# 이 틱 수보다 오래된 프레임을 보고 낸 명령은 적용하지 않음 (재접속한 클라이언트가 옛 입력을 한꺼번에 보내는 경우)
+COMMAND_MAX_LAG = 50
+# 명령 ack를 기억하는 클라이언트(탭) 수
+COMMAND_CLIENTS = 64
+
+def describe_collision(unit1, unit2):
+    # 응답에 실을 충돌 기록 (기존 GameUpdateView의 collisions 형식)
+    if isinstance(unit1, Bullet) and isinstance(unit2, Enemy):
+        return {'type': 'bullet_enemy', 'bullet_id': unit1.id, 'enemy_id': unit2.id}
+    if isinstance(unit1, Bullet) and isinstance(unit2, LeftWalls):
+        return {'type': 'bullet_wall', 'bullet_id': unit1.id, 'wall': 'left'}
+    if isinstance(unit1, Bullet) and isinstance(unit2, RightWalls):
+        return {'type': 'bullet_wall', 'bullet_id': unit1.id, 'wall': 'right'}
+    if isinstance(unit1, Enemy) and isinstance(unit2, Bottom):
+        return {'type': 'enemy_bottom', 'enemy_id': unit1.id}
+    return None
+
+class RecordingCollisionMixin:
+    # 충돌 반응을 실행한 뒤 월드의 충돌 기록에 남기는 핸들러 믹스인
+    def __init__(self, player_status, collisions):
+        super().__init__(player_status)
+        self.collisions = collisions
+
+    def collide_occur(self, unit1, unit2=None):
+        super().collide_occur(unit1, unit2)
+        collision = describe_collision(unit1, unit2)
+        if collision is not None:
+            self.collisions.append(collision)
+
+class RecordingBulletHandler(RecordingCollisionMixin, BulletCollisionHandler):
+    pass
+
+class RecordingEnemyHandler(RecordingCollisionMixin, EnemyCollisionHandler):
+    pass
+
+def point(unit):
+    return round(unit.point_x), round(unit.point_y)
+
+def valid_angle(angle):
+    # 발사 각도는 유한한 int/float만 (bool, 문자열, NaN, Infinity는 안 됨)
+    return type(angle) in (int, float) and math.isfinite(angle)
+
+class GameWorld:
+    # shooting_game 클래스들로 구성한 한 판의 게임. 여러 요청 스레드가 lock으로 나눠 씀
+    def __init__(self, width=FRAME_WIDTH, height=FRAME_HEIGHT, broadphase="brute", persistence=None,
+                 on_status_change=None, on_game_over=None, tick_rate=TICK_RATE):
+        self.lock = threading.Lock()
+        self.width = width
+        self.height = height
+        self.sequence = 0
+        # 서버 틱 스케줄러로 진행할 때의 초당 틱 수
+        self.tick_interval = 1.0 / tick_rate
+        self.next_tick_at = None
+        # 명령 묶음을 보낸 클라이언트 id -> 처리한 가장 큰 seq
+        self.command_acks = {}
+        self.next_id = 1
+        self.collisions = []
+
+        self.player_status = PlayerStatus()
+        self.gun = GunObjectCreater(Bottom(width, height)).create_object(
+            None, RecordingBulletHandler(self.player_status, self.collisions))
+        self.enemy_creator = EnemyObjectCreater(None, RecordingEnemyHandler(self.player_status, self.collisions))
+        # Enemy는 클라이언트의 spawn 요청으로 만들어지므로 스포너 스레드는 돌리지 않음
+        self.enemy_spawner = EnemySpawner(self.enemy_creator)
+        self.position_updater = make_position_updater(broadphase)
+        self.game_updater = GameUpdater(self.position_updater, self.gun, self.enemy_spawner,
+                                        self.player_status, width, height)
+        # persistence(WriteBehindBuffer)가 있으면 틱마다 변경을 모아 두고 interval마다 DB에 기록
+        self.persistence = persistence
+        self.delta_tracker = DeltaTracker()
+        # 점수/생명/게임 오버가 바뀔 때마다 새 상태로 호출 (상태 캐시 갱신)
+        self.on_status_change = on_status_change
+        self.published_status = None
+        # 게임이 끝나는 틱에 한 번 (PlayerStatus, 틱 수)로 호출 (순위표 기록)
+        self.on_game_over = on_game_over
+
+    def assign_id(self, unit):
+        unit.id = self.next_id
+        self.next_id += 1
+        return unit
+
+    def fire(self, angle):
+        with self.lock:
+            bullet = self.run_command({'type': 'fire', 'angle': angle})
+            self.record()
+            return bullet
+
+    def spawn_enemy(self):
+        with self.lock:
+            enemy = self.run_command({'type': 'spawn'})
+            self.record()
+            return enemy
+
+    def run_command(self, command):
+        # fire/spawn 명령 하나를 실행하고 만든 객체 반환. lock을 잡은 채로 부름
+        if command['type'] == 'fire':
+            # 각도는 틱마다 math.radians에 들어가므로, 숫자가 아닌 값이 들어가면 이후 모든 틱이 실패함
+            if not valid_angle(command['angle']):
+                raise ValueError(f"잘못된 angle: {command['angle']!r}")
+            return self.assign_id(self.gun.fire(command['angle']))
+        enemy = self.assign_id(self.enemy_creator.create_object())
+        self.enemy_spawner.enemies.append(enemy)
+        return enemy
+
+    def apply_commands(self, client, commands):
+        # 클라이언트가 모아 보낸 명령들을 seq 순서로 한 번에 적용하고, 처리한 가장 큰 seq를 ack로 돌려줌
+        # 이미 처리한 seq(재전송)는 건너뛰고, COMMAND_MAX_LAG 틱보다 오래된 프레임을 보고 낸 명령은 ack만 하고 버림
+        # 기록(write-behind)은 명령마다가 아니라 묶음 끝에 한 번
+        with self.lock:
+            ack = self.command_acks.pop(client, 0)
+            results = []
+            for command in sorted(commands, key=lambda command: command['seq']):
+                if command['seq'] <= ack:
+                    continue
+                ack = command['seq']
+                tick = command.get('tick')
+                if tick is not None and self.sequence - tick > COMMAND_MAX_LAG:
+                    results.append({'seq': ack, 'dropped': True})
+                    continue
+                unit = self.run_command(command)
+                results.append({'seq': ack, 'id': unit.id, 'position': point(unit)})
+
+            # 최근에 명령을 보낸 클라이언트의 ack만 남김 (dict 순서 = 최근 사용 순서)
+            self.command_acks[client] = ack
+            if len(self.command_acks) > COMMAND_CLIENTS:
+                del self.command_acks[next(iter(self.command_acks))]
+            if results:
+                self.record()
+            return {'success': True, 'ack': ack, 'tick': self.sequence, 'results': results}
+
+    def record(self):
+        # 바뀐 상태를 write-behind 버퍼에 넘기고, 때가 되면 기록
+        if self.persistence is None:
+            return
+        units = self.gun.get_bullets() + self.enemy_spawner.get_enemies()
+        self.persistence.record(units, (self.player_status.get_score(), self.player_status.get_life()))
+        self.persistence.maybe_flush()
+
+    def restore(self):
+        # 마지막으로 기록된 엔티티와 점수/생명으로 월드를 다시 채움
+        bullets, enemies, status = self.persistence.load()
+        with self.lock:
+            for row in bullets:
+                bullet = Bullet(row.angle, row.point_x, row.point_y, self.gun.coll_handler)
+                bullet.id = row.id
+                self.gun.bullets.append(bullet)
+            for row in enemies:
+                enemy = Enemy(0, row.point_x, row.point_y, self.enemy_creator.coll_handler)
+                enemy.id = row.id
+                self.enemy_spawner.enemies.append(enemy)
+            if status is not None:
+                self.player_status.score, self.player_status.life = status
+            self.next_id = max([row.id for row in bullets + enemies], default=0) + 1
+            self.record()
+            self.publish_status()
+
+    def is_game_over(self):
+        return self.game_updater.check_game_over()
+
+    def tick(self, ack=None):
+        # 한 틱 진행 후 응답용 프레임 반환 (서버 틱 스케줄러 없이 클라이언트 요청으로 진행할 때)
+        # ack: 클라이언트가 마지막으로 받은 sequence. 있으면 그 이후의 변경만 delta로 보냄
+        with self.lock:
+            del self.collisions[:]
+            self.step()
+            return self.frame(ack)
+
+    def advance(self, now=None):
+        # 서버 틱 스케줄러가 부름: 지난번 이후 tick_rate에 맞춰 밀린 틱만큼 진행하고 진행한 틱 수 반환
+        # 몇 번을 불러도(웹 프로세스가 여럿이어도) 월드는 tick_rate보다 빨리 가지 않음
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            # 한참 멈춰 있었으면(보는 클라이언트가 없었으면) 밀린 틱을 몰아서 돌리지 않고 지금부터 다시 셈
+            if self.next_tick_at is None or now - self.next_tick_at > MAX_CATCH_UP * self.tick_interval:
+                self.next_tick_at = now
+            steps = 0
+            if now >= self.next_tick_at:
+                del self.collisions[:]
+            while now >= self.next_tick_at:
+                self.step()
+                self.next_tick_at += self.tick_interval
+                steps += 1
+            return steps
+
+    def read_frame(self, ack=None):
+        # 진행하지 않고 마지막으로 계산된 프레임만 읽음
+        with self.lock:
+            return self.frame(ack)
+
+    def step(self):
+        # 한 틱 진행 (게임이 끝났으면 더 진행하지 않음). lock을 잡은 채로 부름
+        if self.is_game_over():
+            return
+        self.game_updater.update()
+        self.sequence += 1
+        with PROFILER.phase("persistence"):
+            self.record()
+        with PROFILER.phase("delta"):
+            self.delta_tracker.record(self.sequence, self.positions(), self.publish_status())
+        if self.is_game_over() and self.on_game_over is not None:
+            self.on_game_over(self.player_status, self.sequence)
+
+    def status(self):
+        return {
+            'score': self.player_status.get_score(),
+            'life': self.player_status.get_life(),
+            'game_over': self.is_game_over()
+        }
+
+    def publish_status(self):
+        # 상태가 직전에 알린 값과 다를 때만 on_status_change에 알림
+        status = self.status()
+        if status != self.published_status:
+            self.published_status = status
+            if self.on_status_change is not None:
+                self.on_status_change(status)
+        return status
+
+    def positions(self):
+        positions = {b.id: ('bullet', point(b)) for b in self.gun.get_bullets()}
+        positions.update((e.id, ('enemy', point(e))) for e in self.enemy_spawner.get_enemies())
+        return positions
+
+    def frame(self, ack=None):
+        if not self.delta_tracker.needs_keyframe(self.sequence, ack):
+            return {
+                'success': True,
+                **self.delta_tracker.delta(self.sequence, ack),
+                'collisions': list(self.collisions)
+            }
+        return {
+            'success': True,
+            'type': 'keyframe',
+            'sequence': self.sequence,
+            'bullets': [{'id': b.id, 'position': point(b)} for b in self.gun.get_bullets()],
+            'enemies': [{'id': e.id, 'position': point(e)} for e in self.enemy_spawner.get_enemies()],
+            'gun': {'position': point(self.gun)},
+            'collisions': list(self.collisions),
+            **self.status()
+        }
+
+DEFAULT_SESSION = 'default'
+
+_worlds = {}
+_last_used = {}
+_worlds_lock = threading.Lock()
+
+def evict_idle_worlds(now):
+    # SHOOT_SESSION_IDLE(초) 동안 요청이 없던 세션의 월드를 버림 (기본 세션은 남김)
+    idle = getattr(settings, 'SHOOT_SESSION_IDLE', 600)
+    for session_id, last_used in list(_last_used.items()):
+        if session_id != DEFAULT_SESSION and now - last_used > idle:
+            _worlds.pop(session_id, None)
+            del _last_used[session_id]
+            # drop_world와 같이: 다시 만든 세션이 버린 월드의 캐시된 상태를 읽지 않도록
+            invalidate_status(session_id)
+
+def get_world(session_id=DEFAULT_SESSION):
+    # 이 프로세스가 맡은 세션의 게임 월드 (처음 요청 때 생성)
+    # SHOOT_PERSIST_INTERVAL(초)을 설정하면 write-behind로 DB에 기록하고, 시작할 때 DB에서 복구
+    # DB 테이블에는 세션 구분이 없으므로 기록은 기본 세션(예전의 전역 게임)에만 붙임
+    now = time.monotonic()
+    world = _worlds.get(session_id)
+    if world is None:
+        with _worlds_lock:
+            world = _worlds.get(session_id)
+            if world is None:
+                # 새 세션이 생길 때만 오래된 세션을 정리
+                evict_idle_worlds(now)
+                interval = getattr(settings, 'SHOOT_PERSIST_INTERVAL', None)
+                persistence = None
+                if interval is not None and session_id == DEFAULT_SESSION:
+                    persistence = WriteBehindBuffer(interval)
+                world = GameWorld(broadphase=getattr(settings, 'SHOOT_BROADPHASE', 'brute'), persistence=persistence,
+                                  tick_rate=getattr(settings, 'SHOOT_TICK_RATE', TICK_RATE),
+                                  on_status_change=partial(publish_status, session_id),
+                                  on_game_over=partial(record_game, session_id))
+                if persistence is not None:
+                    world.restore()
+                _worlds[session_id] = world
+    _last_used[session_id] = now
+    return world
+
+def drop_world(session_id):
+    with _worlds_lock:
+        _last_used.pop(session_id, None)
+        invalidate_status(session_id)
+        return _worlds.pop(session_id, None) is not None
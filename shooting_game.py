@@ -1,15 +1,47 @@
+import contextvars
 import math
 from abc import * 
-from multipledispatch import dispatch
+from collections import deque
+from contextlib import contextmanager
+import queue
 import random
 import time
 import threading
+from broadphase import make_broadphase
+from collision_events import CollisionEvents
+from profiling import PROFILER
+from timer_wheel import TimerWheel
+
+# False면 게임 진행 메시지를 출력하지 않음 (프로세스 전체: 벤치마크 명령 등)
+VERBOSE = True
+# 지금 컨텍스트(스레드, asyncio task)에서만 출력을 끔. 헤드리스 실행처럼 같은 프로세스의 다른 게임에 영향을 주면 안 될 때
+QUIET = contextvars.ContextVar("quiet", default=False)
+
+def log(message):
+    if VERBOSE and not QUIET.get():
+        print(message)
+
+@contextmanager
+def quiet():
+    token = QUIET.set(True)
+    try:
+        yield
+    finally:
+        QUIET.reset(token)
+
+try:
+    from entity_store import EntityStore
+except ImportError:
+    # numpy가 없으면 배열 저장소 없이 객체 리스트로만 동작
+    EntityStore = None
 
 class GameObject:
-    pass
+    __slots__ = ()
 
 class Visible(GameObject, ABC):
     # 화면에 보이는 객체-> 위치(좌표)와 크기를 갖고 있음
+    # Bullet, Enemy까지는 __slots__로 속성을 고정해 객체마다 __dict__를 만들지 않음 (Gun, 화면 등은 그대로 __dict__)
+    __slots__ = ("point_x", "point_y")
     size = 0
     
     def __init__(self, point_x, point_y, size):
@@ -24,6 +56,7 @@ class Visible(GameObject, ABC):
 
 class Movable(Visible, ABC):
     # 화면에 보이는 객체 중 움직이는 객체-> 속도(속력+방향) 갖고 있음
+    __slots__ = ("angle",)
     size = 0
     speed = 0
 
@@ -40,6 +73,8 @@ class Movable(Visible, ABC):
 
 class Collidable(Movable, ABC):
     # 충돌시 이벤트가 발생하는 객체-> 누구랑 충돌했는지 확인해야 함
+    # id는 웹 월드처럼 객체를 구분해야 하는 쪽에서 붙임
+    __slots__ = ("coll_handler", "alive", "id")
     speed = 20
     size = 20
 
@@ -49,13 +84,59 @@ class Collidable(Movable, ABC):
         self.point_x = point_x
         self.point_y = point_y
         self.coll_handler = coll_handler 
+        self.alive = True
 
     # 충돌을 확인하는 함수. 인자로 객체를 받고, 충돌했다면 자신과 그 객체를 반환
     def is_collide_at(self, object):
         pass
 
+    # 틱당 이동량 (dx, dy) 반환: 배열 저장소가 이동을 한 번에 계산할 때 쓰임
+    def velocity(self):
+        return 0, 0
+
+    # 이번 틱에 지나온 영역(틱 시작 영역 + 끝 영역): broadphase가 빠른 객체의 후보 쌍을 놓치지 않도록
+    def get_swept_position(self):
+        x1, y1, x2, y2 = self.get_position()
+        dx, dy = self.velocity()
+        return min(x1, x1 - dx), min(y1, y1 - dy), max(x2, x2 - dx), max(y2, y2 - dy)
+
+    # 이번 틱 동안 object와 처음 닿은 시각(틱 시작 0 ~ 끝 1)을 반환, 닿지 않았으면 None
+    # 틱 끝 영역만 보면 한 틱에 크기보다 많이 움직이는 객체가 벽/적을 뚫고 지나가므로
+    # 두 객체가 이번 틱에 velocity()만큼 움직였다고 보고 상대 운동으로 계산 (swept AABB)
+    def sweep(self, object):
+        x1, y1, x2, y2 = self.get_position()
+        dx, dy = self.velocity()
+        a1, b1, a2, b2 = object.get_position()
+        other_dx, other_dy = object.velocity() if isinstance(object, Collidable) else (0, 0)
+
+        # 두 영역을 틱 시작 위치로 되돌리고, object를 멈춰 있다고 본 상대 이동량
+        axes = (
+            (x1 - dx, x2 - dx, a1 - other_dx, a2 - other_dx, dx - other_dx),
+            (y1 - dy, y2 - dy, b1 - other_dy, b2 - other_dy, dy - other_dy),
+        )
+        enter, leave = 0.0, 1.0
+        for low, high, other_low, other_high, move in axes:
+            if move == 0:
+                if high < other_low or other_high < low:
+                    return None
+                continue
+            # 이 축에서 겹치기 시작하는 시각과 끝나는 시각
+            start, end = (other_low - high) / move, (other_high - low) / move
+            if start > end:
+                start, end = end, start
+            enter = max(enter, start)
+            leave = min(leave, end)
+            if enter > leave:
+                return None
+        return enter
+
+    # 충돌로 사라지는 객체 표시: 다음에 목록을 꺼낼 때 빠짐
+    def delete(self):
+        self.alive = False
+
 class Bullet(Collidable):
     # fire할 때 생성되고 enemy, 벽이랑 충돌 체크해야 하는 Collidable 객체
+    __slots__ = ()
     speed = 50
     size = 20
 
@@ -64,41 +145,112 @@ class Bullet(Collidable):
         self.point_x = point_x
         self.point_y = point_y
         self.coll_handler = coll_handler
+        self.alive = True
 
     def update_position(self):
         self.point_x += self.speed * math.sin(math.radians(self.angle))
         self.point_y -= self.speed * math.cos(math.radians(self.angle))
+
+    def velocity(self):
+        return self.speed * math.sin(math.radians(self.angle)), -self.speed * math.cos(math.radians(self.angle))
     
     # 반사되어 튕기는 기능
-    def reflex(self):
+    # wall을 넘기면 틱 끝 위치를 벽 기준으로 접어서, 벽에 닿은 뒤 남은 이동을 반사된 방향으로 마저 간 위치로 옮김
+    def reflex(self, wall=None):
+        if wall is not None:
+            wall_x = wall.get_position()[0]
+            dx = self.velocity()[0]
+            start_center = self.point_x - dx + self.size / 2
+            if (wall_x - start_center) * dx <= 0:
+                # 벽에서 멀어지는 중(이미 반사됨)이면 다시 튕기지 않음
+                return
+            if dx < 0 and self.point_x < wall_x:
+                self.point_x = 2 * wall_x - self.point_x
+            elif dx > 0 and self.point_x + self.size > wall_x:
+                self.point_x = 2 * wall_x - self.point_x - 2 * self.size
         self.angle = -self.angle
     
     def get_position(self):
         return self.point_x, self.point_y, self.point_x + self.size, self.point_y + self.size
 
     # object와 충돌했냐고 물어보면, 충돌했다고 알리며 자신과 충돌한 객체를 반환
+    # 틱 끝 위치가 아니라 이번 틱에 지나온 경로 전체로 확인
     def is_collide_at(self, object):
-        x1, y1, x2, y2 = self.get_position()
-        a1, b1, a2, b2 = object.get_position()
-        
-        if x2 >= a1 and y2 >= b1 and a2 >= x1 and b2 >= y1:
+        if self.sweep(object) is not None:
             # 충돌 관리자에게 알림
             self.coll_handler.collide_occur(self, object)
-            print("bullet 충돌")
+            log("bullet 충돌")
+
+class EntityPool:
+    # 사라진 Bullet/Enemy 객체를 버리지 않고 모아 두었다가 다음 생성 때 __init__만 다시 불러 재사용
+    # 계속 쏘는 동안 객체 할당/해제(GC 대상)가 생기지 않음. capacity개까지만 보관
+    def __init__(self, cls, capacity=64):
+        self.cls = cls
+        self.capacity = capacity
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.__init__(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        # 목록에서 빠진 객체만 넘겨야 함 (아직 누가 들고 있으면 다음 acquire 때 값이 바뀜)
+        if len(self.free) < self.capacity:
+            self.free.append(obj)
+
+def prune(objects, pool):
+    # 살아 있는 객체만 남기고 죽은 객체는 pool로 돌려보냄
+    alive = []
+    for obj in objects:
+        if obj.alive:
+            alive.append(obj)
+        else:
+            pool.release(obj)
+    return alive
+
+# 속력(틱당 이동량)은 클래스 속성이라, 게임마다 속력을 바꿀 때는 클래스를 고치지 않고 그 속력의 하위 클래스를 씀
+# (같은 프로세스의 다른 게임에는 영향 없음). 같은 (클래스, 속력)은 한 번만 만들어 재사용
+ENTITY_TYPES = {}
+
+def entity_type(cls, speed=None):
+    if speed is None or speed == cls.speed:
+        return cls
+    subclass = ENTITY_TYPES.get((cls, speed))
+    if subclass is None:
+        subclass = ENTITY_TYPES[cls, speed] = type(cls.__name__, (cls,), {
+            "__slots__": (), "__module__": cls.__module__, "speed": speed})
+    return subclass
 
 class Gun(Visible):
     # 총알을 발사하는 총 객체-> 내부에 총알을 가지고 있음
     max_bullet = 3
     size = 100
 
-    def __init__(self, point_x, point_y):
+    def __init__(self, point_x, point_y, store=None, coll_handler=None, pool=None, bullet_type=Bullet):
         # 현재 좌표(점) 초기화
         self.point_x = point_x
         self.point_y = point_y
         self.bullets = []
+        # store가 있으면 Bullet 상태는 배열 저장소에 둠 (저장소가 slot을 재사용하므로 pool은 안 씀)
+        self.store = store
+        # 모든 Bullet이 같은 충돌 관리자(같은 PlayerStatus)를 씀: 발사마다 새로 만들지 않음
+        self.coll_handler = coll_handler or BulletCollisionHandler()
+        # 만들 Bullet 클래스 (게임마다 속력이 다르면 entity_type으로 만든 하위 클래스)
+        self.bullet_type = bullet_type
+        self.pool = pool if pool is not None else EntityPool(bullet_type)
 
     def get_bullets(self):
-        # 생성된 Bullet들을 리스트로 반환
+        # 생성된 Bullet들 중 살아 있는 것만 리스트로 반환
+        if self.store is not None:
+            return self.store.view()
+        self.bullets = prune(self.bullets, self.pool)
         return self.bullets
     
     def get_position(self):
@@ -106,13 +258,30 @@ class Gun(Visible):
         return self.point_x, self.point_y, self.point_x + self.size, self.point_y + self.size
     
     def fire(self, angle):
-        if len(self.bullets) >= self.max_bullet:
-            self.bullets.pop(0)
-        self.bullets.append(Bullet(angle, self.get_position()[0], self.get_position()[1], BulletCollisionHandler()))
-        print(f"Bullet {angle}도로 발사됨")
+        if self.store is not None:
+            if len(self.store) >= self.max_bullet:
+                self.store.oldest().delete()
+        else:
+            self.get_bullets()
+            if len(self.bullets) >= self.max_bullet:
+                oldest = self.bullets.pop(0)
+                oldest.delete()
+                self.pool.release(oldest)
+        bullet = self.add_bullet(angle, self.point_x, self.point_y)
+        log(f"Bullet {angle}도로 발사됨")
+        return bullet
+
+    def add_bullet(self, angle, point_x, point_y):
+        # 지정한 위치에 Bullet을 하나 둠 (발사, 리플레이 keyframe 복원)
+        if self.store is not None:
+            return self.store.spawn(self.bullet_type, angle, point_x, point_y, self.coll_handler)
+        bullet = self.pool.acquire(angle, point_x, point_y, self.coll_handler)
+        self.bullets.append(bullet)
+        return bullet
 
 class Enemy(Collidable):
     # start할 때 생성되고 바닥이랑 충돌 체크해야 하는 Collidable 객체
+    __slots__ = ()
     size = 100
     
     def __init__(self, angle, point_x, point_y, coll_handler):
@@ -120,20 +289,21 @@ class Enemy(Collidable):
         self.point_x = point_x
         self.point_y = point_y
         self.coll_handler = coll_handler
+        self.alive = True
     
     def update_position(self):
         self.point_y += self.speed
+
+    def velocity(self):
+        return 0, self.speed
     
     def get_position(self):
         return self.point_x, self.point_y, self.point_x + self.size, self.point_y + self.size
 
     def is_collide_at(self, object):
-        x1, y1, x2, y2 = self.get_position()
-        a1, b1, a2, b2 = object.get_position()
-        
-        if x2 >= a1 and y2 >= b1 and a2 >= x1 and b2 >= y1:
-            self.coll_handler.collide_occur(self)
-            print("enemy 충돌")
+        if self.sweep(object) is not None:
+            self.coll_handler.collide_occur(self, object)
+            log("enemy 충돌")
 
 class GameFrame(Visible, ABC):
     # GameObject들이 등장하는 게임 화면 크기를 정의한 객체
@@ -151,9 +321,9 @@ class GameFrame(Visible, ABC):
         pass
 
 class Bottom(GameFrame):
-    @classmethod
+    # 화면 좌표는 y가 아래로 커지므로 바닥은 y=height인 선
     def get_position(self):
-        return 0, 0, self.width, 0
+        return 0, self.height, self.width, self.height
     
 class LeftWalls(GameFrame):
     def get_position(self):
@@ -173,12 +343,12 @@ class PlayerStatus(GameObject):
     def update_score(self):
         # 플레이어 점수를 1씩 업데이트
         self.score += 1
-        print(f"현재 점수: {self.score}")
+        log(f"현재 점수: {self.score}")
     
     def lose_life(self):
         # 플레이어 생명을 1씩 깎음
         self.life -= 1
-        print(f"남은 생명: {self.life}")
+        log(f"남은 생명: {self.life}")
         
     def get_life(self):
         # 게임 종료 조건 판단에 사용
@@ -198,38 +368,100 @@ class EnemyObjectCreater(VisibleObjectCreater):
     # Visible한 Enemy 객체를 생성하는 추상 팩토리
     SPAWN_POS = [50, 150, 250, 350, 450]
 
+    def __init__(self, store=None, coll_handler=None, rng=random, pool=None, enemy_type=Enemy):
+        # store가 있으면 Enemy 상태는 배열 저장소에 둠
+        self.store = store
+        # 모든 Enemy가 같은 충돌 관리자를 씀
+        self.coll_handler = coll_handler or EnemyCollisionHandler()
+        # 생성 위치를 고르는 난수 생성기 (시드를 고정하면 같은 게임을 재현할 수 있음)
+        self.rng = rng
+        # 만들 Enemy 클래스 (게임마다 속력이 다르면 entity_type으로 만든 하위 클래스)
+        self.enemy_type = enemy_type
+        # 사라진 Enemy는 EnemySpawner가 이 pool로 돌려보냄
+        self.pool = pool if pool is not None else EntityPool(enemy_type)
+
     def create_object(self):
-        return Enemy(0, random.choice(self.SPAWN_POS), 0, EnemyCollisionHandler())
+        return self.create_at(self.rng.choice(self.SPAWN_POS), 0)
+
+    def create_at(self, point_x, point_y):
+        # 지정한 위치에 Enemy 생성 (리플레이는 기록된 위치로 생성)
+        if self.store is not None:
+            return self.store.spawn(self.enemy_type, 0, point_x, point_y, self.coll_handler)
+        return self.pool.acquire(0, point_x, point_y, self.coll_handler)
 
 class GunObjectCreater(VisibleObjectCreater):
     # Visible한 Gun 객체를 생성하는 팩토리
-    def create_object(self):
-        return Gun(Bottom.get_position()[2]//2, 0)
+    def __init__(self, bottom=None):
+        # 총은 바닥 가운데에 놓임
+        self.bottom = bottom or Bottom(800, 600)
+
+    def create_object(self, bullet_store=None, coll_handler=None, bullet_type=Bullet):
+        x1, y1, x2, y2 = self.bottom.get_position()
+        return Gun(x2//2 - Gun.size//2, y2 - Gun.size, bullet_store, coll_handler, bullet_type=bullet_type)
+
+def swept_position(obj):
+    # broadphase 영역 함수: Collidable은 이번 틱에 지나온 영역으로 후보를 고름 (sweep 충돌 검사와 맞춤)
+    return obj.get_swept_position()
 
 class PositionUpdater:
     # Movable 타입 객체 위치를 틱당 업데이트하는 객체
+
+    def __init__(self, broadphase=None):
+        # 충돌 후보 쌍을 고르는 broadphase (기본값은 모든 쌍을 보는 brute force)
+        self.broadphase = broadphase or make_broadphase("brute", bounds=swept_position)
     
-    # bullet, enemy 리스트를 받아서 위치 업데이트하는 함수
-    @dispatch(list)
+    # bullet, enemy 리스트(또는 객체 하나)를 받아서 위치 업데이트하는 함수
+    # 인자 타입은 호출마다 한 번만 확인하고, 객체 단위 루프 안에서는 분기하지 않음
     def update_object_position(self, objects):
+        if not isinstance(objects, list):
+            objects.update_position()
+            return
+        # 배열 저장소의 뷰라면 객체마다 돌지 않고 한 번에 이동
+        store = getattr(objects, "store", None)
+        if store is not None:
+            store.step()
+            return
         for obj in objects:
             obj.update_position()
-
-    @dispatch(GameObject)
-    def update_object_position(self, obj):
-        obj.update_position()
     
-    # 바뀐 위치에 대해 충돌이 일어났는지 확인하는 함수: 분리 필요
-    @dispatch(list, list)
+    # 바뀐 위치에 대해 충돌이 일어났는지 확인하는 함수
+    # collided_objects는 리스트(Enemy 목록) 또는 Visible 하나(벽, 바닥)
     def update_object_collision(self, moving_objects, collided_objects):
-        for moved in moving_objects:
-            for attacked in collided_objects:
-                moved.is_collide_at(attacked)
+        if not isinstance(collided_objects, list):
+            with PROFILER.phase("narrowphase"):
+                for moved in moving_objects:
+                    if moved.alive:
+                        moved.is_collide_at(collided_objects)
+            return
+        with PROFILER.phase("broadphase"):
+            pairs = self.broadphase.pairs(moving_objects, collided_objects)
+        # broadphase가 골라낸 가까운 쌍만 is_collide_at으로 확인
+        with PROFILER.phase("narrowphase"):
+            for moved, attacked in pairs:
+                # 이번 틱에 이미 사라진 객체는 다시 충돌하지 않음
+                if moved.alive and attacked.alive:
+                    moved.is_collide_at(attacked)
+
+    # 틱 하나의 충돌 확인: channels는 (움직이는 객체 리스트, 부딪힐 대상) 목록이고 이 순서대로 확인
+    def update_collisions(self, channels):
+        for moving_objects, collided_objects in channels:
+            self.update_object_collision(moving_objects, collided_objects)
+
+class EventPositionUpdater(PositionUpdater):
+    # 틱마다 모든 쌍을 확인하지 않고, 궤적으로 미리 계산한 충돌 틱에만 확인 (collision_events 참고)
+    # 확인은 같은 is_collide_at(sweep)이라 결과는 틱마다 모든 쌍을 보는 방식과 같음
+    def __init__(self):
+        super().__init__()
+        self.events = CollisionEvents()
 
-    @dispatch(list, Visible)  
-    def update_object_collision(self, objects, visible):
-        for object in objects:
-            object.is_collide_at(visible)
+    def update_collisions(self, channels):
+        self.events.update(channels)
+
+def make_position_updater(broadphase="brute"):
+    # "event"면 충돌 예측 방식, 나머지는 그 이름의 broadphase로 틱마다 확인
+    if broadphase == "event":
+        return EventPositionUpdater()
+    return PositionUpdater(make_broadphase(broadphase, bounds=swept_position))
 
 class PlayerInputHandler(ABC):
     # 콘솔로 받은 input이 의미하는 구체적인 동작을 실행하게 하는 추상 클래스
@@ -248,74 +480,227 @@ class FireHandler(PlayerInputHandler):
 
 class GameOverHandler(PlayerInputHandler):
     def handle_input(self, controller, *args):
-        print("Game Over")
+        log("Game Over")
         controller.stop()
 
+class CollisionResponses:
+    # (충돌한 객체 타입, 부딪힌 객체 타입) 쌍별 충돌 반응 표
+    # 등록할 때 타입 쌍을 키로 넣어두고, 충돌마다 dict 한 번 조회로 반응 함수를 찾음
+    def __init__(self):
+        self.registered = {}
+        self.table = {}
+
+    def register(self, first, second):
+        def decorator(response):
+            self.registered[(first, second)] = response
+            # 하위 타입용으로 풀어둔 항목은 새 등록을 반영해 다시 계산
+            self.table = dict(self.registered)
+            return response
+        return decorator
+
+    def resolve(self, first, second):
+        # 등록되지 않은 하위 타입 쌍(LeftWalls, 배열 저장소의 Bullet 등)은 MRO를 따라 한 번만 찾음
+        for first_base in first.__mro__:
+            for second_base in second.__mro__:
+                response = self.registered.get((first_base, second_base))
+                if response is not None:
+                    return response
+        return None
+
+    def lookup(self, first, second):
+        try:
+            return self.table[first, second]
+        except KeyError:
+            response = self.table[first, second] = self.resolve(first, second)
+            return response
+
+COLLISION_RESPONSES = CollisionResponses()
+
+@COLLISION_RESPONSES.register(Bullet, Enemy)
+def bullet_hits_enemy(handler, bullet, enemy):
+    bullet.delete()
+    enemy.delete()
+    handler.player_status.update_score()
+    log("score를 얻음!")
+
+@COLLISION_RESPONSES.register(Bullet, GameFrame)
+def bullet_hits_wall(handler, bullet, wall):
+    bullet.reflex(wall)
+    log("bullet 반사됨")
+
+@COLLISION_RESPONSES.register(Enemy, Bottom)
+def enemy_hits_bottom(handler, enemy, bottom):
+    enemy.delete()
+    handler.player_status.lose_life()
+    log("life 깎임")
+
 class CollisionHandler(ABC):
     # 충돌 처리를 관리하는 객체 
     # 충돌 타입에 따라 PlayerStatus에게 요청
-    def __init__(self):
-        self.player_status = PlayerStatus()
+    def __init__(self, player_status=None):
+        # player_status를 넘기면 여러 충돌 관리자가 한 플레이어 상태를 공유
+        self.player_status = player_status or PlayerStatus()
 
-    @abstractmethod
     def collide_occur(self, unit1, unit2=None):
-        pass
+        # 타입 쌍에 등록된 반응을 실행 (등록되지 않은 쌍은 무시)
+        response = COLLISION_RESPONSES.lookup(type(unit1), type(unit2))
+        if response is not None:
+            with PROFILER.phase("response"):
+                response(self, unit1, unit2)
     
 class BulletCollisionHandler(CollisionHandler):
-    # 총알 객체의 충돌 처리
-    # 분기 오버로딩 처리
+    # 총알 객체의 충돌 처리: (Bullet, Enemy), (Bullet, GameFrame)
+    pass
 
-    @dispatch(Bullet, Enemy)
-    def collide_occur(self, bullet, enemy):
-        bullet.delete()
-        enemy.delete()
-        self.player_status.update_score()
-        print("score를 얻음!")
+class EnemyCollisionHandler(CollisionHandler):
+    # 적 객체의 충돌 처리: (Enemy, Bottom)
+    pass
 
-    @dispatch(Bullet, GameFrame)
-    def collide_occur(self, bullet):
-        bullet.reflex()
-        print("bullet 반사됨")
+# 콘솔 input을 별도 스레드에서 읽어 큐에 넣는 클래스: 게임 루프는 입력을 기다리지 않음
+class ConsoleInputReader:
+    def __init__(self, prompt="> "):
+        self.prompt = prompt
+        self.inputs = queue.Queue()
 
-class EnemyCollisionHandler(CollisionHandler):
-    def collide_occur(self, enemy):
-        enemy.delete()
-        self.player_status.lose_life()
-        print("life 깎임")
+    def start(self):
+        threading.Thread(target=self.read_forever, daemon=True).start()
+
+    def read_forever(self):
+        while True:
+            try:
+                self.inputs.put(input(self.prompt))
+            except EOFError:
+                return
+
+    def drain(self):
+        # 지금까지 쌓인 입력을 모두 꺼냄 (없으면 빈 리스트)
+        drained = []
+        while True:
+            try:
+                drained.append(self.inputs.get_nowait())
+            except queue.Empty:
+                return drained
+
+# 틱 간격을 모아 실제 틱 속도와 jitter(목표 간격과의 차이)를 계산하는 클래스
+class TickStats:
+    def __init__(self, tick_interval, window=100):
+        self.tick_interval = tick_interval
+        self.intervals = deque(maxlen=window)
+        self.last_tick = None
+        self.ticks = 0
+        self.catch_up_drops = 0
 
-# 콘솔 input을 반복해서 받기 위한 클래스
+    def record(self, now):
+        if self.last_tick is not None:
+            self.intervals.append(now - self.last_tick)
+        self.last_tick = now
+        self.ticks += 1
+
+    def achieved_rate(self):
+        # 최근 window 동안의 초당 틱 수
+        if not self.intervals:
+            return 0.0
+        return len(self.intervals) / sum(self.intervals) if sum(self.intervals) else float("inf")
+
+    def jitter(self):
+        # 틱 간격이 목표 간격에서 평균적으로 얼마나 벗어났는지(초)
+        if not self.intervals:
+            return 0.0
+        return sum(abs(interval - self.tick_interval) for interval in self.intervals) / len(self.intervals)
+
+    def summary(self):
+        return {
+            "ticks": self.ticks,
+            "target_rate": 1 / self.tick_interval,
+            "achieved_rate": self.achieved_rate(),
+            "jitter": self.jitter(),
+            "max_interval": max(self.intervals, default=0.0),
+            "catch_up_drops": self.catch_up_drops,
+        }
+
+# 고정 간격(fixed timestep)으로 게임을 진행하는 루프
+# 흐른 시간을 accumulator에 모아 tick_interval마다 한 틱씩 진행하고, 늦어지면 여러 틱을 몰아서 따라잡음
 class GameLoopController:
-    def __init__(self, input_processor, game_updater, enemy_spawner):
+    def __init__(self, input_processor, game_updater, enemy_spawner, tick_rate=10, input_reader=None,
+                 clock=time.monotonic, sleep=time.sleep, max_catch_up=5, on_game_over=None, timers=None):
         self.input_processor = input_processor
         self.game_updater = game_updater
         self.enemy_spawner = enemy_spawner
         self.running = True
+        # 게임이 끝날 때 한 번 (PlayerStatus, 진행한 틱 수)로 호출: 결과 기록용
+        self.on_game_over = on_game_over
+
+        self.tick_interval = 1 / tick_rate
+        self.input_reader = input_reader or ConsoleInputReader()
+        self.clock = clock
+        self.sleep = sleep
+        # 한 번에 따라잡는 최대 틱 수: 넘으면 밀린 시간을 버려 계속 뒤처지는 것을 막음
+        self.max_catch_up = max_catch_up
+        self.stats = TickStats(self.tick_interval)
+        # 지연 이벤트(Enemy 생성 등)를 거는 타이머 휠. 여러 게임이 하나를 같이 쓸 수 있음 (없으면 이 게임 전용)
+        self.timers = timers
         
     def start(self):
-        threading.Thread(target=self.enemy_spawner.start_spawning, daemon=True).start()
+        if self.timers is None:
+            self.timers = TimerWheel(clock=self.clock)
+        self.enemy_spawner.schedule(self.timers, self.clock())
+        self.input_reader.start()
         
         # 메인 게임 루프
+        accumulator = 0.0
+        previous = self.clock()
         while self.running:
-            user_input = input("> ")
-            self.input_processor.process_input(user_input, self)
-            time.sleep(1)
-            self.game_updater.update()
-            
-            # 종료조건: life가 0이 될 때
-            if self.game_updater.check_game_over():
-                self.stop()
-                print("Game Over")
+            now = self.clock()
+            accumulator += now - previous
+            previous = now
+            # 된 타이머를 한 번에 실행 (생성 요청은 다음 틱의 spawn_pending에서 처리)
+            self.timers.advance(now)
+
+            steps = 0
+            while self.running and accumulator >= self.tick_interval:
+                if steps == self.max_catch_up:
+                    accumulator = 0.0
+                    self.stats.catch_up_drops += 1
+                    break
+                self.tick()
+                accumulator -= self.tick_interval
+                steps += 1
+
+            self.sleep(max(0.0, self.tick_interval - accumulator))
+
+    def tick(self):
+        # 틱 시작 시점에 쌓인 입력을 한 번에 처리한 뒤 월드를 한 틱 진행
+        with PROFILER.phase("input"):
+            for user_input in self.input_reader.drain():
+                self.input_processor.process_input(user_input, self)
+                if not self.running:
+                    return
+        self.game_updater.update()
+        self.stats.record(self.clock())
+        
+        # 종료조건: life가 0이 될 때
+        if self.game_updater.check_game_over():
+            self.stop()
+            log("Game Over")
             
     def stop(self):
+        if not self.running:
+            return
         self.running = False
         self.enemy_spawner.stop()
+        if self.on_game_over is not None:
+            self.on_game_over(self.game_updater.player_status, self.stats.ticks)
 
 # 사용자 콘솔 입력 토큰 단위로 받아 넘겨주는 클래스
 class InputProcessor:
     def __init__(self, handlers):
         self.handlers = handlers
+        # 리플레이 기록기 (replay.ReplayRecorder): 받은 입력을 그대로 남김
+        self.recorder = None
     
     def process_input(self, user_input, controller):
+        if self.recorder is not None:
+            self.recorder.record_input(user_input)
         tokens = user_input.strip().lower().split()
         if not tokens:
             return
@@ -328,63 +713,359 @@ class InputProcessor:
 
 # 게임 상태(이동) 업데이트
 class GameUpdater:
-    def __init__(self, position_updater, gun, enemy_spawner):
+    def __init__(self, position_updater, gun, enemy_spawner, player_status=None, width=800, height=600):
         self.position_updater = position_updater
         self.gun = gun
         self.enemy_spawner = enemy_spawner
         
-        self.bottom = Bottom(800, 600)  
-        self.left_wall = LeftWalls(800, 600)
-        self.right_wall = RightWalls(800, 600)
+        self.bottom = Bottom(width, height)  
+        self.left_wall = LeftWalls(width, height)
+        self.right_wall = RightWalls(width, height)
         
-        # 플레이어 상태 참조 (충돌 핸들러로부터)
-        enemy = self.enemy_spawner.enemy_creator.create_object()
-        self.player_status = enemy.coll_handler.player_status
+        # 플레이어 상태 참조 (충돌 핸들러와 같은 객체를 공유)
+        self.player_status = player_status or EnemyCollisionHandler().player_status
+        # 리플레이 기록기: 틱이 끝날 때마다 알림 (주기적으로 월드 keyframe 기록)
+        self.recorder = None
     
+    @PROFILER.timed("update")
     def update(self):
+        # 스포너 스레드가 넘긴 생성 요청을 먼저 반영 (목록은 틱 스레드에서만 바뀜)
+        with PROFILER.phase("spawn"):
+            self.enemy_spawner.spawn_pending()
+
         # 각 오브젝트 위치 업데이트
         bullets = self.gun.get_bullets()
         enemies = self.enemy_spawner.get_enemies()
+        PROFILER.observe_count("bullets", len(bullets))
+        PROFILER.observe_count("enemies", len(enemies))
         
-        self.position_updater.update_object_position(bullets)
-        self.position_updater.update_object_position(enemies)
+        with PROFILER.phase("movement"):
+            self.position_updater.update_object_position(bullets)
+            self.position_updater.update_object_position(enemies)
 
         # 바뀐 위치가 충돌이 일어난 곳인지
-        self.position_updater.update_object_collision(bullets, enemies)
-        self.position_updater.update_object_collision(bullets, self.left_wall)
-        self.position_updater.update_object_collision(bullets, self.right_wall) 
-        self.position_updater.update_object_collision(enemies, self.bottom) 
+        self.position_updater.update_collisions((
+            (bullets, enemies),
+            (bullets, self.left_wall),
+            (bullets, self.right_wall),
+            (enemies, self.bottom),
+        ))
+
+        if self.recorder is not None:
+            self.recorder.record_tick(self)
+
+    def check_game_over(self):
+        # life를 다 쓰면 게임 종료
+        return self.player_status.get_life() <= 0
+
+# 스포너 스레드 -> 틱 루프로 생성 요청을 넘기는 크기 제한 큐
+# 스레드는 요청만 넣고 Enemy 생성/목록 추가는 틱이 한 번에 꺼내서 함: 틱이 목록을 도는 중에 목록이 바뀌지 않음
+class SpawnQueue:
+    def __init__(self, capacity=32, clock=time.monotonic):
+        self.capacity = capacity
+        self.requests = queue.Queue(maxsize=capacity)
+        self.clock = clock
+        # 깊이/처리량 지표
+        self.max_depth = 0
+        self.enqueued = 0
+        self.drained = 0
+        self.full_waits = 0
+        self.last_batch = 0
+        self.max_wait = 0.0
+
+    def put(self, timeout=None):
+        # 큐가 가득 차면 timeout까지 기다림(backpressure): 틱이 못 따라가면 스포너가 느려짐
+        # 그래도 자리가 없으면 False
+        try:
+            self.requests.put_nowait(self.clock())
+        except queue.Full:
+            self.full_waits += 1
+            try:
+                self.requests.put(self.clock(), timeout=timeout)
+            except queue.Full:
+                return False
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.requests.qsize())
+        return True
+
+    def drain(self):
+        # 지금까지 쌓인 요청 시각을 모두 꺼냄
+        drained = []
+        while True:
+            try:
+                drained.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        now = self.clock()
+        for requested_at in drained:
+            self.max_wait = max(self.max_wait, now - requested_at)
+        self.drained += len(drained)
+        self.last_batch = len(drained)
+        return drained
+
+    def metrics(self):
+        return {
+            "depth": self.requests.qsize(),
+            "capacity": self.capacity,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "drained": self.drained,
+            "full_waits": self.full_waits,
+            "last_batch": self.last_batch,
+            "max_wait": self.max_wait,
+        }
+
+# Enemy 생성 간격 패턴: delays(rng)는 다음 Enemy까지 기다릴 시간(초)을 끝없이 내어줌
+class SpawnPattern(ABC):
+    @abstractmethod
+    def delays(self, rng):
+        pass
+
+class FixedInterval(SpawnPattern):
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def delays(self, rng):
+        while True:
+            yield self.seconds
+
+class UniformInterval(SpawnPattern):
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def delays(self, rng):
+        while True:
+            yield rng.uniform(self.low, self.high)
+
+class ExponentialInterval(SpawnPattern):
+    # 평균 mean초의 지수 분포 간격 (Poisson 도착)
+    def __init__(self, mean):
+        self.mean = mean
+
+    def delays(self, rng):
+        while True:
+            yield rng.expovariate(1 / self.mean)
+
+class Waves(SpawnPattern):
+    # size마리를 spacing초 간격으로 한 웨이브로 내보내고, pause 패턴만큼 쉰 뒤 다음 웨이브 (웨이브마다 growth마리씩 늘어남)
+    def __init__(self, size, spacing, pause, growth=0, max_size=None):
+        self.size = size
+        self.spacing = spacing
+        self.pause = pause
+        self.growth = growth
+        self.max_size = max_size
+
+    def delays(self, rng):
+        pauses = self.pause.delays(rng)
+        size = self.size
+        while True:
+            yield next(pauses)
+            for _ in range(size - 1):
+                yield self.spacing
+            size += self.growth
+            if self.max_size is not None:
+                size = min(size, self.max_size)
 
 # Enemy 틱당 반복 생성
 class EnemySpawner:
-    def __init__(self, enemy_creator):
+    def __init__(self, enemy_creator, spawn_interval=(2, 5), rng=random, queue_capacity=32, pattern=None):
         self.enemy_creator = enemy_creator
         self.enemies = []
         self.running = True
-    
-    def start_spawning(self):
-        while self.running:
-            time.sleep(random.uniform(2, 5))
+        # 다음 Enemy까지 기다리는 시간(초) 범위 (pattern이 없을 때의 균등 분포)
+        self.spawn_interval = spawn_interval
+        # 생성 간격 패턴 (SpawnPattern: 웨이브, 지수 분포 등)
+        self.pattern = pattern
+        self.pattern_delays = None
+        self.rng = rng
+        self.next_spawn_at = None
+        # 타이머 휠이 넣고 틱이 꺼내는 생성 요청 (휠은 다른 게임의 스레드에서 advance될 수도 있음)
+        self.pending = SpawnQueue(queue_capacity)
+        self.timers = None
+        self.timer = None
+        # 리플레이 기록기: 생성된 Enemy 위치를 남김 (재생할 때는 난수 대신 이 위치로 생성)
+        self.recorder = None
+
+    def next_delay(self):
+        if self.pattern is None:
+            return self.rng.uniform(*self.spawn_interval)
+        if self.pattern_delays is None:
+            self.pattern_delays = self.pattern.delays(self.rng)
+        return next(self.pattern_delays)
 
-            # enemy 공장으로부터 받아 옴
-            enemy = self.enemy_creator.create_object()
+    def schedule(self, timers, now):
+        # 스레드 대신 타이머 휠(TimerWheel)에 다음 생성 시각을 걸어 둠. 여러 게임이 휠 하나를 같이 씀
+        self.timers = timers
+        self.next_spawn_at = now + self.next_delay()
+        self.timer = timers.schedule_at(self.next_spawn_at, self.spawn_timer)
 
-            self.enemies.append(enemy)
-            print(f"Enemy 생성됨")
+    def spawn_timer(self):
+        # 생성 시각이 됨: 요청만 넣고(생성은 틱이 spawn_pending에서) 다음 시각을 다시 걸어 둠
+        # advance가 늦게 불렸으면 그 사이 밀린 생성도 한 번에 넣음. 큐가 가득 차면 그 생성은 버림
+        now = self.timers.now()
+        while self.running and self.next_spawn_at <= now:
+            self.pending.put(timeout=0)
+            self.next_spawn_at += self.next_delay()
+        if self.running:
+            self.timer = self.timers.schedule_at(self.next_spawn_at, self.spawn_timer)
+
+    def spawn_pending(self):
+        # 틱 시작에 호출: 쌓인 요청만큼 Enemy를 한 번에 생성
+        for _ in self.pending.drain():
+            self.spawn()
+
+    def spawn(self):
+        # enemy 공장으로부터 받아 옴
+        enemy = self.enemy_creator.create_object()
+        if self.recorder is not None:
+            self.recorder.record_spawn(enemy)
+
+        self.enemies.append(enemy)
+        log(f"Enemy 생성됨")
+        return enemy
+
+    def spawn_due(self, now):
+        # 스레드 없이 틱마다 시각을 넘겨받아 생성 (헤드리스 모드용)
+        if self.next_spawn_at is None:
+            self.next_spawn_at = now + self.next_delay()
+        while self.running and now >= self.next_spawn_at:
+            self.spawn()
+            self.next_spawn_at += self.next_delay()
     
     def get_enemies(self):
+        # 배열 저장소를 쓰면 저장소의 뷰를, 아니면 살아 있는 Enemy 리스트를 반환
+        store = getattr(self.enemy_creator, "store", None)
+        if store is not None:
+            return store.view()
+        self.enemies = prune(self.enemies, self.enemy_creator.pool)
         return self.enemies
         
     def stop(self):
         self.running = False
+        if self.timer is not None:
+            self.timer.cancel()
+
+# 헤드리스 모드용 가상 시계: sleep하면 기다리지 않고 시간만 앞으로 감
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+# (시각, 명령) 목록이나 제너레이터를 받아 가상 시계가 그 시각에 닿으면 내어주는 입력
+# 예: [(0.5, "fire 30"), (1.0, "fire -15"), (60, "gameover")]
+class ScriptedInput:
+    def __init__(self, script, clock):
+        self.script = iter(script)
+        self.clock = clock
+        self.pending = next(self.script, None)
+
+    def start(self):
+        pass
+
+    def drain(self):
+        drained = []
+        while self.pending is not None and self.pending[0] <= self.clock():
+            drained.append(self.pending[1])
+            self.pending = next(self.script, None)
+        return drained
+
+# 헤드리스 실행 결과: 마지막 PlayerStatus와 틱별 통계
+class HeadlessResult:
+    def __init__(self, player_status, ticks, sim_time, wall_time, tick_stats):
+        self.player_status = player_status
+        self.ticks = ticks
+        self.sim_time = sim_time
+        self.wall_time = wall_time
+        self.tick_stats = tick_stats
+
+    def summary(self):
+        return {
+            "score": self.player_status.get_score(),
+            "life": self.player_status.get_life(),
+            "ticks": self.tick_stats.ticks,
+            "sim_time": self.sim_time,
+            "wall_time": self.wall_time,
+        }
+
+# 콘솔/스레드/실제 sleep 없이 가상 시계로 게임을 끝까지 빠르게 돌리는 클래스
+class HeadlessRunner:
+    def __init__(self, game, script=(), max_time=600, record_ticks=True):
+        # max_time: 가상 시간(초) 상한. 그 전에 life가 0이 되거나 gameover 명령이 오면 끝남
+        self.game = game
+        self.clock = VirtualClock()
+        self.script = script
+        self.max_time = max_time
+        self.record_ticks = record_ticks
+
+    def run(self):
+        loop = self.game.game_loop
+        loop.clock = self.clock
+        loop.sleep = self.clock.sleep
+        loop.input_reader = ScriptedInput(self.script, self.clock)
+        spawner = self.game.enemy_spawner
+
+        ticks = []
+        started = time.perf_counter()
+        with quiet():
+            while loop.running and self.clock() < self.max_time:
+                tick_started = time.perf_counter()
+                self.clock.sleep(loop.tick_interval)
+                spawner.spawn_due(self.clock())
+                loop.tick()
+                if self.record_ticks:
+                    ticks.append({
+                        "time": self.clock(),
+                        "bullets": len(self.game.gun.get_bullets()),
+                        "enemies": len(spawner.get_enemies()),
+                        "score": self.game.player_status.get_score(),
+                        "life": self.game.player_status.get_life(),
+                        "wall_time": time.perf_counter() - tick_started,
+                    })
+        return HeadlessResult(self.game.player_status, ticks, self.clock(),
+                              time.perf_counter() - started, loop.stats)
 
 class ShootingGame:
-    def __init__(self):
-        self.gun = GunObjectCreater().create_object()
-        self.enemy_creator = EnemyObjectCreater()
-        self.position_updater = PositionUpdater()
+    def __init__(self, use_array_store=False, broadphase="brute", width=800, height=600, tick_rate=10, seed=None,
+                 on_game_over=None, spawn_pattern=None, timers=None, bullet_speed=None, enemy_speed=None,
+                 max_bullet=None):
+        # use_array_store: Bullet/Enemy 상태를 NumPy 배열에 두고 한 번에 이동 (numpy 필요)
+        # broadphase: 충돌 후보를 고르는 방식 ("brute", "grid", "sweep"), "event"면 궤적으로 충돌 틱을 미리 계산
+        # tick_rate: 초당 틱 수 (입력과 상관없이 이 속도로 월드가 진행)
+        # seed: Enemy 생성 위치/간격 난수 시드 (같은 시드+같은 입력이면 같은 게임)
+        # on_game_over: 게임이 끝날 때 (PlayerStatus, 틱 수)로 호출 (예: Django 순위표에 기록)
+        # spawn_pattern: Enemy 생성 간격 패턴 (SpawnPattern, 없으면 2~5초 균등 분포)
+        # timers: 여러 게임이 같이 쓰는 TimerWheel (없으면 start할 때 게임마다 하나)
+        # bullet_speed, enemy_speed: 이 게임의 Bullet/Enemy 틱당 이동량 (없으면 클래스 기본값)
+        # max_bullet: 이 게임의 Gun이 한 번에 가질 수 있는 Bullet 수 (없으면 Gun 기본값)
+        if use_array_store and EntityStore is None:
+            raise ImportError("use_array_store=True 사용하려면 numpy가 필요합니다")
+        bullet_store = EntityStore() if use_array_store else None
+        enemy_store = EntityStore() if use_array_store else None
+
+        # 모든 충돌 관리자가 한 PlayerStatus를 공유해야 점수/생명이 한 곳에 모임
+        self.player_status = PlayerStatus()
+        self.gun = GunObjectCreater(Bottom(width, height)).create_object(
+            bullet_store, BulletCollisionHandler(self.player_status), entity_type(Bullet, bullet_speed))
+        self.rng = random.Random(seed)
+        self.enemy_creator = EnemyObjectCreater(enemy_store, EnemyCollisionHandler(self.player_status), self.rng,
+                                                enemy_type=entity_type(Enemy, enemy_speed))
+        if max_bullet is not None:
+            self.gun.max_bullet = max_bullet
+        # 같은 설정의 게임을 다시 만들 때(리플레이) 쓰는 생성 인자. 속력/Bullet 수는 실제로 정해진 값을 남김
+        # (만든 뒤 gun.max_bullet 등을 바꾸면 options와 달라지므로 설정은 생성 인자로만 넘길 것)
+        self.options = {"use_array_store": use_array_store, "broadphase": broadphase, "width": width,
+                        "height": height, "tick_rate": tick_rate, "seed": seed,
+                        "bullet_speed": self.gun.bullet_type.speed, "enemy_speed": self.enemy_creator.enemy_type.speed,
+                        "max_bullet": self.gun.max_bullet}
+        self.position_updater = make_position_updater(broadphase)
         
-        self.enemy_spawner = EnemySpawner(self.enemy_creator)
+        self.enemy_spawner = EnemySpawner(self.enemy_creator, rng=self.rng, pattern=spawn_pattern)
 
         self.handlers = {
             "fire": FireHandler(self.gun),
@@ -392,12 +1073,18 @@ class ShootingGame:
         }
         
         self.input_processor = InputProcessor(self.handlers)
-        self.game_updater = GameUpdater(self.position_updater, self.gun, self.enemy_spawner)
-        self.game_loop = GameLoopController(self.input_processor, self.game_updater, self.enemy_spawner)
+        self.game_updater = GameUpdater(self.position_updater, self.gun, self.enemy_spawner,
+                                        self.player_status, width, height)
+        self.game_loop = GameLoopController(self.input_processor, self.game_updater, self.enemy_spawner, tick_rate,
+                                            on_game_over=on_game_over, timers=timers)
     
     def start(self):
         self.game_loop.start()
 
+    def run_headless(self, script=(), max_time=600, record_ticks=True):
+        # 콘솔 없이 script의 입력대로 가상 시간 max_time초까지 돌리고 결과 반환
+        return HeadlessRunner(self, script, max_time, record_ticks).run()
+
 if __name__ == "__main__":
     game = ShootingGame()
     game.start()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import itertools
+import math
+import threading
+import time
+
+# 여러 게임이 함께 쓰는 계층형 타이머 휠 (hierarchical timer wheel)
+# 게임마다 잠자는 스레드를 두지 않고, 지연 이벤트(Enemy 생성 등)를 휠에 걸어 두었다가 틱에서 advance로 한 번에 꺼냄
+#   timers = TimerWheel(resolution=0.01)
+#   timer = timers.schedule_at(when, callback, *args)   -> when(초)이 지나면 callback(*args)
+#   timer.cancel()
+#   timers.advance(now)                                  -> now까지 된 타이머를 시각 순서대로 한 번에 실행
+# 시각은 resolution 단위 정수로 다루고, 단계(level)마다 SLOTS칸: 0단계 한 칸 = 1단위, 1단계 한 칸 = SLOTS단위 ...
+# 등록/취소는 O(1), advance는 타이머가 걸린 칸 수 + 실행한 타이머 수에 비례 (낮은 단계가 비어 있으면 다음 칸 경계로 건너뜀)
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+LEVELS = 4
+
+class Timer:
+    __slots__ = ("due", "order", "callback", "args", "cancelled")
+
+    def __init__(self, due, order, callback, args):
+        self.due = due
+        self.order = order
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        # 휠에서 바로 빼지 않고 표시만 함 (꺼낼 때 버림)
+        self.cancelled = True
+
+class TimerWheel:
+    def __init__(self, resolution=0.01, clock=time.monotonic):
+        self.resolution = resolution
+        self.clock = clock
+        self.origin = clock()
+        self.current = 0        # 처리가 끝난 시각(단위)
+        self.wheels = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.counts = [0] * LEVELS  # 단계마다 걸린 타이머 수
+        # 가장 높은 단계로도 담지 못할 만큼 먼 타이머 (가장 높은 단계가 한 바퀴 돌 때마다 다시 배치)
+        self.overflow = []
+        self.pending = 0
+        self.order = itertools.count()
+        self.lock = threading.RLock()
+        # 지표: 실행한 타이머 수, 한 번의 advance에서 실행한 최대 수
+        self.fired = 0
+        self.max_batch = 0
+
+    def now(self):
+        # 마지막으로 advance한 시각(초)
+        return self.origin + self.current * self.resolution
+
+    def schedule_at(self, when, callback, *args):
+        # 단위로 올림: when보다 일찍 실행되지 않음. 이미 지난 시각이면 다음 advance에서 실행
+        due = math.ceil((when - self.origin) / self.resolution - 1e-9)
+        with self.lock:
+            timer = Timer(max(due, self.current + 1), next(self.order), callback, args)
+            self.place(timer)
+            self.pending += 1
+        return timer
+
+    def schedule(self, delay, callback, *args):
+        return self.schedule_at(self.now() + delay, callback, *args)
+
+    def place(self, timer):
+        # due와 지금 시각의 상위 비트가 같아지는 가장 낮은 단계에 넣음: 그 칸은 due가 되기 전에 아래 단계로 내려옴
+        for level in range(LEVELS):
+            shift = SLOT_BITS * (level + 1)
+            if timer.due >> shift == self.current >> shift:
+                self.wheels[level][(timer.due >> (SLOT_BITS * level)) & (SLOTS - 1)].append(timer)
+                self.counts[level] += 1
+                return
+        self.overflow.append(timer)
+
+    def cascade(self):
+        # current가 칸 경계를 넘었으면 위 단계의 그 칸을 다시 배치 (높은 단계부터)
+        if self.current & ((1 << (SLOT_BITS * LEVELS)) - 1) == 0 and self.overflow:
+            timers, self.overflow = self.overflow, []
+            for timer in timers:
+                self.place(timer)
+        for level in range(LEVELS - 1, 0, -1):
+            if self.current & ((1 << (SLOT_BITS * level)) - 1) == 0:
+                slot = self.wheels[level][(self.current >> (SLOT_BITS * level)) & (SLOTS - 1)]
+                if slot:
+                    timers = slot[:]
+                    del slot[:]
+                    self.counts[level] -= len(timers)
+                    for timer in timers:
+                        self.place(timer)
+
+    def advance(self, now=None):
+        # now(기본 clock())까지 된 타이머를 모아 (시각, 등록 순서)대로 실행하고 실행한 수 반환
+        # 콜백은 lock 밖에서 실행: 콜백 안에서 다시 등록해도 됨 (그 타이머는 다음 advance에서)
+        now = self.clock() if now is None else now
+        target = math.floor((now - self.origin) / self.resolution + 1e-9)
+        due = []
+        with self.lock:
+            while self.current < target:
+                if not self.pending:
+                    # 걸린 타이머가 없으면 칸을 하나씩 돌지 않음 (다음 등록은 place가 새 current 기준으로 배치)
+                    self.current = target
+                    break
+                # 아래 단계들이 비어 있으면 타이머가 걸린 단계의 다음 칸 경계 직전까지 건너뜀
+                step = 1
+                for level in range(LEVELS):
+                    if self.counts[level]:
+                        break
+                    step = 1 << (SLOT_BITS * (level + 1))
+                if step > 1:
+                    self.current = min(target, (self.current // step + 1) * step - 1)
+                    if self.current == target:
+                        break
+                self.current += 1
+                self.cascade()
+                slot = self.wheels[0][self.current & (SLOTS - 1)]
+                if slot:
+                    self.pending -= len(slot)
+                    self.counts[0] -= len(slot)
+                    due.extend(timer for timer in slot if not timer.cancelled)
+                    del slot[:]
+        if not due:
+            return 0
+        due.sort(key=lambda timer: (timer.due, timer.order))
+        for timer in due:
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+        self.fired += len(due)
+        self.max_batch = max(self.max_batch, len(due))
+        return len(due)
+
+    def __len__(self):
+        # 아직 실행하지 않은 타이머 수 (취소 표시만 한 것 포함)
+        return self.pending